@@ -12,6 +12,7 @@ from core.views import (
     home,
     personal_details,
     required_documents,
+    verification_status,
 )
 
 urlpatterns = [
@@ -21,6 +22,7 @@ urlpatterns = [
     path("success/", claim_success, name="claim_success"),
     path("coverage-items-selection/", coverage_items_selection, name="coverage_items_selection"),
     path("required-documents/", required_documents, name="required_documents"),
+    path("verification-status/", verification_status, name="verification_status"),
     path("claim-summary/", claim_summary, name="claim_summary"),
     path("admin-view-claim/", admin_view_claim, name="admin_view_claim"),
     path("admin/", admin.site.urls),
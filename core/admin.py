@@ -4,7 +4,16 @@ from django.contrib import admin
 from django.http import HttpResponse
 from django.urls import path
 
-from .models import Block, Blockchain, Claim, CoverageItem, Customer
+from .models import (
+    ApiCredit,
+    Block,
+    Blockchain,
+    Claim,
+    CoverageItem,
+    Customer,
+    VerificationJob,
+    VerificationJobBaggageTag,
+)
 
 
 class ExportCsvMixin:
@@ -29,7 +38,12 @@ class ExportCsvMixin:
         # Get the model's metadata
         meta = self.model._meta
         # Get field names from the metadata
-        field_names = [field.name for field in meta.fields]
+        # Binary fields such as the packed error scores have no text form
+        field_names = [
+            field.name
+            for field in meta.fields
+            if field.get_internal_type() != "BinaryField"
+        ]
         # Initialize an HTTP response with content type set to text/csv
         response = HttpResponse(content_type="text/csv")
         # Set content disposition header to define the filename
@@ -121,8 +135,40 @@ class BlockAdmin(admin.ModelAdmin, ExportCsvMixin):
     list_filter = ("blockchain",)
 
 
+class VerificationJobBaggageTagInline(admin.TabularInline):
+    model = VerificationJobBaggageTag
+    extra = 0
+
+
+class VerificationJobAdmin(admin.ModelAdmin):
+    list_display = (
+        "id",
+        "status",
+        "claim",
+        "created_on",
+        "started_on",
+        "finished_on",
+    )
+    list_filter = ("status",)
+    readonly_fields = ("results", "error_message", "started_on", "finished_on")
+    ordering = ("-created_on",)
+    inlines = (VerificationJobBaggageTagInline,)
+
+
+class ApiCreditAdmin(admin.ModelAdmin):
+    list_display = (
+        "name",
+        "remaining_calls",
+        "daily_quota",
+        "calls_today",
+        "quota_date",
+    )
+
+
+admin.site.register(ApiCredit, ApiCreditAdmin)
 admin.site.register(Block, BlockAdmin)
 admin.site.register(Blockchain, BlockchainAdmin)
 admin.site.register(Claim, ClaimAdmin)
 admin.site.register(Customer, CustomerAdmin)
 admin.site.register(CoverageItem)
+admin.site.register(VerificationJob, VerificationJobAdmin)
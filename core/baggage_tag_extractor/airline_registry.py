@@ -0,0 +1,127 @@
+import json
+import re
+from collections import namedtuple
+
+AIRLINE_FIELDS = (
+    "airline_name_regex",
+    "flight_number_regex",
+    "booking_ref_regex",
+    "passenger_name_regex",
+)
+
+AirlinePatterns = namedtuple(
+    "AirlinePatterns",
+    ["key", "airline_name", "flight_number", "booking_ref", "passenger_name"],
+)
+
+
+def validate_airline_configs(configs):
+    """
+    Check that the airline configs have the expected schema and that every pattern compiles.
+
+    :param configs: dict, airline key -> config with the regexes of AIRLINE_FIELDS and an optional int priority
+    :raises ValueError: describing every problem found
+    """
+    if not isinstance(configs, dict) or not configs:
+        raise ValueError("The airline configs must be a non-empty object.")
+
+    problems = []
+    for key, config in configs.items():
+        if not isinstance(config, dict):
+            problems.append(f"{key}: the config must be an object")
+            continue
+
+        for field in AIRLINE_FIELDS:
+            pattern = config.get(field)
+            if not isinstance(pattern, str) or not pattern:
+                problems.append(f"{key}.{field}: missing or not a string")
+                continue
+            try:
+                re.compile(pattern)
+            except re.error as e:
+                problems.append(f"{key}.{field}: invalid regex ({e})")
+
+        priority = config.get("priority", 0)
+        if not isinstance(priority, int) or isinstance(priority, bool):
+            problems.append(f"{key}.priority: must be an integer")
+
+        unknown = set(config) - set(AIRLINE_FIELDS) - {"priority"}
+        if unknown:
+            problems.append(f"{key}: unknown fields {sorted(unknown)}")
+
+    if problems:
+        raise ValueError("Invalid airline configs: " + "; ".join(problems))
+
+
+class AirlineRegistry:
+    """
+    The airline configs of the baggage tag extractor, compiled once.
+
+    Airlines are detected by searching the tag text with each airline pattern in turn, the first airline that
+    matches wins. Airlines are tried by priority, highest first, and airlines with the same priority keep the
+    order of the config file.
+    """
+
+    def __init__(self, configs):
+        """
+        :param configs: dict, airline configs, see validate_airline_configs
+        :raises ValueError: if the configs are invalid
+        """
+        validate_airline_configs(configs)
+
+        # sorted is stable, so airlines with the same priority keep the order of the file
+        keys = sorted(configs, key=lambda key: -configs[key].get("priority", 0))
+        self._airlines = [
+            AirlinePatterns(
+                key=key,
+                airline_name=re.compile(
+                    configs[key]["airline_name_regex"], re.IGNORECASE
+                ),
+                flight_number=re.compile(configs[key]["flight_number_regex"]),
+                booking_ref=re.compile(configs[key]["booking_ref_regex"]),
+                passenger_name=re.compile(configs[key]["passenger_name_regex"]),
+            )
+            for key in keys
+        ]
+        self._by_key = {airline.key: airline for airline in self._airlines}
+
+    def __len__(self):
+        return len(self._airlines)
+
+    def __contains__(self, key):
+        return key in self._by_key
+
+    def get(self, key):
+        """
+        :param key: str, airline key
+        :return: AirlinePatterns, compiled patterns of the airline, or None if the airline is unknown
+        """
+        return self._by_key.get(key)
+
+    def detect(self, text):
+        """
+        Find the airline of a tag from its text.
+
+        :param text: str, text extracted from the tag
+        :return: AirlinePatterns, patterns of the detected airline, or None if no airline matches
+        """
+        # Not a combined alternation: re tries every branch at every position of the text, which is slower than
+        # searching with each pattern in turn, and a single search cannot keep the priority order
+        for airline in self._airlines:
+            if airline.airline_name.search(text):
+                return airline
+        return None
+
+
+def load_airline_registry(config_path):
+    """
+    :param config_path: str, path of the airline configs JSON file
+    :return: AirlineRegistry
+    :raises ValueError: if the file is not valid JSON or the configs are invalid
+    """
+    with open(config_path, "r") as config_file:
+        try:
+            configs = json.load(config_file)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON in {config_path}: {e}")
+    return AirlineRegistry(configs)
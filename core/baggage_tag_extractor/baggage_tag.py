@@ -1,34 +1,45 @@
 import os
-import re
+from concurrent.futures import ThreadPoolExecutor
 
 from dotenv import load_dotenv
-from PIL import Image
 from pyzbar.pyzbar import decode
 
+from core.baggage_tag_extractor.airline_registry import load_airline_registry
+from core.baggage_tag_extractor.barcode import decode_barcode
+from core.common.config_reloader import ReloadingConfig
+from core.common.document_image import DocumentImage
 from core.common.extractor_utils import (
     extract_text,
-    load_config,
     setup_textract_client,
 )
+from core.common.ocr_backends import get_ocr_backend
 
 load_dotenv()
 
 
-AIRLINE_CONFIGS = load_config(
-    os.path.join(os.path.dirname(__file__), "configs", "airline_configs.json")
+AIRLINE_CONFIGS_PATH = os.path.join(
+    os.path.dirname(__file__), "configs", "airline_configs.json"
 )
+# Compiled once, and again whenever airline_configs.json is edited
+AIRLINE_REGISTRY = ReloadingConfig(AIRLINE_CONFIGS_PATH, load_airline_registry)
 USE_AWS = True  # Set to False when you don't want to Free Tier credits
+# Set to False to decode the whole photo at full resolution
+USE_BARCODE_LOCALIZATION = True
+# Tags of one claim are extracted in parallel, each thread mostly waits on Textract
+BAGGAGE_TAG_WORKERS = int(os.getenv("BAGGAGE_TAG_WORKERS", "4"))
 
 
-def read_barcode(image_path):
+def read_barcode(image):
     """
-    Read the barcode data from the given image path.
+    Read the barcode data from the given image.
 
-    :param image_path: str, path to the input image containing a barcode
+    :param image: DocumentImage, input image containing a barcode
     :return: str, decoded barcode data or None if no barcode is found
     """
-    image = Image.open(image_path)
-    barcodes = decode(image)
+    if USE_BARCODE_LOCALIZATION:
+        return decode_barcode(image.gray)
+
+    barcodes = decode(image.pil)
 
     if barcodes:
         return barcodes[0].data.decode("utf-8")
@@ -44,23 +55,28 @@ def process_passenger_name(raw_passenger_name, airline_name):
     return passenger_name
 
 
-def extract_details(text, airline_config):
+def extract_details(text, airline):
+    """
+    Extract the fields of a tag with the compiled patterns of its airline.
+
+    :param text: str, text extracted from the tag
+    :param airline: AirlinePatterns, patterns of the tag's airline
+    :return: tuple, (airline_name, flight_number, booking_ref, passenger_name), None for fields not found
+    """
     # Extract airline name
-    airline_name_match = re.search(
-        airline_config["airline_name_regex"], text, re.IGNORECASE
-    )
+    airline_name_match = airline.airline_name.search(text)
     airline_name = airline_name_match.group(0) if airline_name_match else None
 
     # Extract flight number
-    flight_number_match = re.search(airline_config["flight_number_regex"], text)
+    flight_number_match = airline.flight_number.search(text)
     flight_number = flight_number_match.group(0) if flight_number_match else None
 
     # Extract booking reference number
-    booking_ref_match = re.search(airline_config["booking_ref_regex"], text)
+    booking_ref_match = airline.booking_ref.search(text)
     booking_ref = booking_ref_match.group(0) if booking_ref_match else None
 
     # Extract passenger name
-    passenger_name_match = re.search(airline_config["passenger_name_regex"], text)
+    passenger_name_match = airline.passenger_name.search(text)
     if passenger_name_match:
         raw_passenger_name = passenger_name_match.group(0)
         passenger_name = process_passenger_name(raw_passenger_name, airline_name)
@@ -70,42 +86,38 @@ def extract_details(text, airline_config):
     return airline_name, flight_number, booking_ref, passenger_name
 
 
-def process_baggage_tag(image_path, textract_client):
+def process_baggage_tag(image, textract_client, ocr_backend=None):
     """
     Process the baggage tag image, extracting text and barcode information.
 
-    :param image_path: str, path to the input baggage tag image
+    :param image: DocumentImage, input baggage tag image
     :param textract_client: boto3 Textract client, used for extracting text from the image
+    :param ocr_backend: OCRBackend, engine used to read the tag
     :return: dict, extracted baggage tag information or None if the processing failed
     """
     text = extract_text(
-        image_path=image_path, textract_client=textract_client, use_aws=USE_AWS
+        image=image,
+        textract_client=textract_client,
+        use_aws=USE_AWS,
+        ocr_backend=ocr_backend,
     )
     if text is None:
         print("Failed to extract text.")
         return None
 
-    barcode = read_barcode(image_path)
-    if barcode is None:
-        print("Failed to read barcode.")
-        return None
-
-    # Determine the airline based on the extracted text
-    airline = None
-    for airline_key in AIRLINE_CONFIGS:
-        if re.search(
-            AIRLINE_CONFIGS[airline_key]["airline_name_regex"], text, re.IGNORECASE
-        ):
-            airline = airline_key
-            break
-
+    # Determine the airline based on the extracted text, before the barcode is decoded
+    airline = AIRLINE_REGISTRY.get().detect(text)
     if airline is None:
         print("Airline not found.")
         return None
 
-    airline_config = AIRLINE_CONFIGS[airline]
+    barcode = read_barcode(image)
+    if barcode is None:
+        print("Failed to read barcode.")
+        return None
+
     airline_name, flight_number, booking_ref, passenger_name = extract_details(
-        text, airline_config
+        text, airline
     )
 
     return {
@@ -117,15 +129,48 @@ def process_baggage_tag(image_path, textract_client):
     }
 
 
-def process_baggage_tag_image(image_path):
+def process_baggage_tag_image(source):
     """
     Process the baggage tag image and return the extracted information.
 
-    :param image_path: str, path to the input baggage tag image
+    :param source: bytes, memoryview, file-like object (e.g. an UploadedFile) or path of the baggage tag image
     :return: dict, extracted baggage tag information
     """
     textract_client = setup_textract_client(
         access_key=os.getenv("AWS_ACCESS_KEY"), secret_key=os.getenv("AWS_SECRET_KEY")
     )
-    result = process_baggage_tag(image_path, textract_client)
+    ocr_backend = get_ocr_backend(textract_client, use_aws=USE_AWS)
+    image = DocumentImage.from_source(source)
+    result = process_baggage_tag(image, textract_client, ocr_backend)
     return result
+
+
+def process_baggage_tag_images(sources, max_workers=BAGGAGE_TAG_WORKERS):
+    """
+    Process several baggage tag images concurrently, sharing one Textract client between them.
+
+    :param sources: list, baggage tag images, see process_baggage_tag_image
+    :param max_workers: int, maximum number of tags processed at the same time
+    :return: list, extracted baggage tag information of each tag in the order of sources, None for tags
+             that could not be processed
+    """
+    if not sources:
+        return []
+
+    # boto3 clients are thread-safe, so all tags share the client and its connection pool
+    textract_client = setup_textract_client(
+        access_key=os.getenv("AWS_ACCESS_KEY"), secret_key=os.getenv("AWS_SECRET_KEY")
+    )
+    ocr_backend = get_ocr_backend(textract_client, use_aws=USE_AWS)
+
+    def process(source):
+        # A tag that cannot be read is reported on its own, the other tags and documents are still checked
+        try:
+            image = DocumentImage.from_source(source)
+            return process_baggage_tag(image, textract_client, ocr_backend)
+        except Exception as e:
+            print(f"Failed to process baggage tag: {e}")
+            return None
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(sources))) as executor:
+        return list(executor.map(process, sources))
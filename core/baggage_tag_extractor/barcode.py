@@ -0,0 +1,199 @@
+import cv2
+import numpy as np
+from pyzbar.pyzbar import decode
+
+# Longest side of the downscaled copy that barcode regions are searched in
+LOCATE_MAX_SIDE = 800
+# Regions smaller than this fraction of the image are text or noise
+MIN_REGION_AREA = 0.002
+MAX_REGIONS = 3
+# Margin added around a region, barcodes need a quiet zone next to the outer bars to decode
+REGION_PADDING = 0.15
+# Longest side images are decoded at, from cheapest to most expensive; None is the full resolution
+DECODE_SIDES = (480, 960, None)
+# ZBar reads bars that are a little skewed in both scan directions, so these angles cover every rotation
+FALLBACK_ROTATIONS = (0, 30, 60)
+# None tries every symbology ZBar supports
+BARCODE_SYMBOLS = None
+
+
+def downscale(gray, max_side):
+    """
+    Downscale the image so its longest side is at most max_side pixels.
+
+    :param gray: ndarray, grayscale image
+    :param max_side: int, maximum length of the longest side, or None to keep the full resolution
+    :return: tuple (image, scale), where scale is the factor the image was resized by
+    """
+    height, width = gray.shape[:2]
+    if max_side is None or max(height, width) <= max_side:
+        return gray, 1.0
+
+    scale = max_side / max(height, width)
+    size = (max(1, round(width * scale)), max(1, round(height * scale)))
+    return cv2.resize(gray, size, interpolation=cv2.INTER_AREA), scale
+
+
+def rotate_image(gray, angle):
+    """
+    Rotate the image around its center, growing the canvas so no corner is cut off.
+
+    :param gray: ndarray, grayscale image
+    :param angle: float, counter-clockwise rotation in degrees
+    :return: ndarray, rotated image on a white background
+    """
+    if angle % 360 == 0:
+        return gray
+
+    height, width = gray.shape[:2]
+    matrix = cv2.getRotationMatrix2D((width / 2, height / 2), angle, 1.0)
+    cos, sin = abs(matrix[0, 0]), abs(matrix[0, 1])
+    new_width = int(height * sin + width * cos)
+    new_height = int(height * cos + width * sin)
+    matrix[0, 2] += new_width / 2 - width / 2
+    matrix[1, 2] += new_height / 2 - height / 2
+    return cv2.warpAffine(gray, matrix, (new_width, new_height), borderValue=255)
+
+
+def find_barcode_regions(gray, max_regions=MAX_REGIONS):
+    """
+    Find the regions of the image that look like a 1D barcode.
+
+    Bars have a strong gradient across them and almost none along them, so the gradients of a barcode all
+    point the same way whatever its angle, while the strokes of text and the edges in photos point in many
+    directions. Closing the map of those oriented gradients joins the bars of a barcode into one blob, whose
+    minimum area rectangle gives its position and angle.
+
+    :param gray: ndarray, grayscale image
+    :param max_regions: int, maximum number of regions to return
+    :return: list, rotated rectangles ((center_x, center_y), (width, height), angle) in the coordinates of the
+             input image, largest first
+    """
+    small, scale = downscale(gray, LOCATE_MAX_SIDE)
+
+    small = small.astype(np.float32)
+    gradient_x = cv2.Scharr(small, cv2.CV_32F, 1, 0)
+    gradient_y = cv2.Scharr(small, cv2.CV_32F, 0, 1)
+    # Structure tensor, averaged over a few bars
+    xx = cv2.blur(gradient_x * gradient_x, (9, 9))
+    yy = cv2.blur(gradient_y * gradient_y, (9, 9))
+    xy = cv2.blur(gradient_x * gradient_y, (9, 9))
+    # Difference of its eigenvalues: gradient energy that points in one direction, at any angle
+    coherent = cv2.sqrt((xx - yy) ** 2 + 4 * xy * xy)
+    coherent = cv2.normalize(coherent, None, 0, 255, cv2.NORM_MINMAX).astype(np.uint8)
+    _, mask = cv2.threshold(coherent, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+
+    kernel_size = max(3, max(small.shape[:2]) // 40)
+    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (kernel_size, kernel_size))
+    mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, kernel)
+    # Remove the small blobs left by text before the regions are measured
+    mask = cv2.erode(mask, None, iterations=4)
+    mask = cv2.dilate(mask, None, iterations=4)
+
+    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    min_area = MIN_REGION_AREA * small.shape[0] * small.shape[1]
+    contours = [contour for contour in contours if cv2.contourArea(contour) >= min_area]
+    contours.sort(key=cv2.contourArea, reverse=True)
+
+    regions = []
+    for contour in contours[:max_regions]:
+        (center_x, center_y), (width, height), angle = cv2.minAreaRect(contour)
+        regions.append(
+            (
+                (center_x / scale, center_y / scale),
+                (width / scale, height / scale),
+                angle,
+            )
+        )
+    return regions
+
+
+def crop_region(gray, region, padding=REGION_PADDING):
+    """
+    Cut a rotated region out of the image and turn it upright.
+
+    Only the bounding box of the region is rotated, never the whole photo.
+
+    :param gray: ndarray, grayscale image
+    :param region: tuple, rotated rectangle as returned by find_barcode_regions
+    :param padding: float, margin added on every side, as a fraction of the region size
+    :return: ndarray, upright crop of the region
+    """
+    (center_x, center_y), (width, height), angle = region
+    width, height = width * (1 + 2 * padding), height * (1 + 2 * padding)
+
+    corners = cv2.boxPoints(((center_x, center_y), (width, height), angle))
+    image_height, image_width = gray.shape[:2]
+    left = max(0, int(np.floor(corners[:, 0].min())))
+    top = max(0, int(np.floor(corners[:, 1].min())))
+    right = min(image_width, int(np.ceil(corners[:, 0].max())))
+    bottom = min(image_height, int(np.ceil(corners[:, 1].max())))
+    patch = gray[top:bottom, left:right]
+    if angle % 90 == 0:
+        return patch
+
+    matrix = cv2.getRotationMatrix2D((center_x - left, center_y - top), angle, 1.0)
+    # Center the upright region in the output
+    matrix[0, 2] += width / 2 - (center_x - left)
+    matrix[1, 2] += height / 2 - (center_y - top)
+    return cv2.warpAffine(
+        patch, matrix, (int(round(width)), int(round(height))), borderValue=255
+    )
+
+
+def read_symbol(image):
+    """
+    :param image: ndarray, grayscale image
+    :return: str, data of the first barcode found in the image, or None
+    """
+    for barcode in decode(image, symbols=BARCODE_SYMBOLS):
+        try:
+            data = barcode.data.decode("utf-8")
+        except UnicodeDecodeError:
+            continue
+        if data.strip():
+            return data
+    return None
+
+
+def iter_decode_attempts(gray):
+    """
+    Generate the images to decode, from the cheapest and most likely to succeed to the most expensive.
+
+    The localized regions come first, each at increasing resolutions. If none of them decodes, the whole
+    image is tried at increasing resolutions and rotations.
+
+    :param gray: ndarray, grayscale image
+    :return: generator of ndarray
+    """
+    for region in find_barcode_regions(gray):
+        crop = crop_region(gray, region)
+        if crop.size == 0:
+            continue
+        for max_side in DECODE_SIDES:
+            resized, scale = downscale(crop, max_side)
+            yield resized
+            if scale == 1.0:
+                # Larger sizes would decode the same pixels again
+                break
+
+    for max_side in DECODE_SIDES:
+        resized, scale = downscale(gray, max_side)
+        for angle in FALLBACK_ROTATIONS:
+            yield rotate_image(resized, angle)
+        if scale == 1.0:
+            break
+
+
+def decode_barcode(gray):
+    """
+    Read a barcode from a photo, stopping at the first attempt that decodes.
+
+    :param gray: ndarray, grayscale image
+    :return: str, decoded barcode data or None if no barcode is found
+    """
+    for attempt in iter_decode_attempts(gray):
+        data = read_symbol(attempt)
+        if data is not None:
+            return data
+    return None
@@ -0,0 +1,60 @@
+import os
+import threading
+import time
+
+# Seconds between two checks of the config file, so busy workers do not stat it on every document
+DEFAULT_CHECK_INTERVAL = float(os.getenv("CONFIG_CHECK_INTERVAL", "1"))
+
+
+class ReloadingConfig:
+    """
+    A value built from a config file, rebuilt when the file changes on disk.
+
+    The first build happens on construction and its errors are raised, so a broken config fails at startup.
+    A broken edit of a running config is reported and the last valid value is kept.
+    """
+
+    def __init__(self, path, build, check_interval=DEFAULT_CHECK_INTERVAL):
+        """
+        :param path: str, path of the config file
+        :param build: callable, builds the value from the path of the config file
+        :param check_interval: float, minimum number of seconds between two checks of the file
+        """
+        self.path = path
+        self.build = build
+        self.check_interval = check_interval
+        self.reloads = 0
+        self._lock = threading.Lock()
+        self._stamp = self._file_stamp()
+        self._value = build(path)
+        self._checked = time.monotonic()
+
+    def _file_stamp(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def get(self):
+        """
+        :return: the value built from the current config file
+        """
+        if time.monotonic() - self._checked < self.check_interval:
+            return self._value
+
+        with self._lock:
+            self._checked = time.monotonic()
+            stamp = self._file_stamp()
+            if stamp is not None and stamp != self._stamp:
+                # Record the stamp first, so a broken file is reported once and not rebuilt on every check
+                self._stamp = stamp
+                try:
+                    self._value = self.build(self.path)
+                    self.reloads += 1
+                    print(f"Reloaded {self.path}")
+                except Exception as e:
+                    print(
+                        f"Error reloading {self.path}, keeping the previous config: {e}"
+                    )
+            return self._value
@@ -0,0 +1,340 @@
+import io
+import math
+import os
+import threading
+from functools import cached_property
+
+import cv2
+import numpy as np
+import pypdfium2 as pdfium
+from PIL import Image
+
+from core.common.payload_optimizer import OCR_PAYLOAD, optimize_image
+
+PDF_SIGNATURE = b"%PDF"
+# Resolution PDFs are rendered at when the ticket layout does not set one
+DEFAULT_PDF_DPI = 200
+PDF_POINTS_PER_INCH = 72
+
+# PDFium is not thread-safe, and documents are extracted from several threads at once
+_pdfium_lock = threading.Lock()
+
+
+def count_pdf_pages(data):
+    """
+    :param data: bytes, content of the PDF file
+    :return: int, number of pages of the PDF
+    """
+    with _pdfium_lock:
+        pdf = pdfium.PdfDocument(data)
+        try:
+            return len(pdf)
+        finally:
+            pdf.close()
+
+
+def render_pdf_page(data, dpi=DEFAULT_PDF_DPI, page_index=0):
+    """
+    Render one page of a PDF in-process as a grayscale image.
+
+    :param data: bytes, content of the PDF file
+    :param dpi: int, resolution of the rendered page
+    :param page_index: int, index of the page to render
+    :return: ndarray, grayscale image backed by the rendered bitmap buffer
+    :raises ValueError: if the PDF has no such page
+    """
+    with _pdfium_lock:
+        pdf = pdfium.PdfDocument(data)
+        try:
+            if page_index >= len(pdf):
+                raise ValueError("No images found in the PDF.")
+            page = pdf[page_index]
+            bitmap = page.render(scale=dpi / PDF_POINTS_PER_INCH, grayscale=True)
+            # The array keeps the Python-owned bitmap buffer alive after the document is closed
+            return bitmap.to_numpy()
+        finally:
+            pdf.close()
+
+
+def read_pdf_page(data, page_index=0):
+    """
+    Read the size and the positioned words of the embedded text layer of a PDF page, without rendering it.
+
+    :param data: bytes, content of the PDF file
+    :param page_index: int, index of the page to read
+    :return: tuple (page_size, words), where:
+             - page_size: tuple, (width, height) of the page in points
+             - words: list, words in the extract_words_with_geometry format with bounding boxes as fractions of
+               the page, or an empty list if the page has no text layer or is rotated
+    :raises ValueError: if the PDF has no such page
+    """
+    with _pdfium_lock:
+        pdf = pdfium.PdfDocument(data)
+        try:
+            if page_index >= len(pdf):
+                raise ValueError("No images found in the PDF.")
+            page = pdf[page_index]
+            page_size = (page.get_width(), page.get_height())
+            if page.get_rotation():
+                # Character boxes are not rotated with the page, so rotated pages are left to OCR
+                return page_size, []
+
+            left, bottom, right, top = page.get_bbox()
+            width, height = right - left, top - bottom
+            textpage = page.get_textpage()
+
+            character_count = textpage.count_chars()
+            words = []
+            characters = []
+            # One step past the last character flushes the final word
+            for index in range(character_count + 1):
+                code_point = 0
+                if index < character_count:
+                    code_point = pdfium.raw.FPDFText_GetUnicode(textpage.raw, index)
+                character = chr(code_point) if code_point else None
+                if character and not character.isspace():
+                    characters.append((character, textpage.get_charbox(index)))
+                    continue
+                if not characters:
+                    continue
+
+                # PDF coordinates start at the bottom left corner of the page
+                word_left = min(box[0] for _, box in characters)
+                word_bottom = min(box[1] for _, box in characters)
+                word_right = max(box[2] for _, box in characters)
+                word_top = max(box[3] for _, box in characters)
+                words.append(
+                    {
+                        "Text": "".join(text for text, _ in characters),
+                        "Confidence": 100.0,
+                        "BoundingBox": {
+                            "Left": (word_left - left) / width,
+                            "Top": (top - word_top) / height,
+                            "Width": (word_right - word_left) / width,
+                            "Height": (word_top - word_bottom) / height,
+                        },
+                    }
+                )
+                characters = []
+            return page_size, words
+        finally:
+            pdf.close()
+
+
+class DocumentImage:
+    """
+    An uploaded document that is read once and decoded lazily.
+
+    The original bytes are kept as they are, and every decoded view (BGR, grayscale, PIL, OCR payloads) is
+    computed on first use and shared by all later stages, so the same document is never decoded twice.
+    A document is one page of a PDF, the first one by default, and it is rendered directly in grayscale.
+    """
+
+    def __init__(self, data, name=None, pdf_dpi=DEFAULT_PDF_DPI, page_index=0):
+        """
+        :param data: bytes, content of the uploaded file
+        :param name: str, file name, only used in log messages
+        :param pdf_dpi: int, resolution PDFs are rendered at
+        :param page_index: int, index of the PDF page this document is
+        """
+        self.data = bytes(data)
+        self.name = name
+        self.pdf_dpi = pdf_dpi
+        self.page_index = page_index
+        self._encoded_regions = {}
+
+    @classmethod
+    def from_path(cls, file_path):
+        """
+        Read the document from the given file path.
+
+        :param file_path: str, path to the image or PDF file
+        :return: DocumentImage
+        """
+        with open(file_path, "rb") as file:
+            return cls(file.read(), name=file_path)
+
+    @classmethod
+    def from_source(cls, source, name=None):
+        """
+        Wrap an uploaded document without writing it to disk.
+
+        :param source: DocumentImage, bytes, bytearray, memoryview, file path or file-like object such as a
+                       Django UploadedFile
+        :param name: str, file name, only used in log messages
+        :return: DocumentImage
+        """
+        if isinstance(source, cls):
+            return source
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            return cls(source, name=name)
+        if isinstance(source, (str, os.PathLike)):
+            return cls.from_path(source)
+
+        name = name or getattr(source, "name", None)
+        if hasattr(source, "chunks"):
+            # Django files are read chunk by chunk, straight from memory or the upload's spooled file
+            return cls(b"".join(source.chunks()), name=name)
+        return cls(source.read(), name=name)
+
+    @property
+    def is_pdf(self):
+        return self.data.startswith(PDF_SIGNATURE)
+
+    def with_pdf_dpi(self, pdf_dpi):
+        """
+        Get the same document rendered at another resolution.
+
+        :param pdf_dpi: int, resolution PDFs are rendered at
+        :return: DocumentImage, this document if the resolution does not change the pixels
+        """
+        if not self.is_pdf or pdf_dpi == self.pdf_dpi:
+            return self
+        document = DocumentImage(
+            self.data, name=self.name, pdf_dpi=pdf_dpi, page_index=self.page_index
+        )
+        if "pdf_page" in self.__dict__:
+            # The page size and text layer do not depend on the resolution
+            document.pdf_page = self.pdf_page
+        return document
+
+    @cached_property
+    def page_count(self):
+        """
+        :return: int, number of pages of a PDF, 1 for images
+        """
+        if not self.is_pdf:
+            return 1
+        return count_pdf_pages(self.data)
+
+    def iter_pages(self, max_pages=None):
+        """
+        Iterate over the pages of the document, each one rendered only when it is used.
+
+        Every page is a new document sharing the uploaded bytes, so a page that is no longer referenced frees
+        its rendered bitmap before the next one is rendered.
+
+        :param max_pages: int, maximum number of pages to iterate over, all pages if None
+        :return: iterator of DocumentImage, one per page
+        """
+        if not self.is_pdf:
+            yield self
+            return
+
+        page_count = self.page_count
+        if max_pages is not None:
+            page_count = min(page_count, max_pages)
+        for page_index in range(page_count):
+            page = DocumentImage(
+                self.data, name=self.name, pdf_dpi=self.pdf_dpi, page_index=page_index
+            )
+            if page_index == self.page_index and "pdf_page" in self.__dict__:
+                # The text layer of this page was already read, only the bitmap is left out
+                page.pdf_page = self.pdf_page
+            yield page
+
+    @cached_property
+    def pdf_page(self):
+        """
+        :return: tuple (page_size, words), see read_pdf_page
+        """
+        return read_pdf_page(self.data, page_index=self.page_index)
+
+    @cached_property
+    def text_layer(self):
+        """
+        Read the embedded text of a PDF, so digital documents can skip OCR.
+
+        :return: tuple (text, words), where:
+                 - text: str, the text of all words on the page
+                 - words: list, the words on the page with their bounding boxes, empty if there is no text layer
+        """
+        if not self.is_pdf:
+            return "", []
+        words = self.pdf_page[1]
+        return " ".join(word["Text"] for word in words), words
+
+    @cached_property
+    def pixels(self):
+        """
+        :return: ndarray, the decoded document; grayscale for PDFs and BGR for images
+        :raises ValueError: if the document could not be decoded
+        """
+        if self.is_pdf:
+            return render_pdf_page(
+                self.data, dpi=self.pdf_dpi, page_index=self.page_index
+            )
+
+        # Keep the stored pixel orientation, as the original bytes are what the OCR engine sees
+        image = cv2.imdecode(
+            np.frombuffer(self.data, dtype=np.uint8),
+            cv2.IMREAD_COLOR | cv2.IMREAD_IGNORE_ORIENTATION,
+        )
+        if image is None:
+            raise ValueError(f"Could not decode the image {self.name or ''}".strip())
+        return image
+
+    @cached_property
+    def bgr(self):
+        """
+        :return: ndarray, the document as a BGR image
+        """
+        if self.pixels.ndim == 2:
+            return cv2.cvtColor(self.pixels, cv2.COLOR_GRAY2BGR)
+        return self.pixels
+
+    @cached_property
+    def gray(self):
+        """
+        :return: ndarray, the document as a grayscale image
+        """
+        if self.pixels.ndim == 2:
+            return self.pixels
+        return cv2.cvtColor(self.pixels, cv2.COLOR_BGR2GRAY)
+
+    @cached_property
+    def pil(self):
+        """
+        :return: PIL.Image, the document as a PIL image
+        """
+        if self.is_pdf:
+            return Image.fromarray(self.pixels)
+        return Image.open(io.BytesIO(self.data))
+
+    @property
+    def shape(self):
+        if self.is_pdf and "pixels" not in self.__dict__:
+            # Same size as the rendered page, without rendering it
+            width, height = self.pdf_page[0]
+            scale = self.pdf_dpi / PDF_POINTS_PER_INCH
+            return math.ceil(height * scale), math.ceil(width * scale)
+        return self.pixels.shape
+
+    @property
+    def encoded(self):
+        """
+        :return: bytes, the whole page encoded for an OCR engine
+        """
+        return self.encode_region(None)
+
+    def encode_region(self, region_coordinates):
+        """
+        Encode a region of the document as a small OCR payload, see payload_optimizer.optimize_image.
+
+        :param region_coordinates: tuple, (x, y, w, h) region coordinates, or None for the whole page
+        :return: bytes, encoded region
+        """
+        key = tuple(region_coordinates) if region_coordinates else None
+        if key not in self._encoded_regions:
+            image = self.pixels
+            original = None
+            if key:
+                x, y, w, h = key
+                image = image[y : y + h, x : x + w]
+            elif not self.is_pdf:
+                # The upload itself is sent when re-encoding would not make it smaller
+                original = self.data
+            self._encoded_regions[key] = optimize_image(
+                image, OCR_PAYLOAD, original=original
+            )
+        return self._encoded_regions[key]
@@ -1,28 +1,110 @@
 import io
 import json
+import os
+import threading
+from pathlib import Path
 
 import boto3
 import cv2
+from botocore.config import Config
 from botocore.exceptions import ClientError
 
+from core.common.document_image import DocumentImage
+from core.common.result_cache import ResultCache, make_cache_key
+
+USE_OCR_CACHE = True  # Set to False to always send documents to Textract
+# Raw Textract responses hold the passenger names and booking references of the
+# documents, so they are kept with the passport cache in the data directory
+OCR_CACHE = ResultCache(
+    path=os.getenv(
+        "OCR_CACHE_PATH",
+        str(Path(__file__).resolve().parents[2] / "data" / "ocr_cache.sqlite3"),
+    ),
+    max_entries=int(os.getenv("OCR_CACHE_MAX_ENTRIES", "5000")),
+)
+
+
+TEXTRACT_REGION = "us-west-2"
+TEXTRACT_CLIENT_CONFIG = Config(
+    max_pool_connections=int(os.getenv("TEXTRACT_MAX_POOL_CONNECTIONS", "10")),
+    tcp_keepalive=True,
+    retries={
+        "mode": "adaptive",
+        "max_attempts": int(os.getenv("TEXTRACT_MAX_ATTEMPTS", "5")),
+    },
+)
+
+# Textract clients are thread-safe and keep their HTTPS connections open, so one
+# client per set of credentials is shared by every request in the process
+_textract_clients = {}
+_textract_clients_lock = threading.Lock()
+_textract_clients_pid = os.getpid()
+
+
+def reset_textract_clients():
+    """
+    Drop the cached Textract clients, e.g. after a fork, where the inherited connections must not be shared.
+    """
+    global _textract_clients_lock, _textract_clients_pid
+    _textract_clients.clear()
+    _textract_clients_lock = threading.Lock()
+    _textract_clients_pid = os.getpid()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=reset_textract_clients)
+
 
 def setup_textract_client(access_key, secret_key):
-    session = boto3.Session(
-        aws_access_key_id=access_key,
-        aws_secret_access_key=secret_key,
-        region_name="us-west-2",
-    )
-    textract_client = session.client("textract")
+    """
+    Return the process-wide Textract client for the given credentials, creating it on first use.
+
+    :param access_key: str, AWS access key
+    :param secret_key: str, AWS secret key
+    :return: boto3 Textract client
+    """
+    if _textract_clients_pid != os.getpid():
+        # Fallback for fork methods that bypass os.register_at_fork
+        reset_textract_clients()
+
+    client_key = (access_key, secret_key, TEXTRACT_REGION)
+    with _textract_clients_lock:
+        textract_client = _textract_clients.get(client_key)
+        if textract_client is None:
+            session = boto3.Session(
+                aws_access_key_id=access_key,
+                aws_secret_access_key=secret_key,
+                region_name=TEXTRACT_REGION,
+            )
+            textract_client = session.client("textract", config=TEXTRACT_CLIENT_CONFIG)
+            _textract_clients[client_key] = textract_client
     return textract_client
 
 
 def process_text_detection(client, document):
+    """
+    Detect the text in the document with Textract, reusing the cached response for identical image bytes.
+
+    :param client: boto3 Textract client
+    :param document: bytes, encoded image sent to Textract
+    :return: dict, Textract response
+    """
+    cache_key = make_cache_key(document, "detect_document_text")
+    if USE_OCR_CACHE:
+        cached_response = OCR_CACHE.get(cache_key)
+        if cached_response is not None:
+            return cached_response
+
     try:
         response = client.detect_document_text(Document={"Bytes": document})
     except ClientError:
         print("Couldn't detect text.")
         raise
     else:
+        if USE_OCR_CACHE:
+            # The request metadata is specific to the original call and is not worth persisting
+            response.pop("ResponseMetadata", None)
+            OCR_CACHE.set(cache_key, response)
         return response
 
 
@@ -42,31 +124,86 @@ def extract_text_and_confidence(response):
     return extracted_data
 
 
-def extract_text(
+def extract_words_with_geometry(response):
+    """
+    Extract words and their bounding boxes from the Textract response.
+
+    :param response: dict, Textract response containing text blocks
+    :return: list, extracted data containing text, confidence and bounding box values
+    """
+    extracted_data = []
+    for block in response["Blocks"]:
+        if block["BlockType"] == "WORD":
+            extracted_data.append(
+                {
+                    "Text": block["Text"],
+                    "Confidence": block["Confidence"],
+                    "BoundingBox": block["Geometry"]["BoundingBox"],
+                }
+            )
+    return extracted_data
+
+
+def select_text_in_region(words, region_coordinates, image_shape):
+    """
+    Select the words whose bounding box centre lies inside the given region of a full-page Textract response.
+
+    :param words: list, words returned by extract_words_with_geometry
+    :param region_coordinates: tuple, (x, y, w, h) region coordinates in pixels
+    :param image_shape: tuple, shape of the image the response was computed for
+    :return: str, text of the selected words in reading order
+    """
+    x, y, w, h = region_coordinates
+    height, width = image_shape[:2]
+
+    # Textract bounding boxes are expressed as fractions of the page size
+    left, top = x / width, y / height
+    right, bottom = (x + w) / width, (y + h) / height
+
+    selected_words = []
+    for word in words:
+        box = word["BoundingBox"]
+        center_x = box["Left"] + box["Width"] / 2
+        center_y = box["Top"] + box["Height"] / 2
+        if left <= center_x <= right and top <= center_y <= bottom:
+            selected_words.append(word["Text"])
+
+    return " ".join(selected_words)
+
+
+def detect_document_text(
     image=None,
     region_coordinates=None,
     textract_client=None,
     image_path=None,
     use_aws=True,
+    ocr_backend=None,
 ):
     """
-    Extract text from the input image or image path using AWS Textract.
+    Run text detection on the input image or image path.
 
-    :param image: ndarray, input image
+    :param image: DocumentImage or ndarray, input image
     :param region_coordinates: tuple, (x, y, w, h) region coordinates
-    :param textract_client: boto3 Textract client, used for extracting text from the image
+    :param textract_client: boto3 Textract client, used when no ocr_backend is given
     :param image_path: str, path to the input image
     :param use_aws: bool, True if using AWS Textract, False otherwise
-    :return: str, extracted text
+    :param ocr_backend: OCRBackend, engine used instead of calling Textract directly
+    :return: dict, Textract-shaped response or None if AWS API usage is disabled
     """
-    if not use_aws:
+    if ocr_backend is None and not use_aws:
         print("AWS API usage is disabled.")
-        return ""
+        return None
 
     if image_path:
         # Read the image
         with open(image_path, "rb") as image_file:
             image_bytes = image_file.read()
+    elif isinstance(image, DocumentImage):
+        # Reuses the original bytes or an already encoded region
+        if region_coordinates:
+            image_bytes = image.encode_region(region_coordinates)
+        else:
+            image_bytes = image.encoded
     elif image is not None:
         if region_coordinates:
             x, y, w, h = region_coordinates
@@ -80,8 +217,42 @@ def extract_text(
     else:
         raise ValueError("Either image or image_path must be provided.")
 
+    if ocr_backend is not None:
+        return ocr_backend.detect_text(image_bytes)
+
     # Analyze the document using Textract
-    response = process_text_detection(textract_client, image_bytes)
+    return process_text_detection(textract_client, image_bytes)
+
+
+def extract_text(
+    image=None,
+    region_coordinates=None,
+    textract_client=None,
+    image_path=None,
+    use_aws=True,
+    ocr_backend=None,
+):
+    """
+    Extract text from the input image or image path using AWS Textract or the given OCR backend.
+
+    :param image: DocumentImage or ndarray, input image
+    :param region_coordinates: tuple, (x, y, w, h) region coordinates
+    :param textract_client: boto3 Textract client, used when no ocr_backend is given
+    :param image_path: str, path to the input image
+    :param use_aws: bool, True if using AWS Textract, False otherwise
+    :param ocr_backend: OCRBackend, engine used instead of calling Textract directly
+    :return: str, extracted text
+    """
+    response = detect_document_text(
+        image=image,
+        region_coordinates=region_coordinates,
+        textract_client=textract_client,
+        image_path=image_path,
+        use_aws=use_aws,
+        ocr_backend=ocr_backend,
+    )
+    if response is None:
+        return ""
 
     # Extract the text and confidence values
     extracted_data = extract_text_and_confidence(response)
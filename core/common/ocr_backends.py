@@ -0,0 +1,190 @@
+import os
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+import pytesseract
+
+from core.common.extractor_utils import process_text_detection
+
+# Selects the OCR engine for this deployment: "textract", "tesseract" or "hybrid"
+OCR_BACKEND = os.getenv("OCR_BACKEND", "textract")
+# The hybrid backend falls back to Textract when the mean line confidence of Tesseract is below this value
+HYBRID_MIN_CONFIDENCE = float(os.getenv("OCR_HYBRID_MIN_CONFIDENCE", "80"))
+TESSERACT_LANGUAGE = os.getenv("TESSERACT_LANGUAGE", "eng")
+
+
+def mean_line_confidence(response):
+    """
+    Calculate the mean confidence of the LINE blocks in a Textract-shaped response.
+
+    :param response: dict, OCR response containing text blocks
+    :return: float, mean confidence between 0 and 100, or 0 if no lines were detected
+    """
+    confidences = [
+        block["Confidence"]
+        for block in response["Blocks"]
+        if block["BlockType"] == "LINE"
+    ]
+    if not confidences:
+        return 0.0
+    return sum(confidences) / len(confidences)
+
+
+class OCRBackend:
+    """
+    Base class for OCR engines.
+
+    Every backend returns responses in the Textract ``detect_document_text`` format, so the parsing helpers in
+    ``core.common.extractor_utils`` work the same whichever engine produced the text.
+    """
+
+    name = None
+
+    def detect_text(self, document):
+        """
+        Detect the text in the given encoded image.
+
+        :param document: bytes, encoded image (PNG, JPEG, ...)
+        :return: dict, Textract-shaped response with LINE and WORD blocks
+        """
+        raise NotImplementedError
+
+
+class TextractBackend(OCRBackend):
+    name = "textract"
+
+    def __init__(self, textract_client):
+        self.textract_client = textract_client
+
+    def detect_text(self, document):
+        return process_text_detection(self.textract_client, document)
+
+
+class TesseractBackend(OCRBackend):
+    name = "tesseract"
+
+    def __init__(self, language=TESSERACT_LANGUAGE):
+        self.language = language
+
+    def detect_text(self, document):
+        image = cv2.imdecode(
+            np.frombuffer(document, dtype=np.uint8), cv2.IMREAD_GRAYSCALE
+        )
+        if image is None:
+            raise ValueError("Could not decode the image for Tesseract.")
+
+        height, width = image.shape[:2]
+        data = pytesseract.image_to_data(
+            image, lang=self.language, output_type=pytesseract.Output.DICT
+        )
+
+        word_blocks = []
+        lines = OrderedDict()
+        for index, text in enumerate(data["text"]):
+            confidence = float(data["conf"][index])
+            text = text.strip()
+            if not text or confidence < 0:
+                continue
+
+            left, top = data["left"][index], data["top"][index]
+            box_width, box_height = data["width"][index], data["height"][index]
+            word = {
+                "BlockType": "WORD",
+                "Text": text,
+                "Confidence": confidence,
+                "Geometry": {
+                    "BoundingBox": {
+                        "Left": left / width,
+                        "Top": top / height,
+                        "Width": box_width / width,
+                        "Height": box_height / height,
+                    }
+                },
+            }
+            word_blocks.append(word)
+
+            line_key = (
+                data["block_num"][index],
+                data["par_num"][index],
+                data["line_num"][index],
+            )
+            lines.setdefault(line_key, []).append(
+                (word, left, top, left + box_width, top + box_height)
+            )
+
+        line_blocks = []
+        for words in lines.values():
+            left = min(word[1] for word in words)
+            top = min(word[2] for word in words)
+            right = max(word[3] for word in words)
+            bottom = max(word[4] for word in words)
+            line_blocks.append(
+                {
+                    "BlockType": "LINE",
+                    "Text": " ".join(word[0]["Text"] for word in words),
+                    "Confidence": sum(word[0]["Confidence"] for word in words)
+                    / len(words),
+                    "Geometry": {
+                        "BoundingBox": {
+                            "Left": left / width,
+                            "Top": top / height,
+                            "Width": (right - left) / width,
+                            "Height": (bottom - top) / height,
+                        }
+                    },
+                }
+            )
+
+        return {"Blocks": line_blocks + word_blocks}
+
+
+class HybridBackend(OCRBackend):
+    """
+    Runs a cheap local engine first and only pays for the fallback engine when the local result is not confident.
+    """
+
+    name = "hybrid"
+
+    def __init__(self, primary, fallback, min_confidence=HYBRID_MIN_CONFIDENCE):
+        self.primary = primary
+        self.fallback = fallback
+        self.min_confidence = min_confidence
+
+    def detect_text(self, document):
+        try:
+            response = self.primary.detect_text(document)
+        except Exception as e:
+            print(f"{self.primary.name} OCR failed, falling back: {e}")
+            return self.fallback.detect_text(document)
+
+        confidence = mean_line_confidence(response)
+        if confidence < self.min_confidence:
+            print(
+                f"{self.primary.name} OCR confidence {confidence:.1f} is below "
+                f"{self.min_confidence}, using {self.fallback.name}."
+            )
+            return self.fallback.detect_text(document)
+        return response
+
+
+def get_ocr_backend(textract_client=None, use_aws=True, backend_name=None):
+    """
+    Build the OCR backend selected for this deployment.
+
+    :param textract_client: boto3 Textract client, used by the Textract and hybrid backends
+    :param use_aws: bool, False to never call AWS Textract
+    :param backend_name: str, overrides the OCR_BACKEND setting
+    :return: OCRBackend, or None if the selected backend needs AWS and AWS usage is disabled
+    """
+    backend_name = backend_name or OCR_BACKEND
+
+    if backend_name == "tesseract":
+        return TesseractBackend()
+    if backend_name == "hybrid":
+        if not use_aws:
+            return TesseractBackend()
+        return HybridBackend(TesseractBackend(), TextractBackend(textract_client))
+    if backend_name == "textract":
+        return TextractBackend(textract_client) if use_aws else None
+    raise ValueError(f"Unknown OCR backend: {backend_name}")
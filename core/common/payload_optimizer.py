@@ -0,0 +1,190 @@
+import os
+import threading
+from collections import namedtuple
+
+import cv2
+import numpy as np
+
+USE_PAYLOAD_OPTIMIZER = True  # Set to False to send uploads to the APIs unchanged
+
+PayloadProfile = namedtuple(
+    "PayloadProfile", ["name", "max_pixels", "grayscale", "format", "quality"]
+)
+
+# OCR reads text reliably well below the size of a phone photo, and only needs the luminance
+OCR_PAYLOAD = PayloadProfile(
+    name="ocr",
+    max_pixels=int(os.getenv("OCR_PAYLOAD_MAX_PIXELS", "4000000")),
+    grayscale=True,
+    format="jpeg",
+    quality=int(os.getenv("OCR_PAYLOAD_QUALITY", "90")),
+)
+# ID Analyzer checks colours and security features to authenticate passports, so they stay in colour
+PASSPORT_PAYLOAD = PayloadProfile(
+    name="passport",
+    max_pixels=int(os.getenv("PASSPORT_PAYLOAD_MAX_PIXELS", "3000000")),
+    grayscale=False,
+    format="jpeg",
+    quality=int(os.getenv("PASSPORT_PAYLOAD_QUALITY", "90")),
+)
+
+ENCODERS = {
+    "jpeg": (".jpg", cv2.IMWRITE_JPEG_QUALITY),
+    "webp": (".webp", cv2.IMWRITE_WEBP_QUALITY),
+    "png": (".png", None),
+}
+FORMAT_SIGNATURES = {
+    "jpeg": b"\xff\xd8\xff",
+    "png": b"\x89PNG\r\n\x1a\n",
+}
+# EXIF blocks are stored near the start of JPEG and PNG files
+EXIF_SEARCH_BYTES = 65536
+
+
+class PayloadStats:
+    """
+    Counts the bytes sent to the document APIs and the bytes the optimizer saved, per payload profile.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._profiles = {}
+
+    def record(self, profile_name, original_size, payload_size):
+        """
+        :param profile_name: str, name of the payload profile
+        :param original_size: int, size of the original upload, or of the raw pixels for crops
+        :param payload_size: int, size of the payload that is sent
+        """
+        saved = original_size - payload_size
+        print(
+            f"{profile_name} payload: {payload_size} bytes, "
+            f"{saved} bytes saved ({original_size} bytes before optimization)"
+        )
+        with self._lock:
+            counters = self._profiles.setdefault(
+                profile_name, {"calls": 0, "original_bytes": 0, "payload_bytes": 0}
+            )
+            counters["calls"] += 1
+            counters["original_bytes"] += original_size
+            counters["payload_bytes"] += payload_size
+
+    def stats(self):
+        """
+        :return: dict, per profile name the number of calls, original bytes, payload bytes and bytes saved
+        """
+        with self._lock:
+            return {
+                profile_name: {
+                    **counters,
+                    "bytes_saved": counters["original_bytes"]
+                    - counters["payload_bytes"],
+                }
+                for profile_name, counters in self._profiles.items()
+            }
+
+
+PAYLOAD_STATS = PayloadStats()
+
+
+def fit_pixel_budget(image, max_pixels):
+    """
+    Downscale the image so it has at most max_pixels pixels, keeping its aspect ratio.
+
+    :param image: ndarray, input image
+    :param max_pixels: int, maximum number of pixels
+    :return: ndarray, the input image if it already fits the budget, a resized copy otherwise
+    """
+    height, width = image.shape[:2]
+    if height * width <= max_pixels:
+        return image
+
+    scale = (max_pixels / (height * width)) ** 0.5
+    size = (max(1, int(width * scale)), max(1, int(height * scale)))
+    # INTER_AREA averages the source pixels, which keeps thin strokes of text readable
+    return cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+
+
+def encode_image(image, image_format, quality=None):
+    """
+    Encode the image without any metadata.
+
+    :param image: ndarray, input image
+    :param image_format: str, "jpeg", "webp" or "png"
+    :param quality: int, quality of the lossy formats between 0 and 100
+    :return: bytes, encoded image
+    """
+    extension, quality_flag = ENCODERS[image_format]
+    params = [quality_flag, quality] if quality_flag is not None else []
+    is_success, buffer = cv2.imencode(extension, image, params)
+    if not is_success:
+        raise ValueError(f"Could not encode the image as {image_format}.")
+    return buffer.tobytes()
+
+
+def can_send_original(original, pixel_count, profile):
+    """
+    Check whether the uploaded file can be sent as it is.
+
+    :param original: bytes, content of the uploaded file
+    :param pixel_count: int, number of pixels of the decoded upload
+    :param profile: PayloadProfile, limits of the payload
+    :return: bool, True if the file is in a supported format, within the pixel budget and has no EXIF data
+    """
+    return (
+        original.startswith(tuple(FORMAT_SIGNATURES.values()))
+        and pixel_count <= profile.max_pixels
+        and b"Exif\x00" not in original[:EXIF_SEARCH_BYTES]
+    )
+
+
+def optimize_image(image, profile=OCR_PAYLOAD, original=None):
+    """
+    Encode decoded pixels as the smallest payload allowed by the profile.
+
+    The image is downscaled to the pixel budget, converted to grayscale if the profile allows it and encoded
+    with the profile's format. Grayscale images are also tried as lossless PNG, which is usually smaller for
+    rendered documents. The re-encoded payloads never contain EXIF data.
+
+    :param image: ndarray, decoded BGR or grayscale image
+    :param profile: PayloadProfile, limits of the payload
+    :param original: bytes, content of the uploaded file, sent as it is if it is already the smallest option
+    :return: bytes, encoded payload
+    """
+    original_size = len(original) if original is not None else image.nbytes
+    if not USE_PAYLOAD_OPTIMIZER:
+        payload = original if original is not None else encode_image(image, "png")
+        PAYLOAD_STATS.record(profile.name, original_size, len(payload))
+        return payload
+
+    pixel_count = image.shape[0] * image.shape[1]
+    if profile.grayscale and image.ndim == 3:
+        image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    image = fit_pixel_budget(image, profile.max_pixels)
+
+    candidates = []
+    # The upload wins ties, min keeps the first of equally small payloads
+    if original is not None and can_send_original(original, pixel_count, profile):
+        candidates.append(original)
+    candidates.append(encode_image(image, profile.format, profile.quality))
+    if image.ndim == 2:
+        candidates.append(encode_image(image, "png"))
+
+    payload = min(candidates, key=len)
+    PAYLOAD_STATS.record(profile.name, original_size, len(payload))
+    return payload
+
+
+def optimize_image_bytes(data, profile=OCR_PAYLOAD):
+    """
+    Optimize an uploaded image file.
+
+    :param data: bytes, content of the uploaded image
+    :param profile: PayloadProfile, limits of the payload
+    :return: bytes, encoded payload, or the original data if it could not be decoded
+    """
+    # Applies the EXIF orientation, as the EXIF data is not sent along
+    image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if image is None:
+        return data
+    return optimize_image(image, profile, original=data)
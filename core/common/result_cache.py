@@ -0,0 +1,209 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+
+def make_cache_key(data, *parts):
+    """
+    Build a content-addressed cache key from the given bytes and any extra key parts.
+
+    :param data: bytes, content the cached result was computed from
+    :param parts: str, extra values that influence the result (e.g. the API operation or region)
+    :return: str, hex SHA-256 digest
+    """
+    digest = hashlib.sha256(data)
+    for part in parts:
+        digest.update(b"\0")
+        digest.update(str(part).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """
+    Two-level LRU cache for JSON-serializable results of paid API calls.
+
+    Recently used entries are kept in memory, and every entry is also persisted to SQLite so it survives
+    restarts and is shared between worker processes. Both levels are capped and evict the least recently
+    used entries first. Entries can optionally expire a fixed time after they were stored.
+    """
+
+    def __init__(self, path=None, max_entries=1000, memory_entries=128, ttl=None):
+        """
+        :param path: str, path of the SQLite database file, or None to keep the cache in memory only
+        :param max_entries: int, maximum number of entries kept on disk
+        :param memory_entries: int, maximum number of entries kept in memory
+        :param ttl: float, seconds after which an entry expires, or None to keep entries until they are evicted
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._table_ready = False
+
+    @contextmanager
+    def _connect(self):
+        if not self._table_ready and os.path.dirname(self.path):
+            # Only the owner can read the directory, cached results can hold personal data
+            os.makedirs(os.path.dirname(self.path), mode=0o700, exist_ok=True)
+        # A short-lived connection per operation keeps the cache safe to use across threads and forks
+        connection = sqlite3.connect(self.path, timeout=5)
+        try:
+            with connection:
+                if not self._table_ready:
+                    connection.execute(
+                        "CREATE TABLE IF NOT EXISTS result_cache (key TEXT PRIMARY KEY, "
+                        "value TEXT NOT NULL, last_access REAL NOT NULL, "
+                        "created REAL NOT NULL DEFAULT 0)"
+                    )
+                    columns = [
+                        row[1]
+                        for row in connection.execute("PRAGMA table_info(result_cache)")
+                    ]
+                    if "created" not in columns:
+                        # Caches written before entries could expire
+                        connection.execute(
+                            "ALTER TABLE result_cache "
+                            "ADD COLUMN created REAL NOT NULL DEFAULT 0"
+                        )
+                    connection.execute(
+                        "CREATE INDEX IF NOT EXISTS result_cache_last_access "
+                        "ON result_cache (last_access)"
+                    )
+                    self._table_ready = True
+                yield connection
+        finally:
+            connection.close()
+
+    def _is_expired(self, created):
+        return self.ttl is not None and time.time() - created > self.ttl
+
+    def _remember(self, key, value, created):
+        # Keep the storage time with the value so entries expire on both cache levels
+        self._memory[key] = (value, created)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, key):
+        """
+        Return the cached value for the given key.
+
+        :param key: str, cache key
+        :return: the cached value, or None on a miss
+        """
+        with self._lock:
+            if key in self._memory:
+                value, created = self._memory[key]
+                if not self._is_expired(created):
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._memory[key]
+
+            value = None
+            created = None
+            if self.path:
+                try:
+                    with self._connect() as connection:
+                        row = connection.execute(
+                            "SELECT value, created FROM result_cache WHERE key = ?",
+                            (key,),
+                        ).fetchone()
+                        if row and self._is_expired(row[1]):
+                            connection.execute(
+                                "DELETE FROM result_cache WHERE key = ?", (key,)
+                            )
+                        elif row:
+                            connection.execute(
+                                "UPDATE result_cache SET last_access = ? WHERE key = ?",
+                                (time.time(), key),
+                            )
+                            value, created = json.loads(row[0]), row[1]
+                except sqlite3.Error as e:
+                    print(f"Error reading the result cache: {e}")
+
+            if value is None:
+                self.misses += 1
+                return None
+
+            self._remember(key, value, created)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        """
+        Store the given value, evicting the least recently used entries if the cache is full.
+
+        :param key: str, cache key
+        :param value: JSON-serializable value to cache
+        """
+        with self._lock:
+            now = time.time()
+            self._remember(key, value, now)
+            if not self.path:
+                return
+
+            try:
+                with self._connect() as connection:
+                    connection.execute(
+                        "INSERT OR REPLACE INTO result_cache "
+                        "(key, value, last_access, created) VALUES (?, ?, ?, ?)",
+                        (key, json.dumps(value), now, now),
+                    )
+                    if self.ttl is not None:
+                        self.evictions += connection.execute(
+                            "DELETE FROM result_cache WHERE created < ?",
+                            (now - self.ttl,),
+                        ).rowcount
+                    (count,) = connection.execute(
+                        "SELECT COUNT(*) FROM result_cache"
+                    ).fetchone()
+                    if count > self.max_entries:
+                        evicted = connection.execute(
+                            "DELETE FROM result_cache WHERE key IN "
+                            "(SELECT key FROM result_cache ORDER BY last_access LIMIT ?)",
+                            (count - self.max_entries,),
+                        ).rowcount
+                        self.evictions += evicted
+            except sqlite3.Error as e:
+                print(f"Error writing the result cache: {e}")
+
+    def clear(self):
+        """
+        Remove every entry from both cache levels and reset the counters.
+        """
+        with self._lock:
+            self._memory.clear()
+            self.hits = self.misses = self.evictions = 0
+            if self.path:
+                try:
+                    with self._connect() as connection:
+                        connection.execute("DELETE FROM result_cache")
+                except sqlite3.Error as e:
+                    print(f"Error clearing the result cache: {e}")
+
+    def stats(self):
+        """
+        Return the hit, miss and eviction counters of this process.
+
+        :return: dict, cache statistics
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "memory_entries": len(self._memory),
+            }
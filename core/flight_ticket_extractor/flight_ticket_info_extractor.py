@@ -2,33 +2,43 @@ import os
 import re
 from datetime import datetime
 
-import cv2
-import numpy as np
-from pdf2image import convert_from_path
-
+from core.common.document_image import DocumentImage
 from core.common.extractor_utils import (
+    detect_document_text,
     extract_text,
-    load_config,
+    extract_text_and_confidence,
+    extract_words_with_geometry,
+    select_text_in_region,
     setup_textract_client,
 )
+from core.common.ocr_backends import get_ocr_backend
+from core.flight_ticket_extractor.ticket_config_store import TicketConfigStore
 
 USE_AWS = True  # Set to False when you don't want to Free Tier credits
+# Make one full-page Textract call per ticket and map its words to the config
+# regions, instead of one call for the ticket type plus one call per region
+USE_SINGLE_TEXTRACT_CALL = True
+# Read the regions of PDF tickets from their embedded text instead of OCR when they have one
+USE_PDF_TEXT_LAYER = True
+CONFIGS_DIR = os.path.join(os.path.dirname(__file__), "configs")
+TICKET_CONFIG_SUFFIX = "_ticket_config.json"
+# Version 2 configs describe regions as boxes relative to the page size instead of pixels
+TICKET_CONFIG_VERSION = 2
+# Pages of a PDF that are searched for the ticket, itineraries can put it after the connecting flights
+MAX_TICKET_PAGES = int(os.getenv("MAX_TICKET_PAGES", "5"))
+# Once these fields are found, the remaining pages of a PDF are not read
+REQUIRED_TICKET_FIELDS = (
+    "airline_name",
+    "booking_reference_number",
+    "first_name",
+    "last_name",
+)
 TICKET_TYPE_KEYWORDS = {
     "emirates": "Emirates",
     "flynas": "Flynas",
 }
 
 
-def convert_pdf_to_images(pdf_path):
-    images = convert_from_path(pdf_path, first_page=0, last_page=1)
-    return images
-
-
-def preprocess_image(image):
-    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-    return gray
-
-
 def process_name_emirates(name_parts):
     if len(name_parts) == 2:
         last_name, first_name_and_salutation = name_parts
@@ -101,11 +111,19 @@ def process_airline_name(region_name, text, ticket_type=None):
     return {region_name: text.strip()}
 
 
+PROCESSING_FUNCTIONS = {
+    "process_name": process_name,
+    "process_date": process_date,
+    "process_booking_reference_number": process_booking_reference_number,
+    "process_airline_name": process_airline_name,
+}
+
+
 def validate_coordinates(image, region_coordinates):
     """
     Validate whether the given region coordinates are within the image boundaries.
 
-    :param image: ndarray, input image
+    :param image: DocumentImage or ndarray, input image
     :param region_coordinates: tuple, (x, y, w, h) region coordinates
     :return: bool, True if the coordinates are valid, False otherwise
     """
@@ -117,6 +135,70 @@ def validate_coordinates(image, region_coordinates):
     return True
 
 
+def scale_region(region_info, image_shape):
+    """
+    Get the pixel coordinates of a config region for an image of the given size.
+
+    :param region_info: dict, region of the ticket config, with a normalized "box" or legacy pixel "coordinates"
+    :param image_shape: tuple, shape of the image
+    :return: list, [x, y, w, h] region coordinates in pixels
+    """
+    if "box" not in region_info:
+        return region_info["coordinates"]
+    return scale_box(region_info["box"], image_shape)
+
+
+def scale_box(box, image_shape):
+    """
+    :param box: list, [left, top, width, height] region as fractions of the page
+    :param image_shape: tuple, shape of the image
+    :return: list, [x, y, w, h] region coordinates in pixels
+    """
+    left, top, width, height = box
+    image_height, image_width = image_shape[:2]
+    x = round(left * image_width)
+    y = round(top * image_height)
+    # Rounding must not push a box that ends at the page border outside of the image
+    w = min(round(width * image_width), image_width - x)
+    h = min(round(height * image_height), image_height - y)
+    return [x, y, w, h]
+
+
+def normalize_ticket_config(config, reference_size):
+    """
+    Convert a config with pixel coordinates to the resolution-independent format.
+
+    :param config: dict, ticket config with "coordinates" regions
+    :param reference_size: tuple, (width, height) of the ticket image the coordinates were measured on
+    :return: dict, version 2 ticket config with "box" regions
+    """
+    width, height = reference_size
+    regions = {}
+    for region_name, region_info in config["regions"].items():
+        region = {}
+        for key, value in region_info.items():
+            if key == "coordinates":
+                x, y, w, h = value
+                key = "box"
+                value = [
+                    round(x / width, 6),
+                    round(y / height, 6),
+                    round(w / width, 6),
+                    round(h / height, 6),
+                ]
+            region[key] = value
+        regions[region_name] = region
+
+    normalized_config = {"version": TICKET_CONFIG_VERSION}
+    normalized_config.update(
+        (key, value) for key, value in config.items() if key != "regions"
+    )
+    # Kept for reference, the regions no longer depend on it
+    normalized_config["reference_size"] = [width, height]
+    normalized_config["regions"] = regions
+    return normalized_config
+
+
 def process_text(region_name, text, processing_function, ticket_type=None):
     """
     Process the extracted text using the specified processing_function.
@@ -137,42 +219,44 @@ def process_text(region_name, text, processing_function, ticket_type=None):
         return {region_name: text.strip()}
 
 
-def process_document(image, config, textract_client, ticket_type=None):
+def process_document(
+    image, config, textract_client, ticket_type=None, page_words=None, ocr_backend=None
+):
     """
     Process the document image using the given configuration, extracting text from specified regions.
 
-    :param image: ndarray, input image
-    :param config: dict, configuration for the document processing
+    :param image: DocumentImage, input image
+    :param config: TicketLayout, validated configuration from TICKET_CONFIGS
     :param textract_client: boto3 Textract client, used for extracting text from the image
     :param ticket_type: str, type of the ticket (e.g., 'flight', 'baggage')
+    :param page_words: list, words of a full-page Textract response; when given, regions are read from it instead of making a call per region
+    :param ocr_backend: OCRBackend, engine used to read the regions
     :return: dict, extracted and processed data from the image
     """
-    preprocessed_image = preprocess_image(image)
     extracted_data = {}
 
-    for region_name, region_info in config["regions"].items():
-        region_coordinates = region_info["coordinates"]
-        processing_function_name = region_info.get("processing_function")
-        processing_function = None
-
-        if processing_function_name:
-            processing_functions = {
-                "process_name": process_name,
-                "process_date": process_date,
-                "process_booking_reference_number": process_booking_reference_number,
-                "process_airline_name": process_airline_name,
-            }
-            processing_function = processing_functions.get(processing_function_name)
-
-        if validate_coordinates(preprocessed_image, region_coordinates):
-            text = extract_text(
-                image=image,
-                region_coordinates=region_coordinates,
-                textract_client=textract_client,
-                use_aws=USE_AWS,
-            )
+    for region in config.regions:
+        region_name = region.name
+        if region.box is not None:
+            region_coordinates = scale_box(region.box, image.shape)
+        else:
+            region_coordinates = region.coordinates
+
+        if validate_coordinates(image, region_coordinates):
+            if page_words is not None:
+                text = select_text_in_region(
+                    page_words, region_coordinates, image.shape
+                )
+            else:
+                text = extract_text(
+                    image=image,
+                    region_coordinates=region_coordinates,
+                    textract_client=textract_client,
+                    use_aws=USE_AWS,
+                    ocr_backend=ocr_backend,
+                )
             processed_data = process_text(
-                region_name, text, processing_function, ticket_type
+                region_name, text, region.processing_function, ticket_type
             )
 
             if ticket_type is None and region_name == "flight_name":
@@ -190,62 +274,85 @@ def process_document(image, config, textract_client, ticket_type=None):
     return extracted_data
 
 
-def read_image(file_path, file_extension):
+# Parsed and validated once, and again whenever a config file is edited
+TICKET_CONFIGS = TicketConfigStore(
+    CONFIGS_DIR, PROCESSING_FUNCTIONS, suffix=TICKET_CONFIG_SUFFIX
+)
+
+
+def read_image(source):
     """
-    Read the image from the given file path with the specified file extension.
+    Read the image or PDF from the given source.
 
-    :param file_path: str, path to the input image file
-    :param file_extension: str, file extension of the input image
-    :return: ndarray, image or None if the image could not be read
+    :param source: bytes, memoryview, file-like object (e.g. an UploadedFile) or path of the input image
+    :return: DocumentImage, image or None if the image could not be read
     """
-    if file_extension == ".pdf":
-        images = convert_pdf_to_images(file_path)
-        if images:
-            image = images[0]
-            return cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR)
-        else:
-            print("No images found in the PDF.")
-            return None
-    else:
-        try:
-            return cv2.imread(file_path)
-        except Exception as e:
-            print(f"Error reading the input image: {e}")
-            return None
+    try:
+        image = DocumentImage.from_source(source)
+        # Read the page size up front so unreadable files are rejected before any OCR call,
+        # this decodes images but does not render PDFs
+        image.shape
+    except Exception as e:
+        print(f"Error reading the input image: {e}")
+        return None
+    return image
 
 
-def load_and_process_config(image, textract_client, ticket_type):
+def load_and_process_config(
+    image, textract_client, ticket_type, page_words=None, ocr_backend=None
+):
     """
-    Load the configuration file for the given ticket type and process the image using the configuration.
+    Get the configuration for the given ticket type and process the image using the configuration.
 
-    :param image: ndarray, input image
+    :param image: DocumentImage, input image
     :param textract_client: boto3 Textract client, used for extracting text from the image
     :param ticket_type: str, type of the ticket (e.g., 'flight', 'baggage')
+    :param page_words: list, words of a full-page Textract response, if one was made
+    :param ocr_backend: OCRBackend, engine used to read the regions
     :return: dict, extracted ticket information
     """
     if image is not None:
-        config_filename = f"{ticket_type}_ticket_config.json"
-        config_path = os.path.join(
-            os.path.dirname(__file__), "configs", config_filename
-        )
-        config = load_config(config_path)
+        config = TICKET_CONFIGS.get(ticket_type)
         if config is None:
             print(
                 "Error loading the configuration file. Please check the file path and format."
             )
             return None
-        return process_document(image, config, textract_client, ticket_type)
+        # Render PDFs at the lowest resolution the layout still reads reliably at
+        image = image.with_pdf_dpi(config.pdf_dpi)
+        return process_document(
+            image,
+            config,
+            textract_client,
+            ticket_type,
+            page_words=page_words,
+            ocr_backend=ocr_backend,
+        )
     else:
         print("Error reading the input image.")
         return None
 
 
-def determine_ticket_type(image, textract_client):
+def find_ticket_type(text):
+    """
+    Find the type of the ticket in the given text using a predefined set of keywords.
+
+    :param text: str, text extracted from the ticket
+    :return: str, ticket type (e.g., 'emirates', 'flynas') or None if no keyword was found
+    """
+    for ticket_type, keyword in TICKET_TYPE_KEYWORDS.items():
+        if keyword in text:
+            return ticket_type
+    return None
+
+
+def determine_ticket_type(image, textract_client, ocr_backend=None):
     """
     Determine the type of the ticket from the given image using a predefined set of keywords.
 
-    :param image: ndarray, input image
+    :param image: DocumentImage, input image
     :param textract_client: boto3 Textract client, used for extracting text from the image
+    :param ocr_backend: OCRBackend, engine used to read the page
     :return: str, ticket type (e.g., 'flight', 'baggage') or None if the ticket type could not be determined
     """
     if image is not None:
@@ -254,33 +361,124 @@ def determine_ticket_type(image, textract_client):
             region_coordinates=[0, 0, image.shape[1], image.shape[0]],
             textract_client=textract_client,
             use_aws=USE_AWS,
+            ocr_backend=ocr_backend,
         )
-        for ticket_type, keyword in TICKET_TYPE_KEYWORDS.items():
-            if keyword in text:
-                return ticket_type
+        return find_ticket_type(text)
     return None
 
 
-def extract_ticket_info(file_path):
+def detect_page_text(image, textract_client, ocr_backend=None):
+    """
+    Detect the text of the whole page with a single Textract call.
+
+    :param image: DocumentImage, input image
+    :param textract_client: boto3 Textract client, used for extracting text from the image
+    :param ocr_backend: OCRBackend, engine used to read the page
+    :return: tuple (text, words), where:
+             - text: str, the text of all lines on the page
+             - words: list, the words on the page with their bounding boxes
+    """
+    if image is None:
+        return "", []
+
+    response = detect_document_text(
+        image=image,
+        textract_client=textract_client,
+        use_aws=USE_AWS,
+        ocr_backend=ocr_backend,
+    )
+    if response is None:
+        return "", []
+
+    lines = extract_text_and_confidence(response)
+    text = " ".join([line["Text"] for line in lines])
+    return text, extract_words_with_geometry(response)
+
+
+def extract_page_info(image, textract_client, ocr_backend=None):
     """
-    Extract ticket information from the given file path.
+    Extract ticket information from one page of a flight ticket.
 
-    :param file_path: str, path to the input image file
+    :param image: DocumentImage, page of the ticket
+    :param textract_client: boto3 Textract client, used for extracting text from the image
+    :param ocr_backend: OCRBackend, engine used to read the page
+    :return: dict, extracted ticket information or None if the ticket type could not be determined
+    """
+    # Digital e-tickets carry a text layer, which is read without rendering or OCR
+    page_text, page_words = "", []
+    if USE_PDF_TEXT_LAYER:
+        page_text, page_words = image.text_layer
+    ticket_type = find_ticket_type(page_text) if page_words else None
+
+    # Determine the ticket type with OCR when there is no usable text layer
+    if ticket_type is None:
+        if USE_SINGLE_TEXTRACT_CALL:
+            page_text, page_words = detect_page_text(
+                image, textract_client, ocr_backend
+            )
+            ticket_type = find_ticket_type(page_text)
+        else:
+            page_words = None
+            ticket_type = determine_ticket_type(image, textract_client, ocr_backend)
+    if ticket_type is None:
+        return None
+
+    # Load and process the configuration for the determined ticket type
+    return load_and_process_config(
+        image,
+        textract_client,
+        ticket_type,
+        page_words=page_words,
+        ocr_backend=ocr_backend,
+    )
+
+
+def has_required_fields(extracted_data):
+    """
+    :param extracted_data: dict, extracted ticket information
+    :return: bool, True if every field of REQUIRED_TICKET_FIELDS was found
+    """
+    return all(extracted_data.get(field) for field in REQUIRED_TICKET_FIELDS)
+
+
+def extract_ticket_info(source):
+    """
+    Extract ticket information from the given flight ticket.
+
+    The pages of a PDF are rendered and read one at a time, and the search stops at the first page that has
+    every field of REQUIRED_TICKET_FIELDS, so only one rendered page is held in memory however long the PDF is.
+    All fields come from that one page: the pages can be tickets of other flights or passengers, so their
+    fields are never combined. When no page is complete, the first page with a ticket is returned.
+
+    :param source: bytes, memoryview, file-like object (e.g. an UploadedFile) or path of the input image
     :return: dict, extracted ticket information or None if the ticket type could not be determined
     """
     textract_client = setup_textract_client(
         access_key=os.getenv("AWS_ACCESS_KEY"), secret_key=os.getenv("AWS_SECRET_KEY")
     )
+    ocr_backend = get_ocr_backend(textract_client, use_aws=USE_AWS)
 
-    file_extension = os.path.splitext(file_path)[1].lower()
-    image = read_image(file_path, file_extension)
-
-    # Determine the ticket type
-    ticket_type = determine_ticket_type(image, textract_client)
-    if ticket_type is None:
+    document = read_image(source)
+    if document is None:
         print("Error: Could not determine ticket type.")
         return None
 
-    # Load and process the configuration for the determined ticket type
-    extracted_data = load_and_process_config(image, textract_client, ticket_type)
+    extracted_data = None
+    for image in document.iter_pages(max_pages=MAX_TICKET_PAGES):
+        try:
+            page_data = extract_page_info(image, textract_client, ocr_backend)
+        except ValueError as e:
+            print(f"Error reading page {image.page_index + 1}: {e}")
+            continue
+        if page_data is None:
+            continue
+
+        if has_required_fields(page_data):
+            extracted_data = page_data
+            break
+        if extracted_data is None:
+            extracted_data = page_data
+
+    if extracted_data is None:
+        print("Error: Could not determine ticket type.")
     return extracted_data
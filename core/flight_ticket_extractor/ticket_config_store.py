@@ -0,0 +1,173 @@
+import json
+import os
+import threading
+from collections import namedtuple
+from numbers import Number
+
+from core.common.config_reloader import DEFAULT_CHECK_INTERVAL, ReloadingConfig
+from core.common.document_image import DEFAULT_PDF_DPI
+
+# One region of a ticket, with its processing function already looked up
+RegionPlan = namedtuple(
+    "RegionPlan", ["name", "box", "coordinates", "processing_function"]
+)
+# A validated ticket config, ready to be applied to tickets
+TicketLayout = namedtuple("TicketLayout", ["ticket_type", "pdf_dpi", "regions"])
+
+
+def validate_ticket_config(config, processing_functions):
+    """
+    Check that a ticket config has the expected schema.
+
+    :param config: dict, ticket config
+    :param processing_functions: dict, names allowed as processing_function
+    :raises ValueError: describing every problem found
+    """
+    if not isinstance(config, dict):
+        raise ValueError("The ticket config must be an object.")
+
+    problems = []
+    pdf_dpi = config.get("pdf_dpi", DEFAULT_PDF_DPI)
+    if not isinstance(pdf_dpi, int) or isinstance(pdf_dpi, bool) or pdf_dpi <= 0:
+        problems.append("pdf_dpi: must be a positive integer")
+
+    regions = config.get("regions")
+    if not isinstance(regions, dict) or not regions:
+        problems.append("regions: must be a non-empty object")
+        regions = {}
+
+    for region_name, region_info in regions.items():
+        if not isinstance(region_info, dict):
+            problems.append(f"regions.{region_name}: must be an object")
+            continue
+
+        if "box" in region_info:
+            box = region_info["box"]
+            if not (
+                isinstance(box, list)
+                and len(box) == 4
+                and all(isinstance(value, Number) and 0 <= value <= 1 for value in box)
+            ):
+                problems.append(
+                    f"regions.{region_name}.box: must be 4 fractions of the page"
+                )
+        elif "coordinates" in region_info:
+            coordinates = region_info["coordinates"]
+            if not (
+                isinstance(coordinates, list)
+                and len(coordinates) == 4
+                and all(isinstance(value, int) and value >= 0 for value in coordinates)
+            ):
+                problems.append(
+                    f"regions.{region_name}.coordinates: must be 4 pixel values"
+                )
+        else:
+            problems.append(f"regions.{region_name}: has no box or coordinates")
+
+        function_name = region_info.get("processing_function") or ""
+        if function_name and function_name not in processing_functions:
+            problems.append(
+                f"regions.{region_name}.processing_function: unknown function {function_name}"
+            )
+
+    if problems:
+        raise ValueError("Invalid ticket config: " + "; ".join(problems))
+
+
+def build_ticket_layout(ticket_type, config, processing_functions):
+    """
+    Validate a ticket config and resolve its processing functions.
+
+    :param ticket_type: str, type of the ticket (e.g., 'emirates')
+    :param config: dict, ticket config
+    :param processing_functions: dict, processing function name -> function
+    :return: TicketLayout
+    :raises ValueError: if the config is invalid
+    """
+    validate_ticket_config(config, processing_functions)
+    regions = tuple(
+        RegionPlan(
+            name=region_name,
+            box=tuple(region_info["box"]) if "box" in region_info else None,
+            coordinates=region_info.get("coordinates"),
+            processing_function=processing_functions.get(
+                region_info.get("processing_function") or ""
+            ),
+        )
+        for region_name, region_info in config["regions"].items()
+    )
+    return TicketLayout(
+        ticket_type=ticket_type,
+        pdf_dpi=config.get("pdf_dpi", DEFAULT_PDF_DPI),
+        regions=regions,
+    )
+
+
+class TicketConfigStore:
+    """
+    The ticket configs of a directory, parsed and validated once per file version.
+
+    Each config is loaded on first use and rebuilt when its file changes, so tickets are processed without
+    reading or parsing JSON and edits to a config take effect without a restart.
+    """
+
+    def __init__(
+        self,
+        configs_dir,
+        processing_functions,
+        suffix,
+        check_interval=DEFAULT_CHECK_INTERVAL,
+    ):
+        """
+        :param configs_dir: str, directory of the ticket configs
+        :param processing_functions: dict, processing function name -> function
+        :param suffix: str, file name suffix of the configs, after the ticket type
+        :param check_interval: float, minimum number of seconds between two checks of a config file
+        """
+        self.configs_dir = configs_dir
+        self.processing_functions = processing_functions
+        self.suffix = suffix
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._configs = {}
+
+    def ticket_types(self):
+        """
+        :return: list, ticket types of the config files in the directory
+        """
+        return sorted(
+            filename[: -len(self.suffix)]
+            for filename in os.listdir(self.configs_dir)
+            if filename.endswith(self.suffix)
+        )
+
+    def _build(self, ticket_type, config_path):
+        with open(config_path, "r") as config_file:
+            try:
+                config = json.load(config_file)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Invalid JSON in {config_path}: {e}")
+        return build_ticket_layout(ticket_type, config, self.processing_functions)
+
+    def get(self, ticket_type):
+        """
+        :param ticket_type: str, type of the ticket (e.g., 'emirates')
+        :return: TicketLayout, or None if the ticket type has no valid config
+        """
+        config = self._configs.get(ticket_type)
+        if config is None:
+            config_path = os.path.join(self.configs_dir, f"{ticket_type}{self.suffix}")
+            with self._lock:
+                config = self._configs.get(ticket_type)
+                if config is None:
+                    try:
+                        config = ReloadingConfig(
+                            config_path,
+                            lambda path: self._build(ticket_type, path),
+                            check_interval=self.check_interval,
+                        )
+                    except Exception as e:
+                        print(f"Error loading configuration file: {e}")
+                        return None
+                    self._configs[ticket_type] = config
+        return config.get()
@@ -136,6 +136,52 @@ class ImageAndPDFInput(ClearableFileInput):
         super().__init__(attrs)
 
 
+# Families check several bags, so one claim can carry a baggage tag per bag
+MAX_BAGGAGE_TAGS = 10
+
+
+class MultipleFileInput(forms.FileInput):
+    allow_multiple_selected = True
+
+    def __init__(self, attrs=None):
+        if attrs is None:
+            attrs = {}
+        attrs["multiple"] = True
+        super().__init__(attrs)
+
+    def value_from_datadict(self, data, files, name):
+        return files.getlist(name) if hasattr(files, "getlist") else files.get(name)
+
+
+class MultipleImageField(forms.ImageField):
+    """
+    An image field that accepts several files and cleans each of them, returning a list of files.
+    """
+
+    widget = MultipleFileInput
+
+    def __init__(self, *args, max_files=None, **kwargs):
+        self.max_files = max_files
+        super().__init__(*args, **kwargs)
+
+    def clean(self, data, initial=None):
+        clean_file = super().clean
+        if data in self.empty_values:
+            data = []
+        elif not isinstance(data, (list, tuple)):
+            data = [data]
+
+        if not data:
+            # Runs the required check of a single file field
+            clean_file(None, initial)
+            return []
+        if self.max_files is not None and len(data) > self.max_files:
+            raise forms.ValidationError(
+                f"Upload at most {self.max_files} files.", code="max_files"
+            )
+        return [clean_file(file, initial) for file in data]
+
+
 class RequiredDocumentsForm(forms.Form):
     passport = forms.FileField(
         required=True,
@@ -145,7 +191,8 @@ class RequiredDocumentsForm(forms.Form):
         required=True,
         widget=ImageAndPDFInput(attrs={"class": "w-full p-2 border rounded"}),
     )
-    baggage_tag = forms.ImageField(
+    baggage_tags = MultipleImageField(
         required=False,
-        widget=forms.FileInput(attrs={"class": "w-full p-2 border rounded"}),
+        max_files=MAX_BAGGAGE_TAGS,
+        widget=MultipleFileInput(attrs={"class": "w-full p-2 border rounded"}),
     )
@@ -0,0 +1,84 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from pyzbar.pyzbar import decode
+
+from core.baggage_tag_extractor.barcode import decode_barcode
+from core.common.document_image import DocumentImage
+
+SAMPLE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp", ".bmp", ".tif", ".tiff")
+
+
+def read_full_resolution(image):
+    # The barcode stage used before localization: the whole photo at full resolution
+    barcodes = decode(image.pil)
+    return barcodes[0].data.decode("utf-8") if barcodes else None
+
+
+def time_call(function, argument, repeat):
+    """
+    :return: tuple (result, seconds), result of the last call and best time of the repeated calls
+    """
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function(argument)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+
+class Command(BaseCommand):
+    help = "Compare the time per tag of the localized barcode stage with a full-resolution decode."
+
+    def add_arguments(self, parser):
+        parser.add_argument("samples", help="Directory with sample baggage tag photos.")
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=3,
+            help="Number of runs per tag, the fastest one is reported.",
+        )
+
+    def handle(self, *args, **options):
+        samples = options["samples"]
+        if not os.path.isdir(samples):
+            raise CommandError(f"'{samples}' is not a directory.")
+        repeat = max(1, options["repeat"])
+
+        file_names = sorted(
+            file_name
+            for file_name in os.listdir(samples)
+            if file_name.lower().endswith(SAMPLE_EXTENSIONS)
+        )
+        if not file_names:
+            raise CommandError(f"No sample tags found in '{samples}'.")
+
+        totals = {"full": 0.0, "localized": 0.0}
+        decoded = {"full": 0, "localized": 0}
+        for file_name in file_names:
+            image = DocumentImage.from_path(os.path.join(samples, file_name))
+            # Decode the photo up front, so only the barcode stage is timed
+            image.gray
+            image.pil.load()
+
+            full_result, full_time = time_call(read_full_resolution, image, repeat)
+            result, localized_time = time_call(decode_barcode, image.gray, repeat)
+
+            totals["full"] += full_time
+            totals["localized"] += localized_time
+            decoded["full"] += full_result is not None
+            decoded["localized"] += result is not None
+            self.stdout.write(
+                f"{file_name}: {localized_time * 1000:.1f} ms ({result}), "
+                f"full resolution {full_time * 1000:.1f} ms ({full_result})"
+            )
+
+        count = len(file_names)
+        self.stdout.write(
+            f"{count} tags: {totals['localized'] / count * 1000:.1f} ms per tag, "
+            f"{decoded['localized']} decoded; full resolution "
+            f"{totals['full'] / count * 1000:.1f} ms per tag, {decoded['full']} decoded"
+        )
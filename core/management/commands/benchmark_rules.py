@@ -0,0 +1,66 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import VerificationJob
+from core.rules import (
+    VERIFICATION_RULES,
+    build_claim_similarity,
+    process_extracted_baggage_data,
+    process_extracted_flight_data,
+)
+
+
+class Command(BaseCommand):
+    help = "Re-run the verification rules on the finished jobs and report the time spent in each rule."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=10,
+            help="Number of times the rules are run on each job.",
+        )
+
+    def handle(self, *args, **options):
+        repeat = max(1, options["repeat"])
+        jobs = list(
+            VerificationJob.objects.filter(status="Done").values_list(
+                "personal_details", "results"
+            )
+        )
+        if not jobs:
+            raise CommandError("No finished verification jobs to run the rules on.")
+
+        for _ in range(repeat):
+            for personal_details, results in jobs:
+                personal_details = personal_details or {}
+                flight_data = results.get("flight_data")
+                baggage_data = results.get("baggage_data")
+                if not isinstance(baggage_data, list):
+                    # Jobs from before claims could have several tags
+                    baggage_data = [baggage_data] if baggage_data else []
+                passport_name = (results.get("passport_data") or {}).get("name")
+                similarity = build_claim_similarity(
+                    personal_details.get("name"),
+                    passport_name,
+                    flight_data,
+                    baggage_data,
+                )
+                process_extracted_flight_data(
+                    personal_details.get("name"),
+                    passport_name,
+                    flight_data,
+                    similarity=similarity,
+                )
+                if flight_data:
+                    process_extracted_baggage_data(
+                        flight_data, baggage_data, similarity=similarity
+                    )
+
+        for name, plan in VERIFICATION_RULES.get().items():
+            self.stdout.write(f"{name}:")
+            for error_type, (calls, seconds) in plan.timings().items():
+                average = seconds / calls * 1_000_000 if calls else 0.0
+                self.stdout.write(
+                    f"  {error_type}: {calls} runs, {seconds * 1000:.2f} ms, "
+                    f"{average:.1f} µs per run"
+                )
@@ -0,0 +1,95 @@
+import random
+import time
+from decimal import Decimal
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from core.scoring import (
+    ERROR_TYPE_COLUMNS,
+    ERROR_TYPES,
+    UNSCORED_ERROR,
+    calculate_weighted_sum_of_errors,
+    error_type_weight_vector,
+    score_batch,
+)
+
+
+def random_claim_scores(claim_count, seed):
+    """
+    Generate the scores of claims with a few random errors each.
+
+    Args:
+        claim_count (int): The number of claims.
+        seed (int): The seed of the random generator, so runs can be compared.
+
+    Returns:
+        list: The scores of each claim, as merge_scores gives them.
+    """
+    generator = random.Random(seed)
+    claim_scores = []
+    for _ in range(claim_count):
+        scores = {}
+        for error_type in generator.sample(ERROR_TYPES, generator.randint(0, 5)):
+            if generator.random() < 0.3:
+                scores[error_type] = None
+            else:
+                scores[error_type] = Decimal(generator.randint(0, 10000)) / 100
+        claim_scores.append(scores)
+    return claim_scores
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the time calculate_weighted_sum_of_errors and score_batch take to score the same random "
+        "claims, and check that they agree."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--claims",
+            type=int,
+            default=100_000,
+            help="Number of random claims to score.",
+        )
+        parser.add_argument(
+            "--seed", type=int, default=0, help="Seed of the random scores."
+        )
+
+    def handle(self, *args, **options):
+        claim_scores = random_claim_scores(max(1, options["claims"]), options["seed"])
+
+        start = time.perf_counter()
+        exact_sums = [
+            calculate_weighted_sum_of_errors(scores)[0] for scores in claim_scores
+        ]
+        exact_seconds = time.perf_counter() - start
+
+        # Building the matrix is timed apart, it is done once for any number of weight vectors
+        start = time.perf_counter()
+        score_matrix = np.full((len(claim_scores), len(ERROR_TYPES)), np.nan)
+        for row, scores in enumerate(claim_scores):
+            for error_type, score in scores.items():
+                score_matrix[row, ERROR_TYPE_COLUMNS[error_type]] = (
+                    UNSCORED_ERROR if score is None else float(score)
+                )
+        build_seconds = time.perf_counter() - start
+
+        weights = error_type_weight_vector()
+        start = time.perf_counter()
+        weighted_sums, _ = score_batch(score_matrix, weights)
+        batch_seconds = time.perf_counter() - start
+
+        difference = float(
+            np.max(np.abs(weighted_sums - np.array(exact_sums, dtype=np.float64)))
+        )
+        self.stdout.write(
+            f"calculate_weighted_sum_of_errors: {exact_seconds * 1000:.1f} ms for "
+            f"{len(claim_scores)} claims"
+        )
+        self.stdout.write(
+            f"score_batch: {batch_seconds * 1000:.1f} ms "
+            f"(+ {build_seconds * 1000:.1f} ms to build the score matrix), "
+            f"{exact_seconds / batch_seconds:.0f}x faster"
+        )
+        self.stdout.write(f"Largest difference in the weighted sums: {difference:.2e}")
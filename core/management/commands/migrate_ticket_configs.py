@@ -0,0 +1,92 @@
+import json
+import os
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.flight_ticket_extractor.flight_ticket_info_extractor import (
+    CONFIGS_DIR,
+    TICKET_CONFIG_SUFFIX,
+    TICKET_CONFIG_VERSION,
+    normalize_ticket_config,
+)
+
+
+def format_config(config):
+    output = json.dumps(config, indent=2)
+    # Keep boxes and sizes on one line, like the hand written configs
+    return (
+        re.sub(
+            r"\[\s+([^\[\]{}]*?)\s+\]",
+            lambda match: "[" + re.sub(r",\s+", ", ", match.group(1)) + "]",
+            output,
+        )
+        + "\n"
+    )
+
+
+def save_config(config, config_path):
+    with open(config_path, "w") as config_file:
+        config_file.write(format_config(config))
+
+
+def parse_reference_size(value):
+    ticket_type, _, size = value.partition("=")
+    try:
+        width, height = (int(dimension) for dimension in size.lower().split("x"))
+    except ValueError:
+        raise CommandError(
+            f"Invalid reference size '{value}', expected TICKET_TYPE=WIDTHxHEIGHT."
+        )
+    return ticket_type, (width, height)
+
+
+class Command(BaseCommand):
+    help = "Convert flight ticket configs from pixel coordinates to resolution-independent boxes."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--reference-size",
+            action="append",
+            default=[],
+            metavar="TICKET_TYPE=WIDTHxHEIGHT",
+            help="Size of the sample ticket the pixel coordinates of a config were measured on.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Print the converted configs instead of writing them.",
+        )
+
+    def handle(self, *args, **options):
+        reference_sizes = dict(
+            parse_reference_size(value) for value in options["reference_size"]
+        )
+
+        for filename in sorted(os.listdir(CONFIGS_DIR)):
+            if not filename.endswith(TICKET_CONFIG_SUFFIX):
+                continue
+            ticket_type = filename[: -len(TICKET_CONFIG_SUFFIX)]
+            config_path = os.path.join(CONFIGS_DIR, filename)
+            with open(config_path, "r") as config_file:
+                config = json.load(config_file)
+
+            if config.get("version", 1) >= TICKET_CONFIG_VERSION:
+                self.stdout.write(f"{filename} is already up to date.")
+                continue
+
+            reference_size = reference_sizes.get(ticket_type) or config.get(
+                "reference_size"
+            )
+            if reference_size is None:
+                raise CommandError(
+                    f"Pass --reference-size {ticket_type}=WIDTHxHEIGHT to convert {filename}."
+                )
+
+            normalized_config = normalize_ticket_config(config, reference_size)
+            if options["dry_run"]:
+                self.stdout.write(format_config(normalized_config))
+                continue
+
+            save_config(normalized_config, config_path)
+            self.stdout.write(f"Converted {filename}.")
@@ -0,0 +1,106 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.models import Claim
+from core.scoring import (
+    batch_reasons,
+    error_type_weight_vector,
+    grade_batch,
+    load_score_matrix,
+    score_batch,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Re-evaluate the severity, status and reasons of existing claims with the current error type weights "
+        "and severity thresholds, from the error scores stored on each claim. Claims without stored scores "
+        "are skipped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=5000,
+            help="Number of claims loaded, scored and updated at a time.",
+        )
+        parser.add_argument(
+            "--status",
+            action="append",
+            choices=[status for status, _ in Claim.STATUS_CHOICES],
+            help=(
+                "Only re-score claims with this status, can be repeated. By default every claim that was not "
+                "rejected is re-scored, as rejections are made by a reviewer."
+            ),
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Count the claims that would change without updating them.",
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = max(1, options["chunk_size"])
+        claims = Claim.objects.all()
+        if options["status"]:
+            claims = claims.filter(status__in=options["status"])
+        else:
+            claims = claims.exclude(status="Rejected")
+        claims = claims.filter(error_scores__isnull=False)
+        # The weights are read once, so every chunk is scored with the same vector
+        weights = error_type_weight_vector()
+
+        start = time.perf_counter()
+        last_id = 0
+        scored = changed = 0
+        while True:
+            # Keyset pagination, so every chunk is an index range scan however far the command has gone
+            chunk = list(
+                claims.filter(id__gt=last_id)
+                .order_by("id")
+                .values_list("id", "severity", "status", "reasons")[:chunk_size]
+            )
+            if not chunk:
+                break
+            last_id = chunk[-1][0]
+
+            claim_ids, score_matrix = load_score_matrix(
+                Claim.objects.filter(id__in=[row[0] for row in chunk])
+            )
+            matrix_rows = {claim_id: index for index, claim_id in enumerate(claim_ids)}
+            rows = [row for row in chunk if row[0] in matrix_rows]
+            if not rows:
+                continue
+
+            weighted_sums, below_threshold = score_batch(
+                score_matrix[[matrix_rows[row[0]] for row in rows]], weights
+            )
+            severities, statuses = grade_batch(weighted_sums, below_threshold)
+            reasons = batch_reasons(below_threshold)
+            updates = [
+                Claim(id=claim_id, severity=severity, status=status, reasons=reason)
+                for (claim_id, *current), severity, status, reason in zip(
+                    rows, severities, statuses, reasons
+                )
+                if current != [severity, status, reason]
+            ]
+            scored += len(rows)
+            changed += len(updates)
+
+            if updates and not options["dry_run"]:
+                with transaction.atomic():
+                    Claim.objects.bulk_update(
+                        updates, ["severity", "status", "reasons"], batch_size=1000
+                    )
+            self.stdout.write(
+                f"Scored {scored} claims, {changed} changed "
+                f"({time.perf_counter() - start:.1f} s)"
+            )
+
+        action = "would change" if options["dry_run"] else "updated"
+        self.stdout.write(
+            self.style.SUCCESS(f"Re-scored {scored} claims, {changed} {action}.")
+        )
@@ -0,0 +1,52 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from core.verification import claim_next_job, requeue_stale_jobs, run_verification_job
+
+
+class Command(BaseCommand):
+    help = "Process queued document verification jobs in the background."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Process the jobs that are currently pending and exit.",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=1.0,
+            help="Seconds to wait before polling again when the queue is empty.",
+        )
+        parser.add_argument(
+            "--stale-after",
+            type=int,
+            default=10,
+            help="Minutes after which a running job is considered abandoned and requeued.",
+        )
+
+    def handle(self, *args, **options):
+        stale_timeout = timedelta(minutes=options["stale_after"])
+        self.stdout.write("Verification worker started.")
+
+        while True:
+            close_old_connections()
+
+            requeued = requeue_stale_jobs(stale_timeout)
+            if requeued:
+                self.stdout.write(f"Requeued {requeued} stale job(s).")
+
+            job = claim_next_job()
+            if job is None:
+                if options["once"]:
+                    break
+                time.sleep(options["poll_interval"])
+                continue
+
+            self.stdout.write(f"Processing verification job {job.id}.")
+            job = run_verification_job(job)
+            self.stdout.write(f"Verification job {job.id} finished: {job.status}.")
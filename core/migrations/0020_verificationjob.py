@@ -0,0 +1,88 @@
+# Generated by Django 4.2 on 2026-10-18 00:27
+
+import django.core.serializers.json
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0019_alter_claim_status"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="VerificationJob",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("Pending", "Pending"),
+                            ("Running", "Running"),
+                            ("Done", "Done"),
+                            ("Failed", "Failed"),
+                        ],
+                        default="Pending",
+                        max_length=10,
+                    ),
+                ),
+                ("personal_details", models.JSONField(blank=True, default=dict)),
+                (
+                    "flight_ticket",
+                    models.FileField(
+                        blank=True, null=True, upload_to="verification_jobs/"
+                    ),
+                ),
+                (
+                    "baggage_tag",
+                    models.FileField(
+                        blank=True, null=True, upload_to="verification_jobs/"
+                    ),
+                ),
+                (
+                    "passport",
+                    models.FileField(
+                        blank=True, null=True, upload_to="passport_photos/"
+                    ),
+                ),
+                (
+                    "results",
+                    models.JSONField(
+                        blank=True,
+                        default=dict,
+                        encoder=django.core.serializers.json.DjangoJSONEncoder,
+                    ),
+                ),
+                ("error_message", models.TextField(blank=True)),
+                (
+                    "created_on",
+                    models.DateTimeField(
+                        default=django.utils.timezone.now, editable=False
+                    ),
+                ),
+                ("started_on", models.DateTimeField(blank=True, null=True)),
+                ("finished_on", models.DateTimeField(blank=True, null=True)),
+                (
+                    "claim",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        to="core.claim",
+                    ),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 4.2 on 2026-10-18 00:30
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0020_verificationjob"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ApiCredit",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=50, unique=True)),
+                ("remaining_calls", models.IntegerField(default=0)),
+                (
+                    "daily_quota",
+                    models.PositiveIntegerField(
+                        blank=True,
+                        help_text="Maximum number of calls per day, leave empty for no daily limit",
+                        null=True,
+                    ),
+                ),
+                ("calls_today", models.PositiveIntegerField(default=0)),
+                (
+                    "quota_date",
+                    models.DateField(default=django.utils.timezone.localdate),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 4.2 on 2026-10-18 00:47
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def copy_baggage_tags(apps, schema_editor):
+    VerificationJob = apps.get_model("core", "VerificationJob")
+    VerificationJobBaggageTag = apps.get_model("core", "VerificationJobBaggageTag")
+    VerificationJobBaggageTag.objects.bulk_create(
+        VerificationJobBaggageTag(job_id=job.id, file=job.baggage_tag)
+        for job in VerificationJob.objects.exclude(baggage_tag="").exclude(
+            baggage_tag__isnull=True
+        )
+    )
+
+
+def restore_baggage_tags(apps, schema_editor):
+    VerificationJob = apps.get_model("core", "VerificationJob")
+    VerificationJobBaggageTag = apps.get_model("core", "VerificationJobBaggageTag")
+    jobs = {}
+    # Jobs had a single baggage tag before, the first tag of each job is kept
+    for tag in VerificationJobBaggageTag.objects.order_by("-id").iterator():
+        jobs[tag.job_id] = VerificationJob(id=tag.job_id, baggage_tag=tag.file)
+    VerificationJob.objects.bulk_update(jobs.values(), ["baggage_tag"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0021_apicredit"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="VerificationJobBaggageTag",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("file", models.FileField(upload_to="verification_jobs/")),
+                (
+                    "job",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="baggage_tags",
+                        to="core.verificationjob",
+                    ),
+                ),
+            ],
+        ),
+        migrations.RunPython(copy_baggage_tags, restore_baggage_tags),
+        migrations.RemoveField(
+            model_name="verificationjob",
+            name="baggage_tag",
+        ),
+    ]
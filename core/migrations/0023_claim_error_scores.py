@@ -0,0 +1,87 @@
+# Generated by Django 4.2 on 2026-10-18 01:07
+
+import numpy as np
+from django.db import migrations, models
+
+# Version 1 of core.scoring.ERROR_SCORE_INDEXES and its encoder, copied so the migration does not depend on
+# what the scoring module becomes
+ERROR_SCORE_INDEX = (
+    "name_mismatch",
+    "expired_passport",
+    "dob_mismatch",
+    "gender_mismatch",
+    "not_authentic",
+    "unrecognized",
+    "incorrect_flight_ticket",
+    "flight_ticket_personal_details_name_mismatch",
+    "flight_ticket_passport_name_mismatch",
+    "flight_ticket_passenger_name_mismatch",
+    "incorrect_baggage_tag",
+    "invalid_emirates_barcode",
+    "airline_name_mismatch",
+    "booking_reference_mismatch",
+    "passenger_name_mismatch",
+)
+
+
+def encode_error_scores(scores):
+    vector = np.full(len(ERROR_SCORE_INDEX), np.nan, dtype="<f4")
+    for error_type, score in scores.items():
+        if error_type not in ERROR_SCORE_INDEX:
+            raise ValueError(f"Unknown error type {error_type}.")
+        vector[ERROR_SCORE_INDEX.index(error_type)] = (
+            -1.0 if score is None else float(score)
+        )
+    return vector.tobytes()
+
+
+def store_error_scores(apps, schema_editor):
+    Claim = apps.get_model("core", "Claim")
+    VerificationJob = apps.get_model("core", "VerificationJob")
+    claims = {}
+    jobs = (
+        VerificationJob.objects.filter(claim__isnull=False, status="Done")
+        .order_by("id")
+        .values_list("claim_id", "results")
+    )
+    for claim_id, results in jobs.iterator():
+        scores = {
+            **(results.get("passport_scores") or {}),
+            **(results.get("flight_ticket_scores") or {}),
+            **(results.get("baggage_tag_scores") or {}),
+        }
+        try:
+            error_scores = encode_error_scores(scores)
+        except ValueError as e:
+            print(f"Scores of claim {claim_id} not stored: {e}")
+            continue
+        # Later jobs replace the earlier ones of the same claim
+        claims[claim_id] = Claim(
+            id=claim_id, error_scores=error_scores, error_scores_version=1
+        )
+    Claim.objects.bulk_update(
+        claims.values(), ["error_scores", "error_scores_version"], batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0022_verificationjob_baggage_tags"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="claim",
+            name="error_scores",
+            field=models.BinaryField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="claim",
+            name="error_scores_version",
+            field=models.PositiveSmallIntegerField(
+                blank=True, editable=False, null=True
+            ),
+        ),
+        migrations.RunPython(store_error_scores, migrations.RunPython.noop),
+    ]
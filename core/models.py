@@ -1,6 +1,7 @@
 from uuid import uuid4
 
 import pycountry
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 from django.utils import timezone
 
@@ -83,6 +84,11 @@ class Claim(models.Model):
     severity = models.CharField(
         max_length=10, choices=SEVERITY_CHOICES, default="Low", null=True, blank=True
     )
+    # Scores of the verification checks, see core.scoring.encode_error_scores
+    error_scores = models.BinaryField(null=True, blank=True, editable=False)
+    error_scores_version = models.PositiveSmallIntegerField(
+        null=True, blank=True, editable=False
+    )
 
     def __str__(self):
         return f"{self.claim_reference_number}"
@@ -98,6 +104,57 @@ class Claim(models.Model):
         super().save(*args, **kwargs)
 
 
+class VerificationJob(models.Model):
+    STATUS_CHOICES = (
+        ("Pending", "Pending"),
+        ("Running", "Running"),
+        ("Done", "Done"),
+        ("Failed", "Failed"),
+    )
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="Pending")
+    personal_details = models.JSONField(default=dict, blank=True)
+    flight_ticket = models.FileField(
+        upload_to="verification_jobs/", blank=True, null=True
+    )
+    passport = models.FileField(upload_to="passport_photos/", blank=True, null=True)
+    results = models.JSONField(default=dict, blank=True, encoder=DjangoJSONEncoder)
+    error_message = models.TextField(blank=True)
+    claim = models.ForeignKey(Claim, models.SET_NULL, null=True, blank=True)
+    created_on = models.DateTimeField(
+        default=timezone.now, editable=False, null=False, blank=False
+    )
+    started_on = models.DateTimeField(null=True, blank=True)
+    finished_on = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Verification job {self.id} ({self.status})"
+
+
+class VerificationJobBaggageTag(models.Model):
+    job = models.ForeignKey(
+        VerificationJob, models.CASCADE, related_name="baggage_tags"
+    )
+    file = models.FileField(upload_to="verification_jobs/")
+
+    def __str__(self):
+        return f"Baggage tag {self.id} of verification job {self.job_id}"
+
+
+class ApiCredit(models.Model):
+    name = models.CharField(max_length=50, unique=True)
+    remaining_calls = models.IntegerField(default=0)
+    daily_quota = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        help_text="Maximum number of calls per day, leave empty for no daily limit",
+    )
+    calls_today = models.PositiveIntegerField(default=0)
+    quota_date = models.DateField(default=timezone.localdate)
+
+    def __str__(self):
+        return f"{self.name}: {self.remaining_calls} calls remaining"
+
+
 class Blockchain(models.Model):
     network_name = models.CharField(max_length=255)
     network_url = models.URLField()
@@ -1,33 +1,125 @@
+import base64
 import os
+import threading
 from decimal import Decimal
 from datetime import datetime
+from pathlib import Path
 
+from django.db.models import F, Q
+from django.utils import timezone
 from dotenv import load_dotenv
-from fuzzywuzzy import fuzz
 from idanalyzer import APIError, CoreAPI
 
+from core.common.payload_optimizer import PASSPORT_PAYLOAD, optimize_image_bytes
+from core.common.result_cache import ResultCache, make_cache_key
+from core.models import ApiCredit
+from core.rules import PASSPORT_NAME, PERSONAL_DETAILS_NAME
+from core.similarity import SimilarityMatrix
+
 load_dotenv()
 
 API_REGION = "US"
 USE_ID_ANALYZER_API = True  # Set to False when you don't want to consume API credits
+ID_ANALYZER_CREDIT_NAME = "id_analyzer"
+# Seeds the credit counter, calls are not limited when it is not set and no counter exists
+ID_ANALYZER_CREDITS = os.getenv("ID_ANALYZER_CREDITS")
+
+USE_PASSPORT_CACHE = True  # Set to False to always scan passports with ID Analyzer
+# Raw scan responses are kept for a week, after which the passport is scanned again.
+# They hold the personal data read from the passports, so they are kept out of the
+# repository root, in the data directory
+PASSPORT_CACHE = ResultCache(
+    path=os.getenv(
+        "PASSPORT_CACHE_PATH",
+        str(Path(__file__).resolve().parents[1] / "data" / "passport_cache.sqlite3"),
+    ),
+    max_entries=int(os.getenv("PASSPORT_CACHE_MAX_ENTRIES", "1000")),
+    ttl=int(os.getenv("PASSPORT_CACHE_TTL", str(7 * 24 * 60 * 60))),
+)
+
+# CoreAPI.scan writes each request into the client's shared config dict, so
+# clients are reused per thread rather than shared between threads
+_id_analyzer_clients = threading.local()
+
+
+def get_api_credit(name=ID_ANALYZER_CREDIT_NAME):
+    """
+    :param name: str, name of the API credit counter
+    :return: ApiCredit, or None if no credit is configured
+    """
+    credit = ApiCredit.objects.filter(name=name).first()
+    if credit is None and ID_ANALYZER_CREDITS:
+        credit, created = ApiCredit.objects.get_or_create(
+            name=name, defaults={"remaining_calls": int(ID_ANALYZER_CREDITS)}
+        )
+    return credit
+
+
+def reserve_api_call(name=ID_ANALYZER_CREDIT_NAME):
+    """
+    Atomically consume one API credit, respecting the daily quota.
+
+    The counter is only changed by conditional UPDATE statements, so concurrent workers can never
+    spend more credits than are available.
+
+    :param name: str, name of the API credit counter
+    :return: bool, True if a credit was reserved or no credit is configured, False if the credits or the daily
+             quota are used up
+    """
+    credit = get_api_credit(name)
+    if credit is None:
+        return True
+    today = timezone.localdate()
+
+    # Start a new daily quota on the first call of the day
+    ApiCredit.objects.filter(id=credit.id).exclude(quota_date=today).update(
+        quota_date=today, calls_today=0
+    )
+
+    reserved = (
+        ApiCredit.objects.filter(id=credit.id, quota_date=today, remaining_calls__gt=0)
+        .filter(Q(daily_quota__isnull=True) | Q(calls_today__lt=F("daily_quota")))
+        .update(
+            remaining_calls=F("remaining_calls") - 1, calls_today=F("calls_today") + 1
+        )
+    )
+    return bool(reserved)
 
 
-def read_remaining_calls():
-    with open("core/remaining_calls.txt", "r") as file:
-        remaining_calls = int(file.readline().strip())
-    return remaining_calls
+def release_api_call(name=ID_ANALYZER_CREDIT_NAME):
+    """
+    Give back a credit reserved by reserve_api_call when the request never reached the API.
 
+    :param name: str, name of the API credit counter
+    """
+    ApiCredit.objects.filter(name=name, calls_today__gt=0).update(
+        remaining_calls=F("remaining_calls") + 1, calls_today=F("calls_today") - 1
+    )
 
-def update_remaining_calls(remaining_calls):
-    with open("core/remaining_calls.txt", "w") as file:
-        file.write(str(remaining_calls))
 
+def get_id_analyzer_client():
+    coreapi = getattr(_id_analyzer_clients, "coreapi", None)
+    if coreapi is None:
+        coreapi = CoreAPI(os.getenv("IDANALYZER_API_KEY"), API_REGION)
+        coreapi.throw_api_exception(True)
+        coreapi.enable_authentication(True, "quick")
+        _id_analyzer_clients.coreapi = coreapi
+    return coreapi
 
-def check_name_mismatch(response, user_data):
-    extracted_full_name = response.get("result", {}).get("fullName", "").lower()
-    user_name = user_data.get("name", "").lower()
 
-    name_similarity_score = fuzz.ratio(extracted_full_name, user_name)
+def check_name_mismatch(passport_name, user_name, similarity=None):
+    """
+    :param passport_name: str, name extracted from the passport
+    :param user_name: str, user-provided name
+    :param similarity: SimilarityMatrix, similarity matrix of the claim, the two names are compared on their own
+                       if None
+    :return: Decimal, the similarity score if the names do not match, None otherwise
+    """
+    if similarity is None:
+        similarity = SimilarityMatrix(
+            {PASSPORT_NAME: passport_name, PERSONAL_DETAILS_NAME: user_name}
+        )
+    name_similarity_score = similarity.score(PASSPORT_NAME, PERSONAL_DETAILS_NAME)
     print(f"Name similarity score: {name_similarity_score}")
 
     # Set a threshold for the similarity score, e.g., 80
@@ -118,12 +210,125 @@ def check_gender_match(response, user_data):
     return None
 
 
-def analyze_passport(passport_path, user_data):
+def scan_passport(passport_path):
+    """
+    Scan the passport image with the ID Analyzer API, reusing the cached response of an identical image.
+
+    :param passport_path: str, path to the uploaded passport image
+    :return: dict, raw ID Analyzer response, or None if no API credits are left
+    :raises APIError: if the ID Analyzer API rejects the document
+    """
+    with open(passport_path, "rb") as file:
+        passport_bytes = file.read()
+
+    cache_key = None
+    if USE_PASSPORT_CACHE:
+        cache_key = make_cache_key(passport_bytes, "id_analyzer_scan", API_REGION)
+        response = PASSPORT_CACHE.get(cache_key)
+        if response is not None:
+            return response
+
+    if not reserve_api_call():
+        print("No ID Analyzer credits left for today, skipping passport verification.")
+        return None
+
+    try:
+        coreapi = get_id_analyzer_client()
+        # Phone photos are downscaled and stripped of EXIF data before the upload
+        payload = optimize_image_bytes(passport_bytes, PASSPORT_PAYLOAD)
+        response = coreapi.scan(
+            document_primary=base64.b64encode(payload).decode("ascii")
+        )
+    except APIError:
+        raise
+    except Exception:
+        # The scan never completed, so the reserved credit was not used
+        release_api_call()
+        raise
+
+    credit = get_api_credit()
+    if credit is not None:
+        print(f"Remaining calls: {credit.remaining_calls}")
+    if cache_key is not None:
+        PASSPORT_CACHE.set(cache_key, response)
+    return response
+
+
+def score_passport_response(response, user_data, check_name=True):
+    """
+    Compare an ID Analyzer response with the user data.
+
+    :param response: dict, raw ID Analyzer response
+    :param user_data: dict, user-provided information, including name, date of birth, and gender
+    :param check_name: bool, see analyze_passport
+    :return: tuple (scores, extracted_data), see analyze_passport
+    """
+    # Extract the name, passport expiry, dob, and gender
+    extracted_data = {
+        "name": response.get("result", {}).get("fullName", ""),
+        "passport_expiry": response.get("result", {}).get("expiry", ""),
+        "dob": response.get("result", {}).get("dob", ""),
+        "gender": response.get("result", {}).get("sex", ""),
+    }
+
+    # Call each rule-checking function and aggregate the results
+    scores = {
+        "name_mismatch": (
+            check_name_mismatch(extracted_data["name"], user_data.get("name", ""))
+            if check_name
+            else None
+        ),
+        "expired_passport": check_passport_expiry(response),
+        "dob_mismatch": check_dob_match(response, user_data),
+        "gender_mismatch": check_gender_match(response, user_data),
+        "not_authentic": check_passport_authentication(response),
+        "unrecognized": check_passport_recognition(response),
+    }
+
+    # Filter out any None values from the scores dictionary
+    scores = {key: value for key, value in scores.items() if value is not None}
+
+    # If the 'authentication' key exists and the score is less than or equal to 0.5,
+    # update the 'not_authentic' score
+    if response.get("authentication"):
+        authentication_result = response["authentication"]
+        if authentication_result["score"] <= 0.5:
+            scores["not_authentic"] = 1 - authentication_result["score"]
+
+    return scores, extracted_data
+
+
+def check_passport_name(passport_scores, passport_data, user_data, similarity):
+    """
+    Run the name check of a passport analyzed with check_name=False.
+
+    :param passport_scores: dict, scores returned by analyze_passport
+    :param passport_data: dict, data returned by analyze_passport, empty if the passport could not be read
+    :param user_data: dict, user-provided information, including name
+    :param similarity: SimilarityMatrix, similarity matrix of the claim, with the passport and personal details names
+    :return: dict, the passport scores with name_mismatch if the names do not match
+    """
+    if not passport_data:
+        return passport_scores
+    name_mismatch = check_name_mismatch(
+        passport_data["name"], user_data.get("name", ""), similarity
+    )
+    if name_mismatch is None:
+        return passport_scores
+    return {"name_mismatch": name_mismatch, **passport_scores}
+
+
+def analyze_passport(passport_path, user_data, check_name=True):
     """
     Analyze the passport image using the ID Analyzer API and compare the extracted information with the user data.
 
+    The raw API response is cached by image content, so resubmitting the same passport only re-runs the rule checks
+    against the new user data.
+
     :param passport_path: str, path to the uploaded passport image
     :param user_data: dict, user-provided information, including name, date of birth, and gender
+    :param check_name: bool, whether to compare the names, False when the caller compares them with the other
+                       names of the claim, see check_passport_name
     :return: tuple (scores, extracted_data), where:
              - scores: dict, scores for various rule-checking functions indicating any discrepancies or issues
              - extracted_data: dict, data extracted from the passport image, such as name, passport expiry, date of birth, and gender
@@ -132,48 +337,13 @@ def analyze_passport(passport_path, user_data):
         return {}, {}  # Assume the document is authentic if not using the API
 
     try:
-        coreapi = CoreAPI(os.getenv("IDANALYZER_API_KEY"), API_REGION)
-        coreapi.throw_api_exception(True)
-        coreapi.enable_authentication(True, "quick")
-
-        response = coreapi.scan(document_primary=passport_path)
-
-        # Extract the name, passport expiry, dob, and gender
-        extracted_data = {
-            "name": response.get("result", {}).get("fullName", ""),
-            "passport_expiry": response.get("result", {}).get("expiry", ""),
-            "dob": response.get("result", {}).get("dob", ""),
-            "gender": response.get("result", {}).get("sex", ""),
-        }
-
-        # Call each rule-checking function and aggregate the results
-        scores = {
-            "name_mismatch": check_name_mismatch(response, user_data),
-            "expired_passport": check_passport_expiry(response),
-            "dob_mismatch": check_dob_match(response, user_data),
-            "gender_mismatch": check_gender_match(response, user_data),
-            "not_authentic": check_passport_authentication(response),
-            "unrecognized": check_passport_recognition(response),
-        }
-
-        # Filter out any None values from the scores dictionary
-        scores = {key: value for key, value in scores.items() if value is not None}
-
-        # Read the remaining calls value, update and print the value
-        remaining_calls = read_remaining_calls()
-        remaining_calls -= 1
-        print(f"Remaining calls: {remaining_calls}")
-        update_remaining_calls(remaining_calls)
-
-        # If the 'authentication' key exists and the score is less than or equal to 0.5,
-        # update the 'not_authentic' score
-        if response.get("authentication"):
-            authentication_result = response["authentication"]
-            if authentication_result["score"] <= 0.5:
-                scores["not_authentic"] = 1 - authentication_result["score"]
+        response = scan_passport(passport_path)
+        if response is None:
+            # The passport could not be checked, so the claim is reviewed by hand
+            return {"unrecognized": None}, {}
 
         # Return both scores and extracted_data
-        return scores, extracted_data
+        return score_passport_response(response, user_data, check_name)
 
     except APIError as e:
         details = e.args[0]
@@ -0,0 +1,82 @@
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+# A single unit of work in a document pipeline. ``func`` is called with the
+# results of the stages named in ``dependencies`` as keyword arguments.
+Stage = namedtuple("Stage", ["name", "func", "dependencies"], defaults=[()])
+
+
+def validate_stages(stages):
+    """
+    Validate that every stage dependency exists and that the stages form a DAG.
+
+    :param stages: list, Stage instances
+    :raises ValueError: if a dependency is unknown, a name is duplicated or a cycle is found
+    """
+    names = [stage.name for stage in stages]
+    if len(names) != len(set(names)):
+        raise ValueError("Stage names must be unique.")
+
+    dependencies = {stage.name: set(stage.dependencies) for stage in stages}
+    for name, stage_dependencies in dependencies.items():
+        unknown = stage_dependencies - dependencies.keys()
+        if unknown:
+            raise ValueError(
+                f"Stage '{name}' depends on unknown stages: {sorted(unknown)}"
+            )
+
+    # Kahn's algorithm: repeatedly remove stages whose dependencies are resolved
+    resolved = set()
+    pending = dict(dependencies)
+    while pending:
+        ready = [name for name, deps in pending.items() if deps <= resolved]
+        if not ready:
+            raise ValueError(f"Stages contain a cycle: {sorted(pending)}")
+        for name in ready:
+            resolved.add(name)
+            del pending[name]
+
+
+def run_stages(stages, max_workers=None):
+    """
+    Run the given stages concurrently, starting each stage as soon as all of its dependencies have finished.
+
+    Independent stages (e.g. the remote calls for each uploaded document) overlap, so the total
+    latency is bounded by the slowest dependency chain rather than the sum of all stages.
+
+    :param stages: list, Stage instances forming a directed acyclic graph
+    :param max_workers: int, maximum number of threads, defaults to the number of stages
+    :return: dict, results keyed by stage name
+    :raises Exception: re-raises the first exception raised by a stage
+    """
+    validate_stages(stages)
+    if not stages:
+        return {}
+
+    results = {}
+    pending = {stage.name: stage for stage in stages}
+    running = {}
+
+    with ThreadPoolExecutor(max_workers=max_workers or len(stages)) as executor:
+        while pending or running:
+            # Submit every stage whose dependencies have produced a result
+            for name, stage in list(pending.items()):
+                if all(dependency in results for dependency in stage.dependencies):
+                    kwargs = {
+                        dependency: results[dependency]
+                        for dependency in stage.dependencies
+                    }
+                    running[executor.submit(stage.func, **kwargs)] = name
+                    del pending[name]
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    results[name] = future.result()
+                except Exception:
+                    for other in running:
+                        other.cancel()
+                    raise
+
+    return results
@@ -0,0 +1,289 @@
+import json
+import threading
+import time
+from collections import namedtuple
+from decimal import Decimal, InvalidOperation
+
+from core.similarity import SimilarityMatrix, normalize_text
+from core.utils import MAX_SCORE, MIN_SCORE, normalize_score
+
+# Record the time spent in each rule, see RulePlan.timings
+TIME_RULES = True
+
+# A value the rules can compare: how it is read from the documents, and its name in a similarity matrix
+Field = namedtuple("Field", ["read", "similarity_key"])
+# A compiled rule: evaluate(values, score) returns (fired, error_score)
+CompiledRule = namedtuple("CompiledRule", ["error_type", "evaluate", "stop"])
+
+
+def parse_decimal(value):
+    """
+    :param value: str or int, number written in a rule, strings keep their exact decimal value
+    :return: Decimal, or None if the value is not a number
+    """
+    if isinstance(value, bool) or not isinstance(value, (str, int)):
+        return None
+    try:
+        return Decimal(value)
+    except InvalidOperation:
+        return None
+
+
+def compile_unreadable(rule):
+    # The document could not be read at all: it is missing or none of its fields were found
+    (document,) = rule["fields"]
+    score = parse_decimal(rule["score"]) if rule.get("score") is not None else None
+
+    def evaluate(values, similarity_score):
+        data = values[document]
+        if data is None or all(value is None for value in data.values()):
+            return True, score
+        return False, None
+
+    return evaluate
+
+
+def compile_missing(rule):
+    (document,) = rule["fields"]
+    score = parse_decimal(rule["score"]) if rule.get("score") is not None else None
+
+    def evaluate(values, similarity_score):
+        if values[document] is None:
+            return True, score
+        return False, None
+
+    return evaluate
+
+
+def compile_similarity(rule):
+    first_field, second_field = rule["fields"]
+    threshold = parse_decimal(rule["threshold"])
+    normalize = rule.get("normalize", False)
+    skip_if_missing = rule.get("skip_if_missing", False)
+
+    def evaluate(values, similarity_score):
+        if skip_if_missing and not (values[first_field] and values[second_field]):
+            return False, None
+        score = Decimal(similarity_score(first_field, second_field))
+        if normalize:
+            score = normalize_score(score, MIN_SCORE, MAX_SCORE)
+        if score < threshold:
+            return True, score
+        return False, None
+
+    return evaluate
+
+
+def compile_prefix(rule):
+    # Codes of the given airline must start with the prefix, e.g. the barcodes of Emirates tags
+    airline_field, code_field = rule["fields"]
+    airline = normalize_text(rule["airline"])
+    prefix = rule["prefix"]
+
+    def evaluate(values, similarity_score):
+        code = values[code_field]
+        if (
+            code
+            and normalize_text(values[airline_field]) == airline
+            and not code.startswith(prefix)
+        ):
+            return True, None
+        return False, None
+
+    return evaluate
+
+
+# Comparator name -> (number of fields, options it requires, options it accepts, compile function)
+COMPARATORS = {
+    "unreadable": (1, (), ("score",), compile_unreadable),
+    "missing": (1, (), ("score",), compile_missing),
+    "similarity": (
+        2,
+        ("threshold",),
+        ("normalize", "skip_if_missing"),
+        compile_similarity,
+    ),
+    "prefix": (2, ("airline", "prefix"), (), compile_prefix),
+}
+RULE_KEYS = {"error_type", "comparator", "fields", "stop"}
+
+
+def validate_rule(rule, fields, error_types=None):
+    """
+    :param rule: dict, rule config
+    :param fields: dict, field name -> Field the rules can use
+    :param error_types: set, error types the rules can report, any error type if None
+    :return: list, problems found in the rule
+    """
+    if not isinstance(rule, dict):
+        return ["the rule must be an object"]
+
+    problems = []
+    if not isinstance(rule.get("error_type"), str) or not rule["error_type"]:
+        problems.append("error_type: missing or not a string")
+    elif error_types is not None and rule["error_type"] not in error_types:
+        problems.append(f"error_type: unknown error type {rule['error_type']}")
+
+    comparator = rule.get("comparator")
+    if comparator not in COMPARATORS:
+        return problems + [f"comparator: unknown comparator {comparator}"]
+    field_count, required, optional, _ = COMPARATORS[comparator]
+
+    rule_fields = rule.get("fields")
+    if not isinstance(rule_fields, list) or len(rule_fields) != field_count:
+        problems.append(f"fields: {comparator} compares {field_count} field(s)")
+    else:
+        unknown_fields = [field for field in rule_fields if field not in fields]
+        if unknown_fields:
+            problems.append(f"fields: unknown fields {unknown_fields}")
+        elif comparator == "similarity" and any(
+            fields[field].similarity_key is None for field in rule_fields
+        ):
+            problems.append("fields: only text fields can be compared")
+
+    for option in required:
+        if option not in rule:
+            problems.append(f"{option}: required by {comparator}")
+    for option in ("threshold", "score"):
+        if rule.get(option) is not None and parse_decimal(rule[option]) is None:
+            problems.append(f"{option}: must be a number")
+    for option in ("normalize", "skip_if_missing", "stop"):
+        if option in rule and not isinstance(rule[option], bool):
+            problems.append(f"{option}: must be true or false")
+    for option in ("airline", "prefix"):
+        if option in rule and not isinstance(rule[option], str):
+            problems.append(f"{option}: must be a string")
+
+    unknown = set(rule) - RULE_KEYS - set(required) - set(optional)
+    if unknown:
+        problems.append(f"unknown options {sorted(unknown)} for {comparator}")
+    return problems
+
+
+class RulePlan:
+    """
+    A list of verification rules, compiled once into the functions that evaluate them.
+
+    The plan knows every field its rules read, so each field is read once per evaluation whatever the number
+    of rules using it, and all similarity comparisons share one SimilarityMatrix. Rules run in the order of the
+    config, and a rule marked stop ends the evaluation when it fires.
+    """
+
+    def __init__(self, rules, fields, error_types=None):
+        """
+        :param rules: list, rule configs with error_type, comparator, fields and the comparator options
+        :param fields: dict, field name -> Field the rules can use
+        :param error_types: set, error types the rules can report, any error type if None
+        :raises ValueError: if a rule is invalid
+        """
+        problems = []
+        for index, rule in enumerate(rules if isinstance(rules, list) else []):
+            name = rule.get("error_type", index) if isinstance(rule, dict) else index
+            problems.extend(
+                f"{name}.{problem}"
+                for problem in validate_rule(rule, fields, error_types)
+            )
+        if not isinstance(rules, list):
+            problems.append("the rules must be a list")
+        if problems:
+            raise ValueError("Invalid verification rules: " + "; ".join(problems))
+
+        self.rules = [
+            CompiledRule(
+                error_type=rule["error_type"],
+                evaluate=COMPARATORS[rule["comparator"]][3](rule),
+                stop=rule.get("stop", False),
+            )
+            for rule in rules
+        ]
+        used_fields = list(
+            dict.fromkeys(field for rule in rules for field in rule["fields"])
+        )
+        self._fields = [(name, fields[name]) for name in used_fields]
+        compared_fields = dict.fromkeys(
+            field
+            for rule in rules
+            if rule["comparator"] == "similarity"
+            for field in rule["fields"]
+        )
+        self._compared_fields = [(name, fields[name]) for name in compared_fields]
+
+        self._lock = threading.Lock()
+        self._timings = {rule.error_type: [0, 0.0] for rule in self.rules}
+
+    def evaluate(self, documents, similarity=None):
+        """
+        :param documents: dict, the documents the fields are read from
+        :param similarity: SimilarityMatrix, with the compared fields under their similarity_key, built from the
+                           documents if None
+        :return: dict, error_type -> score of every rule that fired
+        """
+        values = {name: field.read(documents) for name, field in self._fields}
+
+        keys = {
+            name: field.similarity_key(documents)
+            for name, field in self._compared_fields
+        }
+        if similarity is None and keys:
+            similarity = SimilarityMatrix(
+                {keys[name]: values[name] for name, _ in self._compared_fields}
+            )
+
+        def similarity_score(first_field, second_field):
+            return similarity.score(keys[first_field], keys[second_field])
+
+        errors = {}
+        if not TIME_RULES:
+            for rule in self.rules:
+                fired, score = rule.evaluate(values, similarity_score)
+                if fired:
+                    errors[rule.error_type] = score
+                    if rule.stop:
+                        break
+            return errors
+
+        elapsed = []
+        for rule in self.rules:
+            start = time.perf_counter()
+            fired, score = rule.evaluate(values, similarity_score)
+            elapsed.append((rule.error_type, time.perf_counter() - start))
+            if fired:
+                errors[rule.error_type] = score
+                if rule.stop:
+                    break
+        with self._lock:
+            for error_type, seconds in elapsed:
+                timing = self._timings[error_type]
+                timing[0] += 1
+                timing[1] += seconds
+        return errors
+
+    def timings(self):
+        """
+        :return: dict, error_type -> (number of evaluations, total seconds) of each rule
+        """
+        with self._lock:
+            return {
+                error_type: (calls, seconds)
+                for error_type, (calls, seconds) in self._timings.items()
+            }
+
+
+def load_rule_plans(config_path, fields, error_types=None):
+    """
+    :param config_path: str, path of the rules JSON file, an object of rule lists
+    :param fields: dict, field name -> Field the rules can use
+    :param error_types: set, error types the rules can report, any error type if None
+    :return: dict, rule list name -> RulePlan
+    :raises ValueError: if the file is not valid JSON or a rule is invalid
+    """
+    with open(config_path, "r") as config_file:
+        try:
+            config = json.load(config_file)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON in {config_path}: {e}")
+    if not isinstance(config, dict):
+        raise ValueError(f"The rules in {config_path} must be an object of rule lists.")
+    return {
+        name: RulePlan(rules, fields, error_types) for name, rules in config.items()
+    }
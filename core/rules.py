@@ -1,256 +1,212 @@
-from decimal import Decimal
+import os
 
-from fuzzywuzzy import fuzz
+from core.common.config_reloader import ReloadingConfig
+from core.rule_engine import Field, load_rule_plans
+from core.scoring import ERROR_SCORE_INDEXES, ERROR_SCORES_VERSION, ERROR_TYPE_WEIGHTS
+from core.similarity import SimilarityMatrix
 
-from core.utils import MAX_SCORE, MIN_SCORE, normalize_score
+# Names of the texts in the similarity matrix of a claim
+PERSONAL_DETAILS_NAME = "personal_details_name"
+PASSPORT_NAME = "passport_name"
+TICKET_NAME = "ticket_name"
+TICKET_AIRLINE_NAME = "ticket_airline_name"
+TICKET_BOOKING_REFERENCE = "ticket_booking_reference"
 
 
-def compare_personal_details_and_flight_ticket_name(
-    personal_details_name, flight_ticket_name
-):
+def tag_text(tag_index, field):
     """
-    Compare the personal details name with the flight ticket name to find discrepancies.
-
-    :param personal_details_name: str, name from personal details
-    :param flight_ticket_name: str, name from flight ticket
-    :return: tuple, (normalized_similarity_score, error_type) if the similarity score is below the threshold, (None, None) otherwise
+    :param tag_index: int, index of the baggage tag in the claim
+    :param field: str, field of the baggage tag data
+    :return: tuple, name of the field of the tag in the similarity matrix of a claim
     """
-    personal_details_name = personal_details_name.lower()
-    flight_ticket_name = flight_ticket_name.lower()
+    return "tag", tag_index, field
 
-    # Calculate the similarity score between the personal details name and the flight ticket name
-    similarity_score = fuzz.ratio(personal_details_name, flight_ticket_name)
-
-    # Normalize the similarity score
-    normalized_similarity_score = normalize_score(
-        similarity_score, MIN_SCORE, MAX_SCORE
-    )
 
-    threshold = Decimal("0.7")
+def get_ticket_name(flight_data):
+    """
+    :param flight_data: dict, extracted flight data including first_name and last_name
+    :return: str, full name of the passenger on the flight ticket
+    """
+    first_name = flight_data.get("first_name") or ""
+    last_name = flight_data.get("last_name") or ""
+    return f"{first_name} {last_name}"
 
-    # If the normalized similarity score is below the threshold, return the score and error_type
-    if normalized_similarity_score < threshold:
-        error_type = "flight_ticket_personal_details_name_mismatch"
-        return normalized_similarity_score, error_type
 
-    return None, None
+def read_ticket_name(documents):
+    flight_data = documents["flight_data"]
+    return get_ticket_name(flight_data) if flight_data else None
 
 
-def compare_passport_and_flight_ticket_name(passport_name, flight_ticket_name):
+def flight_field(name, similarity_key):
     """
-    Compare the passport name with the flight ticket name to find discrepancies.
-
-    :param passport_name: str, name from passport
-    :param flight_ticket_name: str, name from flight ticket
-    :return: tuple, (normalized_similarity_score, error_type) if the similarity score is below the threshold, (None, None) otherwise
+    :param name: str, field of the extracted flight data
+    :param similarity_key: str, name of the field in the similarity matrix of a claim
+    :return: Field, the field of the flight ticket
     """
-    passport_name = passport_name.lower()
-    flight_ticket_name = flight_ticket_name.lower()
-
-    # Calculate the similarity score between the passport name and the flight ticket name
-    similarity_score = fuzz.ratio(passport_name, flight_ticket_name)
-
-    # Normalize the similarity score
-    normalized_similarity_score = normalize_score(
-        similarity_score, MIN_SCORE, MAX_SCORE
+    return Field(
+        read=lambda documents: (documents["flight_data"] or {}).get(name),
+        similarity_key=lambda documents: similarity_key,
     )
 
-    threshold = Decimal("0.7")
-
-    # If the normalized similarity score is below the threshold, return the score and error_type
-    if normalized_similarity_score < threshold:
-        error_type = "flight_ticket_passport_name_mismatch"
-        return normalized_similarity_score, error_type
-
-    return None, None
-
-
-def check_extracted_flight_data(extracted_flight_data):
-    if extracted_flight_data is None:
-        return "incorrect_flight_ticket", Decimal("100")
-
-    if all(value is None for value in extracted_flight_data.values()):
-        return "incorrect_flight_ticket", Decimal("100")
-    return None, None
-
-
-def check_extracted_baggage_data(extracted_baggage_data):
-    if extracted_baggage_data is None:
-        error_type = "incorrect_baggage_tag"
-        return error_type
-    return None
-
-
-def check_airline_name(flight_data, baggage_data):
-    if not flight_data or not baggage_data:
-        return None, None
-
-    flight_airline = flight_data.get("airline_name", "").lower()
-    baggage_airline = baggage_data.get("airline_name", "").lower()
-
-    if flight_airline and baggage_airline:
-        airline_similarity_score = fuzz.ratio(flight_airline, baggage_airline)
-        print(f"Airline similarity score: {airline_similarity_score}")
-
-        # Set a threshold for the similarity score, e.g., 80
-        threshold = Decimal("80")
-        if Decimal(airline_similarity_score) < threshold:
-            error_type = "airline_name_mismatch"
-            return (
-                Decimal(airline_similarity_score),
-                error_type,
-            )  # Return the score and error_type if there's a mismatch
-
-    return (
-        None,
-        None,
-    )  # Return None for both score and error_type if there's no mismatch
-
-
-def check_booking_reference(flight_data, baggage_data):
-    if not flight_data or not baggage_data:
-        return None, None
-
-    flight_booking_reference = flight_data.get("booking_reference_number", "").lower()
-    baggage_booking_reference = baggage_data.get("booking_reference_number", "").lower()
-
-    if flight_booking_reference and baggage_booking_reference:
-        booking_reference_similarity_score = fuzz.ratio(
-            flight_booking_reference, baggage_booking_reference
-        )
-        print(
-            f"Booking reference similarity score: {booking_reference_similarity_score}"
-        )
-
-        # Set a threshold for the similarity score, e.g., 80
-        threshold = Decimal("80")
-        if Decimal(booking_reference_similarity_score) < threshold:
-            error_type = "booking_reference_mismatch"
-            return (
-                Decimal(booking_reference_similarity_score),
-                error_type,
-            )  # Return the score and error_type if there's a mismatch
-
-    return (
-        None,
-        None,
-    )  # Return None for both score and error_type if there's no mismatch
-
-
-def check_passenger_name(flight_data, baggage_data):
-    if not flight_data or not baggage_data:
-        return None, None
 
-    flight_ticket_first_name = flight_data.get("first_name", "").lower()
-    flight_ticket_last_name = flight_data.get("last_name", "").lower()
-    flight_ticket_name = f"{flight_ticket_first_name} {flight_ticket_last_name}"
-
-    baggage_passenger_name = baggage_data.get("passenger_name", "").lower()
-
-    if flight_ticket_name and baggage_passenger_name:
-        passenger_name_similarity_score = fuzz.ratio(
-            flight_ticket_name, baggage_passenger_name
-        )
-        print(f"Passenger name similarity score: {passenger_name_similarity_score}")
+def tag_field(name, compared=True):
+    """
+    :param name: str, field of the extracted baggage tag data
+    :param compared: bool, whether the field is compared with similarity scores
+    :return: Field, the field of the baggage tag, with a similarity key per tag
+    """
+    return Field(
+        read=lambda documents: (documents["baggage_data"] or {}).get(name),
+        similarity_key=(
+            (lambda documents: tag_text(documents["tag_index"], name))
+            if compared
+            else None
+        ),
+    )
 
-        # Set a threshold for the similarity score, e.g., 80
-        threshold = Decimal("80")
-        if Decimal(passenger_name_similarity_score) < threshold:
-            error_type = "passenger_name_mismatch"
-            return (
-                Decimal(passenger_name_similarity_score),
-                error_type,
-            )  # Return the score and error_type if there's a mismatch
 
-    return (
-        None,
-        None,
-    )  # Return None for both score and error_type if there's no mismatch
+# Fields the verification rules can compare, read from the documents of a claim
+CLAIM_FIELDS = {
+    "flight_data": Field(
+        read=lambda documents: documents["flight_data"], similarity_key=None
+    ),
+    "baggage_data": Field(
+        read=lambda documents: documents["baggage_data"], similarity_key=None
+    ),
+    "personal_details_name": Field(
+        read=lambda documents: documents["personal_details_name"],
+        similarity_key=lambda documents: PERSONAL_DETAILS_NAME,
+    ),
+    "passport_name": Field(
+        read=lambda documents: documents["passport_name"],
+        similarity_key=lambda documents: PASSPORT_NAME,
+    ),
+    "ticket_name": Field(
+        read=read_ticket_name, similarity_key=lambda documents: TICKET_NAME
+    ),
+    "ticket_airline_name": flight_field("airline_name", TICKET_AIRLINE_NAME),
+    "ticket_booking_reference": flight_field(
+        "booking_reference_number", TICKET_BOOKING_REFERENCE
+    ),
+    "tag_airline_name": tag_field("airline_name"),
+    "tag_booking_reference": tag_field("booking_reference_number"),
+    "tag_passenger_name": tag_field("passenger_name"),
+    "tag_barcode": tag_field("barcode", compared=False),
+}
+# Error types the rules can report: each needs a weight and a place in the stored score vectors
+CLAIM_ERROR_TYPES = set(ERROR_TYPE_WEIGHTS) & set(
+    ERROR_SCORE_INDEXES[ERROR_SCORES_VERSION]
+)
+VERIFICATION_RULES_PATH = os.path.join(
+    os.path.dirname(__file__), "configs", "verification_rules.json"
+)
+
+
+def load_verification_rules(config_path):
+    """
+    :param config_path: str, path of the verification rules JSON file
+    :return: dict, rule list name -> RulePlan
+    :raises ValueError: if the file is not valid JSON, or a rule is invalid or reports an error type that cannot
+                        be scored
+    """
+    return load_rule_plans(config_path, CLAIM_FIELDS, CLAIM_ERROR_TYPES)
 
 
-def check_emirates_barcode(baggage_data):
-    airline_name = baggage_data.get("airline_name", "").lower()
-    barcode = baggage_data.get("barcode", "")
+# Compiled once, and again whenever the rules file is edited
+VERIFICATION_RULES = ReloadingConfig(VERIFICATION_RULES_PATH, load_verification_rules)
 
-    if airline_name == "emirates" and barcode and barcode[0] != "0":
-        error_type = "invalid_emirates_barcode"
-        return error_type
-    return None
 
+def build_claim_similarity(
+    personal_details_name=None, passport_name=None, flight_data=None, baggage_data=None
+):
+    """
+    Compare every name, airline and booking reference of a claim with a single similarity matrix.
 
-def process_extracted_flight_data(personal_details_name, passport_name, flight_data):
+    :param personal_details_name: str, user-provided name from personal details
+    :param passport_name: str, name extracted from the passport
+    :param flight_data: dict, extracted flight data
+    :param baggage_data: list, extracted data of each baggage tag
+    :return: SimilarityMatrix
+    """
+    documents = {
+        "personal_details_name": personal_details_name,
+        "passport_name": passport_name,
+        "flight_data": flight_data,
+    }
+    texts = {}
+    for tag_index, tag_data in enumerate(baggage_data or [None]):
+        documents.update(baggage_data=tag_data, tag_index=tag_index)
+        for field in CLAIM_FIELDS.values():
+            if field.similarity_key is not None:
+                texts[field.similarity_key(documents)] = field.read(documents)
+    return SimilarityMatrix(texts)
+
+
+def process_extracted_flight_data(
+    personal_details_name, passport_name, flight_data, similarity=None
+):
     """
     Process the extracted flight data and compare it with the personal details and passport name.
 
     :param personal_details_name: str, user-provided name from personal details
     :param passport_name: str, name extracted from the passport
     :param flight_data: dict, extracted flight data including first_name and last_name
+    :param similarity: SimilarityMatrix, similarity matrix of the claim, built from the other arguments if None
     :return: dict, errors dictionary containing any discrepancies between the extracted flight data, personal details, and passport name
     """
-    # Check for incorrect or unreadable flight ticket documents
-    flight_error_key, flight_error_value = check_extracted_flight_data(flight_data)
+    documents = {
+        "personal_details_name": personal_details_name,
+        "passport_name": passport_name,
+        "flight_data": flight_data,
+    }
+    return VERIFICATION_RULES.get()["flight_ticket"].evaluate(documents, similarity)
 
-    # If an error is detected, return the error_type and a None score
-    if flight_error_key:
-        return {flight_error_key: flight_error_value}
-
-    errors = {}
 
-    # Extract flight ticket name
-    first_name = flight_data.get("first_name", "")
-    last_name = flight_data.get("last_name", "")
-    ticket_name = f"{first_name} {last_name}"
-
-    # Define a list of comparison functions with their corresponding arguments
-    comparison_functions = [
-        (compare_personal_details_and_flight_ticket_name, personal_details_name),
-        (compare_passport_and_flight_ticket_name, passport_name),
-    ]
-
-    for compare_func, name in comparison_functions:
-        score, error_type = compare_func(name, ticket_name)
-        if error_type:
-            errors[error_type] = score
+def aggregate_errors(errors_list):
+    """
+    Combine the errors dictionaries of several documents, keeping the worst score of each error type.
 
-    # Return the errors dictionary
+    :param errors_list: list, errors dictionaries
+    :return: dict, every error type found on any document with its lowest score, a None score outranks any other
+    """
+    errors = {}
+    for document_errors in errors_list:
+        for error_type, score in document_errors.items():
+            if error_type not in errors:
+                errors[error_type] = score
+            elif errors[error_type] is not None and (
+                score is None or score < errors[error_type]
+            ):
+                errors[error_type] = score
     return errors
 
 
-def process_extracted_baggage_data(flight_data, baggage_data):
+def process_extracted_baggage_data(flight_data, baggage_data, similarity=None):
     """
     Process the extracted baggage data and compare it with the flight data.
 
     :param flight_data: dict, extracted flight data
-    :param baggage_data: dict, extracted baggage data
+    :param baggage_data: dict, extracted baggage data, or a list of them when the claim covers several bags
+    :param similarity: SimilarityMatrix, similarity matrix of the claim, built from the other arguments if None
     :return: dict, errors dictionary containing any discrepancies between the extracted flight data and baggage data
     """
-    errors = {}
-
-    # Check for incorrect or unreadable baggage tag documents
-    baggage_error = check_extracted_baggage_data(baggage_data)
-
-    # If an error is detected, add the error_type and a None score to the errors dictionary
-    if baggage_error:
-        errors[baggage_error] = None
-
-    # Check for invalid Emirates barcode
-    emirates_barcode_error = check_emirates_barcode(baggage_data)
-
-    # If an error is detected, add the error_type and a None score to the errors dictionary
-    if emirates_barcode_error:
-        errors[emirates_barcode_error] = None
-
-    # Define a list of comparison functions
-    comparison_functions = [
-        check_airline_name,
-        check_booking_reference,
-        check_passenger_name,
-    ]
-
-    for compare_func in comparison_functions:
-        score, error_type = compare_func(flight_data, baggage_data)
-        if error_type:
-            errors[error_type] = score
-
-    # Return the errors dictionary
-    return errors
+    tags = baggage_data if isinstance(baggage_data, list) else [baggage_data]
+    if similarity is None:
+        # The ticket is compared with all tags at once
+        similarity = build_claim_similarity(flight_data=flight_data, baggage_data=tags)
+
+    rules = VERIFICATION_RULES.get()["baggage_tag"]
+    # Every tag is checked against the ticket, and the worst result of each check counts for the claim
+    return aggregate_errors(
+        [
+            rules.evaluate(
+                {
+                    "flight_data": flight_data,
+                    "baggage_data": tag_data,
+                    "tag_index": tag_index,
+                },
+                similarity,
+            )
+            for tag_index, tag_data in enumerate(tags)
+        ]
+    )
@@ -0,0 +1,365 @@
+from decimal import Decimal
+
+import numpy as np
+
+from core.utils import normalize_score
+
+SEVERITY_THRESHOLDS = {
+    "Low": Decimal("0.2"),
+    "Medium": Decimal("0.5"),
+    "High": Decimal("1.0"),
+}
+# Listed in the order the checks run, so the reasons of a claim keep that order
+ERROR_TYPE_WEIGHTS = {
+    "name_mismatch": Decimal("0.25"),
+    "expired_passport": Decimal("0.2"),
+    "dob_mismatch": Decimal("0.2"),
+    "gender_mismatch": Decimal("0.2"),
+    "not_authentic": Decimal("0.05"),
+    "unrecognized": Decimal("0.1"),
+    "incorrect_flight_ticket": Decimal("0.1"),
+    "flight_ticket_personal_details_name_mismatch": Decimal("0.1"),
+    "flight_ticket_passport_name_mismatch": Decimal("0.1"),
+    "flight_ticket_passenger_name_mismatch": Decimal("0.1"),
+    "incorrect_baggage_tag": Decimal("0.1"),
+    "invalid_emirates_barcode": Decimal("0.1"),
+    "airline_name_mismatch": Decimal("0.1"),
+    "booking_reference_mismatch": Decimal("0.1"),
+    "passenger_name_mismatch": Decimal("0.1"),
+}
+# Reasons given on a claim for each error type
+VERIFICATION_ERRORS = {
+    "name_mismatch": "The name on the passport does not match the provided name.",
+    "not_authentic": "The passport uploaded is not authentic.",
+    "unrecognized": "The passport uploaded is not recognized.",
+    "expired_passport": "The passport is expired.",
+    "dob_mismatch": "The date of birth on the passport does not match the provided date of birth.",
+    "gender_mismatch": "The gender on the passport does not match the provided gender.",
+    "personal_details_flight_ticket_name_mismatch": "Name mismatch between personal details and flight ticket.",
+    "passport_flight_ticket_name_mismatch": "Name mismatch between passport and flight ticket.",
+    "incorrect_flight_ticket": "The uploaded flight ticket document is incorrect or cannot be read properly.",
+    "incorrect_baggage_tag": "The uploaded baggage tag document is incorrect or cannot be read properly.",
+    "airline_name_mismatch": "The airline name on the baggage tag does not match the airline name on the flight ticket.",
+    "booking_reference_mismatch": "The booking reference number on the baggage tag does not match the booking reference number on the flight ticket.",
+    "passenger_name_mismatch": "The passenger name on the baggage tag does not match the passenger name on the flight ticket.",
+    "invalid_emirates_barcode": "The barcode on the Emirates baggage tag is invalid.",
+}
+# Given to claims whose verification job failed, as none of their documents were checked
+VERIFICATION_FAILED_SEVERITY = "High"
+VERIFICATION_FAILED_REASON = "The uploaded documents could not be verified."
+
+
+def calculate_weighted_sum_of_errors(scores):
+    """
+    Calculates the weighted sum of errors and normalized scores for a given dictionary of scores.
+
+    Args:
+        scores (dict): A dictionary containing error types as keys and their respective scores as values.
+
+    Returns:
+        tuple: A tuple containing the weighted sum of errors (Decimal) and a list of normalized scores.
+    """
+    # Define the minimum and maximum possible scores for normalization
+    min_score = Decimal("0")
+    max_score = Decimal("100")
+
+    # Normalize the scores
+    normalized_scores = [
+        normalize_score(score, min_score, max_score) if score is not None else None
+        for score in scores.values()
+    ]
+
+    # Calculate the weighted sum of errors
+    weighted_sum_of_errors = sum(
+        (Decimal("1") - score) * ERROR_TYPE_WEIGHTS[error_type]
+        if score is not None
+        else ERROR_TYPE_WEIGHTS[error_type]
+        for score, error_type in zip(normalized_scores, scores.keys())
+    )
+
+    return weighted_sum_of_errors, normalized_scores
+
+
+def merge_scores(passport_scores, flight_ticket_scores, baggage_tag_scores):
+    """
+    Combine the scores of the documents of a claim, like calculate_total_weighted_sum_of_errors.
+
+    Args:
+        passport_scores (dict): The passport error types and scores, or None.
+        flight_ticket_scores (dict): The flight ticket error types and scores, or None.
+        baggage_tag_scores (dict): The baggage tag error types and scores, or None.
+
+    Returns:
+        dict: Every error type of the claim with its score, None for errors without a score.
+    """
+    return {
+        **(passport_scores or {}),
+        **(flight_ticket_scores or {}),
+        **(baggage_tag_scores or {}),
+    }
+
+
+def calculate_total_weighted_sum_of_errors(
+    passport_scores, flight_ticket_scores, baggage_tag_scores
+):
+    """
+    Calculates the total weighted sum of errors and error types for given dictionaries of passport, flight ticket, and baggage tag scores.
+
+    Args:
+        passport_scores (dict): A dictionary containing passport error types as keys and their respective scores as values.
+        flight_ticket_scores (dict): A dictionary containing flight ticket error types as keys and their respective scores as values.
+        baggage_tag_scores (dict): A dictionary containing baggage tag error types as keys and their respective scores as values.
+
+    Returns:
+        tuple: A tuple containing the total weighted sum of errors (Decimal) and a list of error types where the normalized score is below 0.5.
+    """
+    # Combine the passport_scores, flight_ticket_scores, and baggage_tag_scores dictionaries
+    all_scores = merge_scores(passport_scores, flight_ticket_scores, baggage_tag_scores)
+
+    weighted_sum_of_errors, normalized_scores = calculate_weighted_sum_of_errors(
+        all_scores
+    )
+
+    # Get the error types where the normalized score is below 0.5
+    error_types = [
+        key
+        for key, score in zip(all_scores.keys(), normalized_scores)
+        if score is None or (score is not None and score < 0.5)
+    ]
+
+    return weighted_sum_of_errors, error_types
+
+
+def get_severity_and_status(weighted_sum_of_errors, error_types):
+    """
+    Determines the severity, status, and reasons for the given weighted sum of errors and error types.
+
+    Args:
+        weighted_sum_of_errors (Decimal): The total weighted sum of errors calculated from the scores.
+        error_types (list): A list of error types where the normalized score is below 0.5.
+
+    Returns:
+        tuple: A tuple containing the severity (str), status (str), and a list of reasons (str) for the errors.
+    """
+    # Find the first severity whose threshold is not exceeded, sums above every threshold are the most severe
+    for severity, threshold in SEVERITY_THRESHOLDS.items():
+        if weighted_sum_of_errors <= threshold:
+            break
+
+    # If the severity is "Low" and there are no errors in error_types
+    # (i.e., error_types is empty), set status to "Approved"
+    if severity == "Low" and not error_types:
+        status = "Approved"
+    else:
+        status = "To Be Reviewed"
+
+    # Provide reasons for the errors, in ERROR_TYPES order like the reasons of re-scored claims
+    reasons = [
+        VERIFICATION_ERRORS.get(error, "")
+        for error in sorted(error_types, key=error_type_order)
+    ]
+    return severity, status, reasons
+
+
+# Columns of the score matrices of score_batch
+ERROR_TYPES = list(ERROR_TYPE_WEIGHTS)
+ERROR_TYPE_COLUMNS = {
+    error_type: column for column, error_type in enumerate(ERROR_TYPES)
+}
+SEVERITIES = list(SEVERITY_THRESHOLDS)
+# Weighted sums are compared in floating point, this absorbs the rounding of sums that equal a threshold.
+# It is larger than the error of scores stored as float32, and smaller than the 1e-6 steps of scores with
+# two decimals times weights with two decimals
+THRESHOLD_TOLERANCE = 5e-7
+# Score matrix value of an error without a score, NaN is used for error types the claim does not have
+UNSCORED_ERROR = -1.0
+
+
+def error_type_order(error_type):
+    """
+    Returns the sort key that lists error types in ERROR_TYPES order, error types without a weight last.
+
+    Args:
+        error_type (str): The error type.
+
+    Returns:
+        int: The column of the error type in the score matrices.
+    """
+    return ERROR_TYPE_COLUMNS.get(error_type, len(ERROR_TYPES))
+
+
+def error_type_weight_vector():
+    """
+    Returns the weights of the error types as the weight vector of score_batch.
+
+    Returns:
+        ndarray: The float weight of each error type, in ERROR_TYPES order.
+    """
+    return np.array(
+        [float(ERROR_TYPE_WEIGHTS[error_type]) for error_type in ERROR_TYPES],
+        dtype=np.float64,
+    )
+
+
+def score_batch(score_matrix, weights):
+    """
+    Calculates the weighted sums of errors of many claims at once, like calculate_weighted_sum_of_errors does
+    for one claim.
+
+    Args:
+        score_matrix (ndarray): The scores of the claims, one row per claim and one column per error type in
+            ERROR_TYPES order. NaN where the claim does not have the error type and UNSCORED_ERROR for errors
+            without a score, which count with their full weight.
+        weights (ndarray): The weight of each column, see error_type_weight_vector.
+
+    Returns:
+        tuple: A tuple containing the weighted sums of errors (ndarray of float) and a mask of the error types
+            whose normalized score is below 0.5 or that have no score (bool ndarray shaped like score_matrix).
+    """
+    scores = np.asarray(score_matrix, dtype=np.float64)
+    unscored = scores == UNSCORED_ERROR
+    normalized_scores = scores / 100
+    penalties = np.where(unscored, 1.0, 1.0 - normalized_scores)
+    # Error types the claim does not have add nothing
+    penalties[np.isnan(scores)] = 0.0
+    # NaN compares as False, so only the error types of the claim can be below the threshold
+    below_threshold = unscored | (normalized_scores < 0.5)
+    return penalties @ weights, below_threshold
+
+
+def grade_batch(weighted_sums, below_threshold):
+    """
+    Determines the severity and status of many claims at once, like get_severity_and_status.
+
+    Args:
+        weighted_sums (ndarray): The weighted sums of errors of the claims, see score_batch.
+        below_threshold (ndarray): The mask of the error types given as reasons, see score_batch.
+
+    Returns:
+        tuple: A tuple containing the severities (list of str) and the statuses (list of str) of the claims.
+    """
+    thresholds = np.array([float(SEVERITY_THRESHOLDS[s]) for s in SEVERITIES])
+    severity_indexes = np.minimum(
+        np.searchsorted(thresholds + THRESHOLD_TOLERANCE, weighted_sums, side="left"),
+        len(SEVERITIES) - 1,
+    )
+    approved = (severity_indexes == 0) & ~below_threshold.any(axis=1)
+
+    severities = [SEVERITIES[index] for index in severity_indexes.tolist()]
+    statuses = ["Approved" if ok else "To Be Reviewed" for ok in approved.tolist()]
+    return severities, statuses
+
+
+def batch_reasons(below_threshold):
+    """
+    Returns the reasons of many claims from the mask of score_batch.
+
+    Args:
+        below_threshold (ndarray): The mask of the error types given as reasons, see score_batch.
+
+    Returns:
+        list: The reasons of each claim, in ERROR_TYPES order and joined with "; ".
+    """
+    reasons = [VERIFICATION_ERRORS.get(error_type, "") for error_type in ERROR_TYPES]
+    return [
+        "; ".join(reasons[column] for column in np.flatnonzero(row))
+        for row in below_threshold
+    ]
+
+
+# Error type order of each version of the stored score vectors. A version is never changed once claims are
+# stored with it: a new error type gets a new version. Migration 0023 keeps its own copy of version 1.
+ERROR_SCORE_INDEXES = {
+    1: (
+        "name_mismatch",
+        "expired_passport",
+        "dob_mismatch",
+        "gender_mismatch",
+        "not_authentic",
+        "unrecognized",
+        "incorrect_flight_ticket",
+        "flight_ticket_personal_details_name_mismatch",
+        "flight_ticket_passport_name_mismatch",
+        "flight_ticket_passenger_name_mismatch",
+        "incorrect_baggage_tag",
+        "invalid_emirates_barcode",
+        "airline_name_mismatch",
+        "booking_reference_mismatch",
+        "passenger_name_mismatch",
+    ),
+}
+ERROR_SCORES_VERSION = 1
+# Little-endian float32, one value per error type of the version
+ERROR_SCORE_DTYPE = np.dtype("<f4")
+
+
+def encode_error_scores(scores, version=ERROR_SCORES_VERSION):
+    """
+    Pack the scores of a claim into the compact form stored on Claim.error_scores.
+
+    Args:
+        scores (dict): The error types of the claim and their scores, None for errors without a score.
+        version (int): The version of ERROR_SCORE_INDEXES to encode with.
+
+    Returns:
+        bytes: One float32 per error type of the version.
+
+    Raises:
+        ValueError: If an error type is not part of the version.
+    """
+    error_types = ERROR_SCORE_INDEXES[version]
+    vector = np.full(len(error_types), np.nan, dtype=ERROR_SCORE_DTYPE)
+    for error_type, score in scores.items():
+        if error_type not in error_types:
+            raise ValueError(
+                f"The error type {error_type} is not in version {version} of the score vectors."
+            )
+        vector[error_types.index(error_type)] = (
+            UNSCORED_ERROR if score is None else float(score)
+        )
+    return vector.tobytes()
+
+
+def load_score_matrix(claims):
+    """
+    Load the stored score vectors of many claims into one array, without decoding them one by one.
+
+    Vectors of every version are converted to the current ERROR_TYPES order. Error types that no longer have
+    a weight are left out.
+
+    Args:
+        claims (QuerySet): The claims to load, claims without stored scores are skipped.
+
+    Returns:
+        tuple: A tuple containing the claim ids (ndarray of int64) and their scores (float32 ndarray with one
+            row per claim and one column per error type of ERROR_TYPES, NaN where the claim does not have the
+            error type and UNSCORED_ERROR for errors without a score).
+    """
+    rows = claims.filter(error_scores__isnull=False).values_list(
+        "id", "error_scores_version", "error_scores"
+    )
+    vectors_by_version = {}
+    for claim_id, version, data in rows.iterator():
+        vectors_by_version.setdefault(version, ([], []))
+        vectors_by_version[version][0].append(claim_id)
+        vectors_by_version[version][1].append(data)
+
+    claim_ids = []
+    matrices = []
+    for version, (version_claim_ids, vectors) in vectors_by_version.items():
+        error_types = ERROR_SCORE_INDEXES[version]
+        stored = np.frombuffer(b"".join(vectors), dtype=ERROR_SCORE_DTYPE).reshape(
+            len(vectors), len(error_types)
+        )
+        matrix = np.full((len(vectors), len(ERROR_TYPES)), np.nan, dtype=np.float32)
+        for stored_column, error_type in enumerate(error_types):
+            if error_type in ERROR_TYPE_COLUMNS:
+                matrix[:, ERROR_TYPE_COLUMNS[error_type]] = stored[:, stored_column]
+        claim_ids.extend(version_claim_ids)
+        matrices.append(matrix)
+
+    if not matrices:
+        return np.empty(0, dtype=np.int64), np.empty(
+            (0, len(ERROR_TYPES)), dtype=np.float32
+        )
+    return np.array(claim_ids, dtype=np.int64), np.concatenate(matrices)
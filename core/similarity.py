@@ -0,0 +1,59 @@
+import numpy as np
+from rapidfuzz import fuzz, process
+
+
+def normalize_text(text):
+    """
+    :param text: str, text to compare, or None
+    :return: str, the text as it is compared
+    """
+    return (text or "").lower()
+
+
+def similarity_score(first_text, second_text):
+    """
+    Compare two texts, see SimilarityMatrix.
+
+    :param first_text: str, first text, or None
+    :param second_text: str, second text, or None
+    :return: int, similarity score between 0 and 100
+    """
+    return SimilarityMatrix({"first": first_text, "second": second_text}).score(
+        "first", "second"
+    )
+
+
+class SimilarityMatrix:
+    """
+    The similarity scores of every pair of a set of named texts, computed at once.
+
+    Each text is normalized once and identical texts are compared once, with a single rapidfuzz cdist call.
+    Scores are the Levenshtein ratio rounded to an integer, the same values fuzzywuzzy's fuzz.ratio returned,
+    so they can be turned into a Decimal and compared with the existing thresholds.
+    """
+
+    def __init__(self, texts):
+        """
+        :param texts: dict, name -> text to compare, None is compared as an empty text
+        """
+        self.texts = {name: normalize_text(text) for name, text in texts.items()}
+        unique_texts = list(dict.fromkeys(self.texts.values()))
+        self._index = {text: index for index, text in enumerate(unique_texts)}
+        scores = process.cdist(
+            unique_texts, unique_texts, scorer=fuzz.ratio, dtype=np.float64
+        )
+        # Rounded half to even like Python's round, which fuzz.ratio used
+        self.scores = np.rint(scores).astype(np.int32)
+
+    def score(self, first_name, second_name):
+        """
+        :param first_name: name of the first text
+        :param second_name: name of the second text
+        :return: int, similarity score between 0 and 100
+        """
+        return int(
+            self.scores[
+                self._index[self.texts[first_name]],
+                self._index[self.texts[second_name]],
+            ]
+        )
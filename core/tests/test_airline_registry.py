@@ -0,0 +1,148 @@
+import json
+import os
+import tempfile
+
+from django.test import TestCase
+
+from core.baggage_tag_extractor.airline_registry import (
+    AirlineRegistry,
+    load_airline_registry,
+)
+from core.baggage_tag_extractor.baggage_tag import AIRLINE_CONFIGS_PATH, extract_details
+from core.common.config_reloader import ReloadingConfig
+
+
+def airline_config(name_regex, **overrides):
+    return {
+        "airline_name_regex": name_regex,
+        "flight_number_regex": r"([A-Z]{2}\s?\d{3,4})",
+        "booking_ref_regex": r"\b([A-Z0-9]{6})\b",
+        "passenger_name_regex": r"([A-Z]+\/[A-Z]+)",
+        **overrides,
+    }
+
+
+class AirlineRegistryTestCase(TestCase):
+    def setUp(self):
+        self.registry = load_airline_registry(AIRLINE_CONFIGS_PATH)
+
+    def test_shipped_configs_are_valid(self):
+        self.assertEqual(len(self.registry), 2)
+        self.assertIn("emirates", self.registry)
+
+    def test_detects_the_airline(self):
+        self.assertEqual(self.registry.detect("EMIRATES EK 202 DXB").key, "emirates")
+        self.assertEqual(self.registry.detect("flynas XY 321 RUH").key, "flynas")
+        self.assertIsNone(self.registry.detect("LUFTHANSA LH 400"))
+
+    def test_extracts_the_fields(self):
+        text = "Emirates EK 202 ABC123 DOE/JOHNMR"
+
+        self.assertEqual(
+            extract_details(text, self.registry.get("emirates")),
+            ("Emirates", "EK 202", "ABC123", "JOHNMR DOE"),
+        )
+
+    def test_config_order_breaks_ties(self):
+        registry = AirlineRegistry(
+            {"first": airline_config("alpha"), "second": airline_config("beta")}
+        )
+
+        # The second airline appears first in the text, the config order still wins
+        self.assertEqual(registry.detect("beta alpha").key, "first")
+
+    def test_priority_overrides_the_config_order(self):
+        registry = AirlineRegistry(
+            {
+                "first": airline_config("alpha"),
+                "second": airline_config("beta", priority=1),
+            }
+        )
+
+        self.assertEqual(registry.detect("alpha beta").key, "second")
+
+    def test_many_airlines(self):
+        registry = AirlineRegistry(
+            {
+                f"airline{index}": airline_config(f"(carrier{index:03d})")
+                for index in range(150)
+            }
+        )
+
+        self.assertEqual(registry.detect("CARRIER137 XY 123").key, "airline137")
+
+    def test_overlapping_matches(self):
+        registry = AirlineRegistry(
+            {"first": airline_config("nas air"), "second": airline_config("flynas")}
+        )
+
+        # The match of the second airline overlaps the match of the first one
+        self.assertEqual(registry.detect("FLYNAS AIR XY 123").key, "first")
+
+    def test_word_boundaries_are_kept(self):
+        registry = AirlineRegistry({"air_one": airline_config(r"\bAir\s?One")})
+
+        self.assertEqual(registry.detect("AIRONE XY 123").key, "air_one")
+        self.assertIsNone(registry.detect("HAIR ONE"))
+
+    def test_invalid_configs_are_rejected(self):
+        invalid_configs = [
+            {},
+            {"broken": airline_config("(unclosed")},
+            {"broken": airline_config("a", priority="high")},
+            {"broken": {"airline_name_regex": "a"}},
+        ]
+        for configs in invalid_configs:
+            with self.subTest(configs=configs):
+                with self.assertRaises(ValueError):
+                    AirlineRegistry(configs)
+
+
+class ReloadingConfigTestCase(TestCase):
+    def setUp(self):
+        file_descriptor, self.path = tempfile.mkstemp(suffix=".json")
+        os.close(file_descriptor)
+        self.addCleanup(os.remove, self.path)
+        self.write({"first": airline_config("alpha")})
+
+    def write(self, configs, mtime=None):
+        with open(self.path, "w") as config_file:
+            json.dump(configs, config_file)
+        if mtime is not None:
+            os.utime(self.path, (mtime, mtime))
+
+    def test_changes_are_reloaded(self):
+        config = ReloadingConfig(self.path, load_airline_registry, check_interval=0)
+        self.assertIsNone(config.get().detect("beta"))
+
+        self.write(
+            {"first": airline_config("alpha"), "second": airline_config("beta")},
+            mtime=os.stat(self.path).st_mtime + 10,
+        )
+
+        self.assertEqual(config.get().detect("beta").key, "second")
+        self.assertEqual(config.reloads, 1)
+
+    def test_unchanged_file_is_not_rebuilt(self):
+        config = ReloadingConfig(self.path, load_airline_registry, check_interval=0)
+        registry = config.get()
+
+        self.assertIs(config.get(), registry)
+        self.assertEqual(config.reloads, 0)
+
+    def test_broken_edit_keeps_the_previous_config(self):
+        config = ReloadingConfig(self.path, load_airline_registry, check_interval=0)
+
+        self.write(
+            {"first": airline_config("(unclosed")},
+            mtime=os.stat(self.path).st_mtime + 10,
+        )
+
+        self.assertEqual(config.get().detect("alpha").key, "first")
+        self.assertEqual(config.reloads, 0)
+
+    def test_broken_config_fails_at_startup(self):
+        self.write({"first": airline_config("(unclosed")})
+
+        with self.assertRaises(ValueError):
+            ReloadingConfig(self.path, load_airline_registry)
@@ -0,0 +1,103 @@
+import os
+import tempfile
+from datetime import timedelta
+from unittest.mock import MagicMock, patch
+
+from django.test import TestCase
+from django.utils import timezone
+
+from core.models import ApiCredit
+from core.passport_verification import (
+    analyze_passport,
+    release_api_call,
+    reserve_api_call,
+)
+
+
+class ReserveApiCallTestCase(TestCase):
+    def test_credits_are_consumed_until_exhausted(self):
+        ApiCredit.objects.create(name="id_analyzer", remaining_calls=2)
+
+        self.assertTrue(reserve_api_call())
+        self.assertTrue(reserve_api_call())
+        self.assertFalse(reserve_api_call())
+        self.assertEqual(ApiCredit.objects.get().remaining_calls, 0)
+
+    def test_daily_quota_is_enforced(self):
+        ApiCredit.objects.create(name="id_analyzer", remaining_calls=10, daily_quota=1)
+
+        self.assertTrue(reserve_api_call())
+        self.assertFalse(reserve_api_call())
+        self.assertEqual(ApiCredit.objects.get().remaining_calls, 9)
+
+    def test_daily_quota_resets_on_a_new_day(self):
+        ApiCredit.objects.create(
+            name="id_analyzer",
+            remaining_calls=10,
+            daily_quota=1,
+            calls_today=1,
+            quota_date=timezone.localdate() - timedelta(days=1),
+        )
+
+        self.assertTrue(reserve_api_call())
+        credit = ApiCredit.objects.get()
+        self.assertEqual(credit.calls_today, 1)
+        self.assertEqual(credit.quota_date, timezone.localdate())
+
+    def test_calls_are_not_limited_without_a_credit(self):
+        with patch("core.passport_verification.ID_ANALYZER_CREDITS", None):
+            self.assertTrue(reserve_api_call())
+
+        self.assertFalse(ApiCredit.objects.exists())
+
+    def test_credit_is_seeded_from_the_setting(self):
+        with patch("core.passport_verification.ID_ANALYZER_CREDITS", "2"):
+            self.assertTrue(reserve_api_call())
+
+        self.assertEqual(ApiCredit.objects.get().remaining_calls, 1)
+
+    def test_released_credit_is_returned(self):
+        ApiCredit.objects.create(name="id_analyzer", remaining_calls=1)
+
+        self.assertTrue(reserve_api_call())
+        release_api_call()
+
+        credit = ApiCredit.objects.get()
+        self.assertEqual(credit.remaining_calls, 1)
+        self.assertEqual(credit.calls_today, 0)
+
+
+@patch("core.passport_verification.USE_PASSPORT_CACHE", False)
+class AnalyzePassportCreditTestCase(TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.passport_path = os.path.join(self.temp_dir.name, "passport.jpg")
+        with open(self.passport_path, "wb") as file:
+            file.write(b"passport image")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_api_is_not_called_without_credits(self):
+        ApiCredit.objects.create(name="id_analyzer", remaining_calls=0)
+
+        with patch(
+            "core.passport_verification.get_id_analyzer_client"
+        ) as mock_get_client:
+            scores, extracted_data = analyze_passport(self.passport_path, {})
+
+        self.assertEqual((scores, extracted_data), ({"unrecognized": None}, {}))
+        mock_get_client.assert_not_called()
+
+    def test_failed_request_releases_credit(self):
+        ApiCredit.objects.create(name="id_analyzer", remaining_calls=1)
+        coreapi = MagicMock()
+        coreapi.scan.side_effect = ConnectionError("ID Analyzer unreachable")
+
+        with patch(
+            "core.passport_verification.get_id_analyzer_client", return_value=coreapi
+        ):
+            analyze_passport(self.passport_path, {})
+
+        coreapi.scan.assert_called_once()
+        self.assertEqual(ApiCredit.objects.get().remaining_calls, 1)
@@ -0,0 +1,149 @@
+from decimal import Decimal
+from unittest.mock import patch
+
+import cv2
+import numpy as np
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+from django.utils.datastructures import MultiValueDict
+
+from core.baggage_tag_extractor.baggage_tag import process_baggage_tag_images
+from core.forms import MAX_BAGGAGE_TAGS, RequiredDocumentsForm
+from core.rules import aggregate_errors, process_extracted_baggage_data
+
+BAGGAGE_TAG = "core.baggage_tag_extractor.baggage_tag"
+
+
+def make_upload(name):
+    _, buffer = cv2.imencode(".png", np.full((20, 20), 255, np.uint8))
+    return SimpleUploadedFile(name, buffer.tobytes(), content_type="image/png")
+
+
+class BaggageTagsFieldTestCase(TestCase):
+    def make_form(self, baggage_tags):
+        files = MultiValueDict(
+            {
+                "passport": [make_upload("passport.png")],
+                "flight_ticket": [make_upload("ticket.png")],
+                "baggage_tags": baggage_tags,
+            }
+        )
+        return RequiredDocumentsForm(data={}, files=files)
+
+    def test_several_tags_are_accepted(self):
+        form = self.make_form([make_upload("bag1.png"), make_upload("bag2.png")])
+
+        self.assertTrue(form.is_valid(), form.errors)
+        self.assertEqual(
+            [file.name for file in form.cleaned_data["baggage_tags"]],
+            ["bag1.png", "bag2.png"],
+        )
+
+    def test_tags_are_optional(self):
+        form = self.make_form([])
+
+        self.assertTrue(form.is_valid(), form.errors)
+        self.assertEqual(form.cleaned_data["baggage_tags"], [])
+
+    def test_too_many_tags_are_rejected(self):
+        form = self.make_form(
+            [make_upload(f"bag{index}.png") for index in range(MAX_BAGGAGE_TAGS + 1)]
+        )
+
+        self.assertFalse(form.is_valid())
+        self.assertIn("baggage_tags", form.errors)
+
+    def test_files_that_are_not_images_are_rejected(self):
+        form = self.make_form([SimpleUploadedFile("bag.png", b"not an image")])
+
+        self.assertFalse(form.is_valid())
+        self.assertIn("baggage_tags", form.errors)
+
+
+class ProcessBaggageTagImagesTestCase(TestCase):
+    def test_tags_share_one_client_and_keep_their_order(self):
+        def fake_process(image, textract_client, ocr_backend):
+            return {"barcode": image.data.decode()}
+
+        with patch(f"{BAGGAGE_TAG}.setup_textract_client") as mock_setup, patch(
+            f"{BAGGAGE_TAG}.get_ocr_backend"
+        ), patch(
+            f"{BAGGAGE_TAG}.process_baggage_tag", side_effect=fake_process
+        ) as mock_process:
+            results = process_baggage_tag_images([b"0176000001", b"0176000002"])
+
+        self.assertEqual(
+            results, [{"barcode": "0176000001"}, {"barcode": "0176000002"}]
+        )
+        mock_setup.assert_called_once()
+        clients = {call.args[1] for call in mock_process.call_args_list}
+        self.assertEqual(clients, {mock_setup.return_value})
+
+    def test_undecodable_tag_does_not_fail_the_others(self):
+        def fake_process(image, textract_client, ocr_backend):
+            return {"shape": image.bgr.shape}
+
+        _, png = cv2.imencode(".png", np.full((20, 20), 255, np.uint8))
+        with patch(f"{BAGGAGE_TAG}.setup_textract_client"), patch(
+            f"{BAGGAGE_TAG}.get_ocr_backend"
+        ), patch(f"{BAGGAGE_TAG}.process_baggage_tag", side_effect=fake_process):
+            results = process_baggage_tag_images(
+                [b"GIF89a\x01\x00\x01\x00", png.tobytes()]
+            )
+
+        self.assertEqual(results, [None, {"shape": (20, 20, 3)}])
+
+    def test_no_tags(self):
+        with patch(f"{BAGGAGE_TAG}.setup_textract_client") as mock_setup:
+            self.assertEqual(process_baggage_tag_images([]), [])
+
+        mock_setup.assert_not_called()
+
+
+class AggregateBaggageErrorsTestCase(TestCase):
+    flight_data = {
+        "airline_name": "Emirates",
+        "booking_reference_number": "ABC123",
+        "first_name": "John",
+        "last_name": "Doe",
+    }
+
+    def tag(self, passenger_name="John Doe", barcode="0176000001"):
+        return {
+            "airline_name": "Emirates",
+            "booking_reference_number": "ABC123",
+            "passenger_name": passenger_name,
+            "barcode": barcode,
+        }
+
+    def test_worst_score_of_each_error_is_kept(self):
+        self.assertEqual(
+            aggregate_errors(
+                [
+                    {"passenger_name_mismatch": Decimal("70")},
+                    {"passenger_name_mismatch": Decimal("40")},
+                    {"airline_name_mismatch": None},
+                    {"airline_name_mismatch": Decimal("50")},
+                ]
+            ),
+            {
+                "passenger_name_mismatch": Decimal("40"),
+                "airline_name_mismatch": None,
+            },
+        )
+
+    def test_every_tag_is_checked(self):
+        errors = process_extracted_baggage_data(
+            self.flight_data,
+            [self.tag(), self.tag(barcode="9176000002"), None],
+        )
+
+        self.assertEqual(
+            errors, {"invalid_emirates_barcode": None, "incorrect_baggage_tag": None}
+        )
+
+    def test_single_tag_is_unchanged(self):
+        self.assertEqual(
+            process_extracted_baggage_data(self.flight_data, [self.tag()]),
+            process_extracted_baggage_data(self.flight_data, self.tag()),
+        )
@@ -0,0 +1,115 @@
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import cv2
+import numpy as np
+from django.test import TestCase
+
+from core.baggage_tag_extractor.barcode import (
+    DECODE_SIDES,
+    FALLBACK_ROTATIONS,
+    crop_region,
+    decode_barcode,
+    find_barcode_regions,
+    rotate_image,
+)
+
+BARCODE = "core.baggage_tag_extractor.barcode"
+
+
+def make_bars(bar_count=60, module=12, height=500):
+    widths = np.random.default_rng(0).integers(1, 4, bar_count) * module
+    row = np.concatenate(
+        [
+            np.full(width, 0 if index % 2 == 0 else 255, np.uint8)
+            for index, width in enumerate(widths)
+        ]
+    )
+    return np.tile(row, (height, 1))
+
+
+def make_tag_photo(angle, origin=(1000, 700)):
+    photo = np.full((3000, 4000), 230, np.uint8)
+    cv2.putText(photo, "EMIRATES EK 202", (200, 400), cv2.FONT_HERSHEY_SIMPLEX, 4, 0, 8)
+    cv2.putText(photo, "SMITH/JOHN MR", (200, 2800), cv2.FONT_HERSHEY_SIMPLEX, 4, 0, 8)
+
+    bars = rotate_image(np.pad(make_bars(), 60, constant_values=255), angle)
+    x, y = origin
+    height, width = bars.shape
+    photo[y : y + height, x : x + width] = np.minimum(
+        photo[y : y + height, x : x + width], bars
+    )
+    center = (x + width / 2, y + height / 2)
+    return photo, center
+
+
+def symbol(data):
+    return SimpleNamespace(data=data)
+
+
+class FindBarcodeRegionsTestCase(TestCase):
+    def test_finds_barcodes_at_any_angle(self):
+        for angle in (0, 25, 90, -40):
+            with self.subTest(angle=angle):
+                photo, (center_x, center_y) = make_tag_photo(angle)
+
+                regions = find_barcode_regions(photo)
+
+                (region_x, region_y), _, _ = regions[0]
+                self.assertLess(abs(region_x - center_x), 100)
+                self.assertLess(abs(region_y - center_y), 100)
+
+    def test_crop_is_upright(self):
+        photo, _ = make_tag_photo(25)
+
+        crop = crop_region(photo, find_barcode_regions(photo)[0]).astype(float)
+
+        # The bars run straight along one axis of the crop, so the pixels barely change along it
+        along_rows = crop.std(axis=0).mean()
+        along_columns = crop.std(axis=1).mean()
+        self.assertLess(
+            min(along_rows, along_columns), max(along_rows, along_columns) / 2
+        )
+
+
+class DecodeBarcodeTestCase(TestCase):
+    def test_stops_at_the_first_decode(self):
+        photo, _ = make_tag_photo(25)
+
+        with patch(
+            f"{BARCODE}.decode", return_value=[symbol(b"0176123456")]
+        ) as mock_decode:
+            result = decode_barcode(photo)
+
+        self.assertEqual(result, "0176123456")
+        mock_decode.assert_called_once()
+        # The first attempt is the localized region at the smallest size, not the 12MP photo
+        attempt = mock_decode.call_args[0][0]
+        self.assertLessEqual(max(attempt.shape), DECODE_SIDES[0])
+
+    def test_falls_back_to_rotations_of_the_whole_image(self):
+        photo = np.full((600, 800), 255, np.uint8)
+        attempts = []
+
+        def fake_decode(image, **kwargs):
+            attempts.append(image.shape)
+            return []
+
+        with patch(f"{BARCODE}.decode", side_effect=fake_decode):
+            result = decode_barcode(photo)
+
+        self.assertIsNone(result)
+        # A blank photo has no regions, and fits the second size, so larger sizes are skipped
+        self.assertEqual(len(attempts), 2 * len(FALLBACK_ROTATIONS))
+
+    def test_skips_empty_and_binary_data(self):
+        photo = np.full((300, 400), 255, np.uint8)
+        mock_decode = MagicMock(
+            side_effect=[[symbol(b" "), symbol(b"\xff\xfe")], [symbol(b"0176123456")]]
+        )
+
+        with patch(f"{BARCODE}.decode", mock_decode):
+            result = decode_barcode(photo)
+
+        self.assertEqual(result, "0176123456")
+        self.assertEqual(mock_decode.call_count, 2)
@@ -1,6 +1,6 @@
 from decimal import Decimal
 from django.test import TestCase
-from core.views import calculate_total_weighted_sum_of_errors, ERROR_TYPE_WEIGHTS
+from core.scoring import calculate_total_weighted_sum_of_errors, ERROR_TYPE_WEIGHTS
 
 
 class CalculateTotalWeightedSumOfErrorsTestCase(TestCase):
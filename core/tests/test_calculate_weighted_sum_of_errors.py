@@ -1,6 +1,6 @@
 from decimal import Decimal
 from django.test import TestCase
-from core.views import calculate_weighted_sum_of_errors
+from core.scoring import calculate_weighted_sum_of_errors
 
 
 class CalculateWeightedSumOfErrorsTestCase(TestCase):
@@ -0,0 +1,116 @@
+import io
+from unittest.mock import MagicMock, patch
+
+import cv2
+import numpy as np
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+from PIL import Image
+
+from core.common.document_image import DocumentImage
+from core.common.extractor_utils import extract_text
+
+
+def make_png(width=40, height=20):
+    image = np.full((height, width, 3), 255, np.uint8)
+    image[5:10, 5:30] = 0
+    return cv2.imencode(".png", image)[1].tobytes()
+
+
+class DocumentImageTestCase(TestCase):
+    def setUp(self):
+        self.data = make_png()
+        self.document = DocumentImage(self.data)
+
+    def test_image_is_decoded_once(self):
+        with patch(
+            "core.common.document_image.cv2.imdecode", wraps=cv2.imdecode
+        ) as mock_imdecode:
+            self.assertEqual(self.document.shape, (20, 40, 3))
+            self.assertEqual(self.document.gray.shape, (20, 40))
+            self.document.bgr
+
+        mock_imdecode.assert_called_once()
+
+    def test_whole_page_is_never_larger_than_the_upload(self):
+        self.assertLessEqual(len(self.document.encoded), len(self.data))
+
+        with patch("core.common.payload_optimizer.USE_PAYLOAD_OPTIMIZER", False):
+            self.assertIs(DocumentImage(self.data).encoded, self.data)
+
+    def test_regions_are_encoded_once(self):
+        first = self.document.encode_region([5, 5, 25, 5])
+        second = self.document.encode_region((5, 5, 25, 5))
+
+        self.assertIs(first, second)
+        region = cv2.imdecode(np.frombuffer(first, np.uint8), cv2.IMREAD_COLOR)
+        self.assertEqual(region.shape, (5, 25, 3))
+        self.assertEqual(region.max(), 0)
+
+    def test_pil_view(self):
+        self.assertEqual(self.document.pil.size, (40, 20))
+
+    def test_undecodable_data(self):
+        with self.assertRaises(ValueError):
+            DocumentImage(b"not an image").bgr
+
+    def test_from_source(self):
+        upload = SimpleUploadedFile("baggage_tag.png", self.data)
+        sources = [self.data, memoryview(self.data), io.BytesIO(self.data), upload]
+
+        for source in sources:
+            document = DocumentImage.from_source(source)
+            self.assertEqual(document.data, self.data)
+            self.assertEqual(document.shape, (20, 40, 3))
+        self.assertEqual(DocumentImage.from_source(upload).name, "baggage_tag.png")
+        self.assertIs(DocumentImage.from_source(self.document), self.document)
+
+    def test_pdf_is_detected(self):
+        self.assertTrue(DocumentImage(b"%PDF-1.4 ...").is_pdf)
+        self.assertFalse(self.document.is_pdf)
+
+    def test_extract_text_sends_encoded_region(self):
+        backend = MagicMock()
+        backend.detect_text.return_value = {
+            "Blocks": [{"BlockType": "LINE", "Text": "ABC123", "Confidence": 99.0}]
+        }
+
+        text = extract_text(
+            image=self.document, region_coordinates=[5, 5, 25, 5], ocr_backend=backend
+        )
+
+        self.assertEqual(text, "ABC123")
+        backend.detect_text.assert_called_once_with(
+            self.document.encode_region([5, 5, 25, 5])
+        )
+
+
+def make_pdf(width=144, height=72):
+    image = Image.new("RGB", (width, height), "white")
+    image.paste((0, 0, 0), (0, 0, 72, 36))
+    buffer = io.BytesIO()
+    # One pixel per point, so the page is 2 by 1 inches
+    image.save(buffer, "PDF", resolution=72)
+    return buffer.getvalue()
+
+
+class PdfDocumentImageTestCase(TestCase):
+    def setUp(self):
+        self.document = DocumentImage(make_pdf())
+
+    def test_first_page_is_rendered_in_grayscale(self):
+        self.assertEqual(self.document.shape, (200, 400))
+        self.assertIs(self.document.gray, self.document.pixels)
+        self.assertEqual(self.document.gray[10, 10], 0)
+        self.assertEqual(self.document.gray[190, 390], 255)
+        self.assertEqual(self.document.bgr.shape, (200, 400, 3))
+
+    def test_layout_resolution(self):
+        document = self.document.with_pdf_dpi(100)
+
+        self.assertEqual(document.shape, (100, 200))
+        self.assertIs(document.data, self.document.data)
+        self.assertIs(self.document.with_pdf_dpi(200), self.document)
+
+    def test_pdf_is_encoded_as_png(self):
+        self.assertTrue(self.document.encoded.startswith(b"\x89PNG"))
@@ -0,0 +1,88 @@
+from unittest.mock import patch
+
+from django.test import TestCase
+
+from core.common.extractor_utils import (
+    extract_words_with_geometry,
+    reset_textract_clients,
+    select_text_in_region,
+    setup_textract_client,
+)
+
+
+def make_word(text, left, top, width=0.1, height=0.02):
+    return {
+        "BlockType": "WORD",
+        "Text": text,
+        "Confidence": 99.0,
+        "Geometry": {
+            "BoundingBox": {
+                "Left": left,
+                "Top": top,
+                "Width": width,
+                "Height": height,
+            }
+        },
+    }
+
+
+class SelectTextInRegionTestCase(TestCase):
+    def setUp(self):
+        response = {
+            "Blocks": [
+                {"BlockType": "LINE", "Text": "SMITH/JOHNMR ABC123"},
+                make_word("SMITH/JOHNMR", 0.40, 0.44),
+                make_word("ABC123", 0.40, 0.49),
+                make_word("Emirates", 0.05, 0.10),
+            ]
+        }
+        self.words = extract_words_with_geometry(response)
+        # A 400x500 pixel page
+        self.image_shape = (500, 400, 3)
+
+    def test_extract_words_skips_lines(self):
+        self.assertEqual(
+            [word["Text"] for word in self.words],
+            ["SMITH/JOHNMR", "ABC123", "Emirates"],
+        )
+
+    def test_words_inside_region_are_selected(self):
+        text = select_text_in_region(self.words, [150, 215, 100, 20], self.image_shape)
+        self.assertEqual(text, "SMITH/JOHNMR")
+
+    def test_region_spanning_several_words(self):
+        text = select_text_in_region(self.words, [150, 210, 100, 60], self.image_shape)
+        self.assertEqual(text, "SMITH/JOHNMR ABC123")
+
+    def test_empty_region(self):
+        text = select_text_in_region(self.words, [300, 400, 50, 50], self.image_shape)
+        self.assertEqual(text, "")
+
+
+class SetupTextractClientTestCase(TestCase):
+    def setUp(self):
+        reset_textract_clients()
+
+    def tearDown(self):
+        reset_textract_clients()
+
+    def test_client_is_shared(self):
+        first = setup_textract_client("access", "secret")
+        second = setup_textract_client("access", "secret")
+
+        self.assertIs(first, second)
+        self.assertEqual(first.meta.config.retries["mode"], "adaptive")
+
+    def test_credentials_get_their_own_client(self):
+        first = setup_textract_client("access", "secret")
+        second = setup_textract_client("other-access", "other-secret")
+
+        self.assertIsNot(first, second)
+
+    def test_client_is_rebuilt_after_fork(self):
+        first = setup_textract_client("access", "secret")
+
+        with patch("core.common.extractor_utils.os.getpid", return_value=-1):
+            second = setup_textract_client("access", "secret")
+
+        self.assertIsNot(first, second)
@@ -0,0 +1,218 @@
+import io
+from unittest.mock import patch
+
+from django.test import TestCase
+from PIL import Image
+
+from core.common.document_image import DocumentImage, render_pdf_page
+from core.flight_ticket_extractor.flight_ticket_info_extractor import (
+    extract_ticket_info,
+)
+
+EXTRACTOR = "core.flight_ticket_extractor.flight_ticket_info_extractor"
+
+
+def make_text_pdf(spans, width=144, height=204):
+    """
+    Build a one page PDF with a text layer.
+
+    :param spans: list, (x, y, font_size, text) tuples in PDF points, from the bottom left corner
+    """
+    return make_multipage_pdf([spans], width, height)
+
+
+def make_multipage_pdf(pages, width=144, height=204):
+    """
+    Build a PDF with a text layer on every page.
+
+    :param pages: list, spans of each page, see make_text_pdf
+    """
+    page_count = len(pages)
+    # The catalog, the page tree and the font come first, then a page and its content per page
+    kids = " ".join(f"{4 + 2 * index} 0 R" for index in range(page_count))
+    objects = [
+        b"<</Type/Catalog/Pages 2 0 R>>",
+        f"<</Type/Pages/Kids[{kids}]/Count {page_count}>>".encode(),
+        b"<</Type/Font/Subtype/Type1/BaseFont/Helvetica>>",
+    ]
+    for index, spans in enumerate(pages):
+        content = "\n".join(
+            f"BT /F1 {size} Tf {x} {y} Td ({text}) Tj ET" for x, y, size, text in spans
+        ).encode()
+        objects.append(
+            f"<</Type/Page/Parent 2 0 R/MediaBox[0 0 {width} {height}]"
+            f"/Resources<</Font<</F1 3 0 R>>>>/Contents {5 + 2 * index} 0 R>>".encode()
+        )
+        objects.append(b"<</Length %d>>stream\n%s\nendstream" % (len(content), content))
+    pdf = b"%PDF-1.4\n"
+    for number, body in enumerate(objects, start=1):
+        pdf += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    return pdf + b"trailer<</Root 1 0 R>>\n%%EOF"
+
+
+class TextLayerTestCase(TestCase):
+    def test_words_are_positioned_on_the_page(self):
+        document = DocumentImage(make_text_pdf([(72, 102, 10, "ABC123 Emirates")]))
+        text, words = document.text_layer
+
+        self.assertEqual(text, "ABC123 Emirates")
+        self.assertEqual([word["Text"] for word in words], ["ABC123", "Emirates"])
+        box = words[0]["BoundingBox"]
+        self.assertAlmostEqual(box["Left"], 0.5, places=1)
+        self.assertAlmostEqual(box["Top"] + box["Height"], 0.5, places=1)
+
+    def test_scanned_pdf_has_no_text_layer(self):
+        buffer = io.BytesIO()
+        Image.new("RGB", (144, 204), "white").save(buffer, "PDF", resolution=72)
+
+        self.assertEqual(DocumentImage(buffer.getvalue()).text_layer, ("", []))
+
+    def test_shape_matches_the_rendered_page(self):
+        document = DocumentImage(make_text_pdf([]))
+        shape = document.shape
+
+        self.assertNotIn("pixels", document.__dict__)
+        self.assertEqual(shape, document.pixels.shape)
+
+
+class ExtractTicketInfoTextLayerTestCase(TestCase):
+    def test_digital_ticket_is_read_without_ocr(self):
+        pdf = make_text_pdf(
+            [
+                (8, 178, 6, "Emirates"),
+                (60, 118, 7, "SMITH/JOHNMR"),
+                (60, 108, 8, "ABC123"),
+            ]
+        )
+
+        with patch(f"{EXTRACTOR}.detect_document_text") as mock_detect, patch(
+            f"{EXTRACTOR}.extract_text"
+        ) as mock_extract_text, patch(
+            "core.common.document_image.render_pdf_page"
+        ) as mock_render:
+            extracted_data = extract_ticket_info(pdf)
+
+        mock_detect.assert_not_called()
+        mock_extract_text.assert_not_called()
+        mock_render.assert_not_called()
+        self.assertEqual(extracted_data["airline_name"], "Emirates")
+        self.assertEqual(extracted_data["booking_reference_number"], "ABC123")
+        self.assertEqual(extracted_data["first_name"], "JOHN")
+        self.assertEqual(extracted_data["last_name"], "SMITH")
+        self.assertIsNone(extracted_data["departure_date"])
+
+    def test_scanned_ticket_falls_back_to_ocr(self):
+        buffer = io.BytesIO()
+        Image.new("RGB", (144, 204), "white").save(buffer, "PDF", resolution=72)
+
+        with patch(
+            f"{EXTRACTOR}.detect_page_text", return_value=("", [])
+        ) as mock_detect_page_text:
+            self.assertIsNone(extract_ticket_info(buffer.getvalue()))
+
+        mock_detect_page_text.assert_called_once()
+
+
+TICKET_SPANS = [
+    (8, 178, 6, "Emirates"),
+    (60, 118, 7, "SMITH/JOHNMR"),
+    (60, 108, 8, "ABC123"),
+]
+ITINERARY_SPANS = [(8, 178, 6, "Itinerary")]
+
+
+class MultiPageTicketTestCase(TestCase):
+    def test_pages_are_separate_documents(self):
+        document = DocumentImage(make_multipage_pdf([ITINERARY_SPANS, TICKET_SPANS]))
+        pages = list(document.iter_pages())
+
+        self.assertEqual(document.page_count, 2)
+        self.assertEqual([page.page_index for page in pages], [0, 1])
+        self.assertEqual(pages[0].text_layer[0], "Itinerary")
+        self.assertIn("ABC123", pages[1].text_layer[0])
+        self.assertEqual(len(list(document.iter_pages(max_pages=1))), 1)
+
+    def test_pages_are_rendered_one_at_a_time(self):
+        document = DocumentImage(make_multipage_pdf([ITINERARY_SPANS] * 3))
+
+        with patch(
+            "core.common.document_image.render_pdf_page", wraps=render_pdf_page
+        ) as mock_render:
+            pages = document.iter_pages()
+            first = next(pages)
+            first.gray
+            mock_render.assert_called_once()
+            next(pages)
+            # The next page is not rendered before it is used
+            mock_render.assert_called_once()
+
+        self.assertEqual(mock_render.call_args.kwargs["page_index"], 0)
+
+    def test_ticket_after_the_itinerary_is_found(self):
+        pdf = make_multipage_pdf([ITINERARY_SPANS, TICKET_SPANS])
+
+        with patch(f"{EXTRACTOR}.detect_page_text", return_value=("", [])):
+            extracted_data = extract_ticket_info(pdf)
+
+        self.assertEqual(extracted_data["booking_reference_number"], "ABC123")
+        self.assertEqual(extracted_data["last_name"], "SMITH")
+
+    def test_pages_after_the_ticket_are_not_read(self):
+        pdf = make_multipage_pdf([TICKET_SPANS, ITINERARY_SPANS, ITINERARY_SPANS])
+
+        with patch(
+            f"{EXTRACTOR}.extract_page_info",
+            return_value={
+                "airline_name": "Emirates",
+                "booking_reference_number": "ABC123",
+                "first_name": "JOHN",
+                "last_name": "SMITH",
+            },
+        ) as mock_extract_page_info:
+            extract_ticket_info(pdf)
+
+        mock_extract_page_info.assert_called_once()
+
+    def test_fields_of_different_pages_are_not_combined(self):
+        pdf = make_multipage_pdf([ITINERARY_SPANS] * 3)
+        connecting_flight = {
+            "airline_name": "Flynas",
+            "booking_reference_number": "XYZ789",
+            "first_name": "JANE",
+            "last_name": "ROE",
+        }
+        page_data = [
+            {"airline_name": "Emirates", "booking_reference_number": None},
+            None,
+            connecting_flight,
+        ]
+
+        with patch(f"{EXTRACTOR}.extract_page_info", side_effect=page_data):
+            extracted_data = extract_ticket_info(pdf)
+
+        self.assertEqual(extracted_data, connecting_flight)
+
+    def test_first_ticket_is_kept_without_a_complete_page(self):
+        pdf = make_multipage_pdf([ITINERARY_SPANS] * 2)
+        page_data = [
+            {"airline_name": "Emirates", "booking_reference_number": None},
+            {"airline_name": "Flynas", "booking_reference_number": "ABC123"},
+        ]
+
+        with patch(f"{EXTRACTOR}.extract_page_info", side_effect=page_data):
+            extracted_data = extract_ticket_info(pdf)
+
+        self.assertEqual(
+            extracted_data,
+            {"airline_name": "Emirates", "booking_reference_number": None},
+        )
+
+    def test_page_limit(self):
+        pdf = make_multipage_pdf([ITINERARY_SPANS] * 3)
+
+        with patch(f"{EXTRACTOR}.MAX_TICKET_PAGES", 2), patch(
+            f"{EXTRACTOR}.extract_page_info", return_value=None
+        ) as mock_extract_page_info:
+            self.assertIsNone(extract_ticket_info(pdf))
+
+        self.assertEqual(mock_extract_page_info.call_count, 2)
@@ -0,0 +1,122 @@
+from unittest.mock import MagicMock, patch
+
+import cv2
+import numpy as np
+from django.test import TestCase
+
+from core.common.extractor_utils import extract_text
+from core.common.ocr_backends import (
+    HybridBackend,
+    TesseractBackend,
+    TextractBackend,
+    get_ocr_backend,
+)
+
+
+def make_response(text, confidence):
+    return {"Blocks": [{"BlockType": "LINE", "Text": text, "Confidence": confidence}]}
+
+
+def make_png(width=200, height=100):
+    is_success, buffer = cv2.imencode(".png", np.full((height, width), 255, np.uint8))
+    return buffer.tobytes()
+
+
+class HybridBackendTestCase(TestCase):
+    def setUp(self):
+        self.primary = MagicMock()
+        self.primary.name = "tesseract"
+        self.fallback = MagicMock()
+        self.fallback.name = "textract"
+        self.fallback.detect_text.return_value = make_response("Emirates", 99.0)
+
+    def test_confident_local_result_skips_fallback(self):
+        self.primary.detect_text.return_value = make_response("Emirates", 95.0)
+        backend = HybridBackend(self.primary, self.fallback, min_confidence=80)
+
+        response = backend.detect_text(b"image")
+
+        self.assertEqual(response["Blocks"][0]["Confidence"], 95.0)
+        self.fallback.detect_text.assert_not_called()
+
+    def test_low_confidence_uses_fallback(self):
+        self.primary.detect_text.return_value = make_response("Em1rat3s", 40.0)
+        backend = HybridBackend(self.primary, self.fallback, min_confidence=80)
+
+        response = backend.detect_text(b"image")
+
+        self.assertEqual(response["Blocks"][0]["Text"], "Emirates")
+        self.fallback.detect_text.assert_called_once_with(b"image")
+
+    def test_local_failure_uses_fallback(self):
+        self.primary.detect_text.side_effect = RuntimeError(
+            "tesseract is not installed"
+        )
+        backend = HybridBackend(self.primary, self.fallback, min_confidence=80)
+
+        response = backend.detect_text(b"image")
+
+        self.assertEqual(response["Blocks"][0]["Text"], "Emirates")
+
+
+class TesseractBackendTestCase(TestCase):
+    def test_response_has_textract_shape(self):
+        data = {
+            "text": ["", "SMITH/JOHNMR", "ABC123"],
+            "conf": [-1, 91.0, 87.0],
+            "left": [0, 20, 120],
+            "top": [0, 10, 10],
+            "width": [200, 80, 60],
+            "height": [100, 20, 20],
+            "block_num": [0, 1, 1],
+            "par_num": [0, 1, 1],
+            "line_num": [0, 1, 1],
+        }
+
+        with patch(
+            "core.common.ocr_backends.pytesseract.image_to_data", return_value=data
+        ):
+            response = TesseractBackend().detect_text(make_png())
+
+        lines = [block for block in response["Blocks"] if block["BlockType"] == "LINE"]
+        words = [block for block in response["Blocks"] if block["BlockType"] == "WORD"]
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(lines[0]["Text"], "SMITH/JOHNMR ABC123")
+        self.assertEqual(lines[0]["Confidence"], 89.0)
+        self.assertEqual(len(words), 2)
+        self.assertAlmostEqual(words[0]["Geometry"]["BoundingBox"]["Left"], 0.1)
+        self.assertAlmostEqual(words[0]["Geometry"]["BoundingBox"]["Width"], 0.4)
+
+
+class GetOCRBackendTestCase(TestCase):
+    def test_backend_selection(self):
+        self.assertIsInstance(
+            get_ocr_backend(MagicMock(), backend_name="textract"), TextractBackend
+        )
+        self.assertIsInstance(
+            get_ocr_backend(MagicMock(), backend_name="tesseract"), TesseractBackend
+        )
+        self.assertIsInstance(
+            get_ocr_backend(MagicMock(), backend_name="hybrid"), HybridBackend
+        )
+
+    def test_disabled_aws(self):
+        self.assertIsNone(
+            get_ocr_backend(MagicMock(), use_aws=False, backend_name="textract")
+        )
+        self.assertIsInstance(
+            get_ocr_backend(MagicMock(), use_aws=False, backend_name="hybrid"),
+            TesseractBackend,
+        )
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            get_ocr_backend(backend_name="unknown")
+
+    def test_extract_text_uses_backend(self):
+        backend = MagicMock()
+        backend.detect_text.return_value = make_response("Flynas", 90.0)
+
+        text = extract_text(image=np.zeros((10, 10), np.uint8), ocr_backend=backend)
+
+        self.assertEqual(text, "Flynas")
@@ -0,0 +1,80 @@
+import os
+import tempfile
+import time
+from unittest.mock import MagicMock, patch
+
+from django.test import TestCase
+
+from core.common.result_cache import ResultCache
+from core.models import ApiCredit
+from core.passport_verification import analyze_passport
+
+SCAN_RESPONSE = {
+    "result": {
+        "fullName": "John Smith",
+        "expiry": "2099/01/01",
+        "dob": "1990/05/17",
+        "sex": "M",
+    },
+    "authentication": {"score": 0.9},
+}
+
+
+class PassportCacheTestCase(TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.passport_path = os.path.join(self.temp_dir.name, "passport.jpg")
+        with open(self.passport_path, "wb") as file:
+            file.write(b"passport image")
+
+        ApiCredit.objects.create(name="id_analyzer", remaining_calls=10)
+        self.coreapi = MagicMock()
+        self.coreapi.scan.return_value = SCAN_RESPONSE
+
+        self.cache = ResultCache(ttl=60)
+        patchers = [
+            patch("core.passport_verification.PASSPORT_CACHE", self.cache),
+            patch(
+                "core.passport_verification.get_id_analyzer_client",
+                return_value=self.coreapi,
+            ),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_resubmitted_passport_is_scanned_once(self):
+        user_data = {"name": "John Smith", "dob": "1990-05-17", "gender": "M"}
+
+        first = analyze_passport(self.passport_path, user_data)
+        second = analyze_passport(self.passport_path, user_data)
+
+        self.assertEqual(first, second)
+        self.coreapi.scan.assert_called_once()
+        self.assertEqual(ApiCredit.objects.get().remaining_calls, 9)
+
+    def test_rules_are_rerun_for_new_user_data(self):
+        analyze_passport(
+            self.passport_path,
+            {"name": "John Smith", "dob": "1990-05-17", "gender": "M"},
+        )
+        scores, extracted_data = analyze_passport(
+            self.passport_path,
+            {"name": "John Smith", "dob": "1991-05-17", "gender": "F"},
+        )
+
+        self.coreapi.scan.assert_called_once()
+        self.assertEqual(scores["dob_mismatch"], 0)
+        self.assertEqual(scores["gender_mismatch"], 0)
+        self.assertEqual(extracted_data["name"], "John Smith")
+
+    def test_expired_entries_are_scanned_again(self):
+        analyze_passport(self.passport_path, {})
+        self.cache.ttl = 1
+        with patch("core.common.result_cache.time.time", return_value=time.time() + 5):
+            analyze_passport(self.passport_path, {})
+
+        self.assertEqual(self.coreapi.scan.call_count, 2)
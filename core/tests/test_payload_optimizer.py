@@ -0,0 +1,97 @@
+from io import BytesIO
+
+import cv2
+import numpy as np
+from django.test import TestCase
+from PIL import Image
+
+from core.common.payload_optimizer import (
+    OCR_PAYLOAD,
+    PASSPORT_PAYLOAD,
+    PayloadStats,
+    fit_pixel_budget,
+    optimize_image,
+    optimize_image_bytes,
+)
+
+
+def make_photo(width=400, height=300, exif=False):
+    rng = np.random.default_rng(0)
+    pixels = rng.integers(0, 255, (height, width, 3), dtype=np.uint8)
+    image = Image.fromarray(pixels)
+    buffer = BytesIO()
+    if exif:
+        metadata = Image.Exif()
+        metadata[0x010F] = "Phone maker"
+        image.save(buffer, "JPEG", quality=100, exif=metadata.tobytes())
+    else:
+        image.save(buffer, "JPEG", quality=100)
+    return buffer.getvalue()
+
+
+class FitPixelBudgetTestCase(TestCase):
+    def test_large_images_are_downscaled(self):
+        image = np.zeros((2000, 3000), np.uint8)
+        resized = fit_pixel_budget(image, 1500000)
+
+        self.assertLessEqual(resized.shape[0] * resized.shape[1], 1500000)
+        self.assertAlmostEqual(resized.shape[1] / resized.shape[0], 1.5, places=2)
+
+    def test_small_images_are_kept(self):
+        image = np.zeros((20, 30), np.uint8)
+        self.assertIs(fit_pixel_budget(image, 1000), image)
+
+
+class OptimizeImageTestCase(TestCase):
+    def test_ocr_payload_is_grayscale_and_within_budget(self):
+        data = make_photo()
+        profile = OCR_PAYLOAD._replace(max_pixels=30000)
+
+        payload = optimize_image_bytes(data, profile)
+        image = cv2.imdecode(np.frombuffer(payload, np.uint8), cv2.IMREAD_UNCHANGED)
+
+        self.assertEqual(image.ndim, 2)
+        self.assertLessEqual(image.shape[0] * image.shape[1], 30000)
+        self.assertLess(len(payload), len(data))
+
+    def test_passport_payload_keeps_colour(self):
+        payload = optimize_image_bytes(make_photo(), PASSPORT_PAYLOAD)
+        image = cv2.imdecode(np.frombuffer(payload, np.uint8), cv2.IMREAD_UNCHANGED)
+
+        self.assertEqual(image.ndim, 3)
+
+    def test_exif_is_stripped(self):
+        data = make_photo(width=16, height=16, exif=True)
+        self.assertIn(b"Exif", data)
+
+        payload = optimize_image_bytes(data, PASSPORT_PAYLOAD)
+
+        self.assertNotIn(b"Exif", payload)
+
+    def test_small_upload_is_sent_as_it_is(self):
+        image = np.full((8, 8), 255, np.uint8)
+        original = cv2.imencode(".png", image)[1].tobytes()
+
+        self.assertIs(optimize_image(image, OCR_PAYLOAD, original=original), original)
+
+    def test_undecodable_data_is_returned(self):
+        self.assertEqual(optimize_image_bytes(b"not an image"), b"not an image")
+
+
+class PayloadStatsTestCase(TestCase):
+    def test_bytes_saved_per_profile(self):
+        stats = PayloadStats()
+        stats.record("ocr", 1000, 400)
+        stats.record("ocr", 500, 500)
+        stats.record("passport", 2000, 1500)
+
+        self.assertEqual(
+            stats.stats()["ocr"],
+            {
+                "calls": 2,
+                "original_bytes": 1500,
+                "payload_bytes": 900,
+                "bytes_saved": 600,
+            },
+        )
+        self.assertEqual(stats.stats()["passport"]["bytes_saved"], 500)
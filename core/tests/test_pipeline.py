@@ -0,0 +1,89 @@
+import threading
+import time
+
+from django.test import TestCase
+
+from core.pipeline import Stage, run_stages, validate_stages
+
+
+class RunStagesTestCase(TestCase):
+    def test_dependencies_receive_results(self):
+        results = run_stages(
+            [
+                Stage("a", lambda: 1),
+                Stage("b", lambda: 2),
+                Stage("total", lambda a, b: a + b, ("a", "b")),
+            ]
+        )
+
+        self.assertEqual(results, {"a": 1, "b": 2, "total": 3})
+
+    def test_independent_stages_run_concurrently(self):
+        barrier = threading.Barrier(3, timeout=5)
+
+        def wait_for_others():
+            barrier.wait()
+            return True
+
+        start = time.perf_counter()
+        results = run_stages(
+            [
+                Stage("flight", wait_for_others),
+                Stage("baggage", wait_for_others),
+                Stage("passport", wait_for_others),
+            ]
+        )
+
+        # A sequential run would deadlock on the barrier and raise BrokenBarrierError
+        self.assertTrue(all(results.values()))
+        self.assertLess(time.perf_counter() - start, 5)
+
+    def test_dependent_stage_waits_for_dependencies(self):
+        order = []
+
+        def slow():
+            time.sleep(0.05)
+            order.append("slow")
+            return "slow"
+
+        def dependent(slow):
+            order.append("dependent")
+            return slow.upper()
+
+        results = run_stages(
+            [Stage("dependent", dependent, ("slow",)), Stage("slow", slow)]
+        )
+
+        self.assertEqual(order, ["slow", "dependent"])
+        self.assertEqual(results["dependent"], "SLOW")
+
+    def test_stage_exception_is_raised(self):
+        def fail():
+            raise RuntimeError("Textract unavailable")
+
+        with self.assertRaises(RuntimeError):
+            run_stages(
+                [Stage("fail", fail), Stage("after", lambda fail: fail, ("fail",))]
+            )
+
+    def test_empty_stages(self):
+        self.assertEqual(run_stages([]), {})
+
+
+class ValidateStagesTestCase(TestCase):
+    def test_unknown_dependency(self):
+        with self.assertRaises(ValueError):
+            validate_stages([Stage("a", lambda missing: None, ("missing",))])
+
+    def test_cycle(self):
+        with self.assertRaises(ValueError):
+            validate_stages(
+                [
+                    Stage("a", lambda b: None, ("b",)),
+                    Stage("b", lambda a: None, ("a",)),
+                ]
+            )
+
+    def test_duplicate_names(self):
+        with self.assertRaises(ValueError):
+            validate_stages([Stage("a", lambda: None), Stage("a", lambda: None)])
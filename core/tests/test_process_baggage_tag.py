@@ -1,51 +1,52 @@
 from unittest.mock import patch
 
 from django.core.files.uploadedfile import SimpleUploadedFile
-from django.test import RequestFactory, TestCase
+from django.test import TestCase
 
-from core.views import process_baggage_tag
+from core.verification import extract_baggage_tags, score_baggage_tag
 
 
 class ProcessBaggageTagTestCase(TestCase):
-    def setUp(self):
-        self.factory = RequestFactory()
-
     def test_process_baggage_tag_valid(self):
         baggage_tag = SimpleUploadedFile("baggage_tag.jpg", b"baggage_tag_data")
 
-        request = self.factory.post("/")
-        request.session = {"flight_data": {"dummy": "flight_data"}}
+        flight_data = {"dummy": "flight_data"}
 
-        with patch("core.views.default_storage") as mock_storage, \
-             patch("core.views.process_baggage_tag_image") as mock_process_baggage_tag_image, \
-             patch("core.views.os.remove") as mock_os_remove, \
-             patch("core.views.process_extracted_baggage_data") as mock_process_extracted_baggage_data:
+        with patch("core.verification.default_storage") as mock_storage, \
+             patch("core.verification.process_baggage_tag_images") as mock_process_baggage_tag_images, \
+             patch("os.remove") as mock_os_remove, \
+             patch("core.verification.process_extracted_baggage_data") as mock_process_extracted_baggage_data:
 
             mock_storage.save.return_value = "temp/baggage_tag.jpg"
             mock_storage.path.return_value = "/path/to/temp/baggage_tag.jpg"
-            mock_process_baggage_tag_image.return_value = {"dummy": "baggage_data"}
+            mock_process_baggage_tag_images.return_value = [{"dummy": "baggage_data"}]
             mock_process_extracted_baggage_data.return_value = {"dummy": "baggage_scores"}
 
-            extracted_baggage_data, baggage_tag_scores = process_baggage_tag(baggage_tag, request)
+            extracted_baggage_data = extract_baggage_tags([baggage_tag])
+            baggage_tag_scores = score_baggage_tag(flight_data, extracted_baggage_data)
 
-            self.assertEqual(extracted_baggage_data, {"dummy": "baggage_data"})
+            self.assertEqual(extracted_baggage_data, [{"dummy": "baggage_data"}])
             self.assertEqual(baggage_tag_scores, {"dummy": "baggage_scores"})
+            # The upload is read from memory instead of a temporary file
+            mock_process_baggage_tag_images.assert_called_once_with([baggage_tag])
+            mock_storage.save.assert_not_called()
+            mock_os_remove.assert_not_called()
 
     def test_process_baggage_tag_no_flight_data(self):
         baggage_tag = SimpleUploadedFile("baggage_tag.jpg", b"baggage_tag_data")
 
-        request = self.factory.post("/")
-        request.session = {}
+        flight_data = None
 
-        with patch("core.views.default_storage") as mock_storage, \
-             patch("core.views.process_baggage_tag_image") as mock_process_baggage_tag_image, \
-             patch("core.views.os.remove") as mock_os_remove:
+        with patch("core.verification.default_storage") as mock_storage, \
+             patch("core.verification.process_baggage_tag_images") as mock_process_baggage_tag_images, \
+             patch("os.remove") as mock_os_remove:
 
             mock_storage.save.return_value = "temp/baggage_tag.jpg"
             mock_storage.path.return_value = "/path/to/temp/baggage_tag.jpg"
-            mock_process_baggage_tag_image.return_value = {"dummy": "baggage_data"}
+            mock_process_baggage_tag_images.return_value = [{"dummy": "baggage_data"}]
 
-            extracted_baggage_data, baggage_tag_scores = process_baggage_tag(baggage_tag, request)
+            extracted_baggage_data = extract_baggage_tags([baggage_tag])
+            baggage_tag_scores = score_baggage_tag(flight_data, extracted_baggage_data)
 
-            self.assertEqual(extracted_baggage_data, {"dummy": "baggage_data"})
+            self.assertEqual(extracted_baggage_data, [{"dummy": "baggage_data"}])
             self.assertIsNone(baggage_tag_scores)
@@ -2,16 +2,13 @@ from decimal import Decimal
 from io import BytesIO
 
 from django.core.files.uploadedfile import SimpleUploadedFile
-from django.test import RequestFactory, TestCase
+from django.test import TestCase
 from PIL import Image
 
-from core.views import process_flight_ticket
+from core.verification import extract_flight_ticket, score_flight_ticket
 
 
 class ProcessFlightTicketTestCase(TestCase):
-    def setUp(self):
-        self.factory = RequestFactory()
-
     def create_test_image(self):
         image = Image.new("RGB", (100, 100))
         img_io = BytesIO()
@@ -23,18 +20,16 @@ class ProcessFlightTicketTestCase(TestCase):
         image = self.create_test_image()
         flight_ticket = SimpleUploadedFile("test_flight_ticket.jpg", image.read())
 
-        request = self.factory.post("/")
-        request.session = {
-            "personal_details": {
-                "name": "John Doe",
-                "dob": "1990-01-01",
-                "gender": "M",
-            },
-            "passport_data": {"name": "JOHN DOE", "dob": "1990-01-01", "gender": "M"},
+        personal_details = {
+            "name": "John Doe",
+            "dob": "1990-01-01",
+            "gender": "M",
         }
+        passport_data = {"name": "JOHN DOE", "dob": "1990-01-01", "gender": "M"}
 
-        extracted_flight_data, flight_ticket_scores = process_flight_ticket(
-            flight_ticket, request
+        extracted_flight_data = extract_flight_ticket(flight_ticket)
+        flight_ticket_scores = score_flight_ticket(
+            personal_details, passport_data, extracted_flight_data
         )
         self.assertIsInstance(extracted_flight_data, dict)
         self.assertIsInstance(flight_ticket_scores, dict)
@@ -44,18 +39,16 @@ class ProcessFlightTicketTestCase(TestCase):
             "invalid_flight_ticket.jpg", b"Invalid file content"
         )
 
-        request = self.factory.post("/")
-        request.session = {
-            "personal_details": {
-                "name": "John Doe",
-                "dob": "1990-01-01",
-                "gender": "M",
-            },
-            "passport_data": {"name": "JOHN DOE", "dob": "1990-01-01", "gender": "M"},
+        personal_details = {
+            "name": "John Doe",
+            "dob": "1990-01-01",
+            "gender": "M",
         }
+        passport_data = {"name": "JOHN DOE", "dob": "1990-01-01", "gender": "M"}
 
-        extracted_flight_data, flight_ticket_scores = process_flight_ticket(
-            flight_ticket, request
+        extracted_flight_data = extract_flight_ticket(flight_ticket)
+        flight_ticket_scores = score_flight_ticket(
+            personal_details, passport_data, extracted_flight_data
         )
         self.assertIsInstance(extracted_flight_data, dict)
         self.assertDictEqual(flight_ticket_scores, {"incorrect_flight_ticket": Decimal("100")})
@@ -64,11 +57,7 @@ class ProcessFlightTicketTestCase(TestCase):
         image = self.create_test_image()
         flight_ticket = SimpleUploadedFile("test_flight_ticket.jpg", image.read())
 
-        request = self.factory.post("/")
-        request.session = {}
-
-        extracted_flight_data, flight_ticket_scores = process_flight_ticket(
-            flight_ticket, request
-        )
+        extracted_flight_data = extract_flight_ticket(flight_ticket)
+        flight_ticket_scores = score_flight_ticket(None, None, extracted_flight_data)
         self.assertIsInstance(extracted_flight_data, dict)
         self.assertIsNone(flight_ticket_scores)
@@ -1,14 +1,11 @@
 from io import BytesIO
 from PIL import Image
 from django.core.files.uploadedfile import SimpleUploadedFile
-from django.test import RequestFactory, TestCase
-from core.views import process_passport
+from django.test import TestCase
+from core.verification import build_user_data, verify_passport
 
 
 class ProcessPassportTestCase(TestCase):
-    def setUp(self):
-        self.factory = RequestFactory()
-
     def create_test_image(self):
         image = Image.new("RGB", (100, 100))
         img_io = BytesIO()
@@ -20,24 +17,18 @@ class ProcessPassportTestCase(TestCase):
         image = self.create_test_image()
         passport = SimpleUploadedFile("test_passport.jpg", image.read())
 
-        request = self.factory.post("/")
-        request.session = {
-            "personal_details": {"name": "John Doe", "dob": "1990-01-01", "gender": "M"}
-        }
+        personal_details = {"name": "John Doe", "dob": "1990-01-01", "gender": "M"}
 
-        passport_scores = process_passport(passport, request)
+        passport_scores, _ = verify_passport(passport, build_user_data(personal_details))
         # Based on your analyze_passport() function, the passport_scores should be a dictionary
         self.assertIsInstance(passport_scores, dict)
 
     def test_invalid_passport_image(self):
         passport = SimpleUploadedFile("invalid_passport.jpg", b"Invalid file content")
 
-        request = self.factory.post("/")
-        request.session = {
-            "personal_details": {"name": "John Doe", "dob": "1990-01-01", "gender": "M"}
-        }
+        personal_details = {"name": "John Doe", "dob": "1990-01-01", "gender": "M"}
 
-        passport_scores = process_passport(passport, request)
+        passport_scores, _ = verify_passport(passport, build_user_data(personal_details))
         # Since the passport image is invalid, the analyze_passport() function should return an empty dictionary
         self.assertEqual(passport_scores, {})
 
@@ -45,9 +36,6 @@ class ProcessPassportTestCase(TestCase):
         image = self.create_test_image()
         passport = SimpleUploadedFile("test_passport.jpg", image.read())
 
-        request = self.factory.post("/")
-        request.session = {}
-
-        passport_scores = process_passport(passport, request)
-        # Since the request does not have session data, the passport_scores should be a dictionary
+        passport_scores, _ = verify_passport(passport, build_user_data(None))
+        # Without personal details, the passport_scores should be a dictionary
         self.assertIsInstance(passport_scores, dict)
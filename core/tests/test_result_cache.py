@@ -0,0 +1,98 @@
+import os
+import tempfile
+import time
+from unittest.mock import MagicMock, patch
+
+from django.test import TestCase
+
+from core.common.extractor_utils import process_text_detection
+from core.common.result_cache import ResultCache, make_cache_key
+
+
+class ResultCacheTestCase(TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, "cache.sqlite3")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_cache_key_depends_on_content_and_parts(self):
+        key = make_cache_key(b"ticket", "detect_document_text")
+        self.assertEqual(key, make_cache_key(b"ticket", "detect_document_text"))
+        self.assertNotEqual(key, make_cache_key(b"ticket", "analyze_document"))
+        self.assertNotEqual(key, make_cache_key(b"passport", "detect_document_text"))
+
+    def test_hit_and_miss_counters(self):
+        cache = ResultCache(self.path)
+        self.assertIsNone(cache.get("missing"))
+        cache.set("key", {"Blocks": []})
+
+        self.assertEqual(cache.get("key"), {"Blocks": []})
+        self.assertEqual(cache.stats()["hits"], 1)
+        self.assertEqual(cache.stats()["misses"], 1)
+
+    def test_entries_persist_across_instances(self):
+        ResultCache(self.path).set("key", {"Blocks": [{"Text": "Emirates"}]})
+
+        cache = ResultCache(self.path)
+        self.assertEqual(cache.get("key"), {"Blocks": [{"Text": "Emirates"}]})
+
+    def test_missing_directory_is_created(self):
+        path = os.path.join(self.temp_dir.name, "data", "cache.sqlite3")
+        ResultCache(path).set("key", {"Blocks": []})
+
+        self.assertTrue(os.path.isdir(os.path.dirname(path)))
+        self.assertEqual(ResultCache(path).get("key"), {"Blocks": []})
+
+    def test_least_recently_used_entries_are_evicted(self):
+        cache = ResultCache(self.path, max_entries=2, memory_entries=1)
+        cache.set("first", 1)
+        cache.set("second", 2)
+        # Reading the first entry makes the second one the least recently used
+        cache._memory.clear()
+        cache.get("first")
+        cache.set("third", 3)
+
+        cache._memory.clear()
+        self.assertEqual(cache.get("first"), 1)
+        self.assertIsNone(cache.get("second"))
+        self.assertEqual(cache.get("third"), 3)
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    def test_memory_only_cache(self):
+        cache = ResultCache(memory_entries=1)
+        cache.set("first", 1)
+        cache.set("second", 2)
+
+        self.assertIsNone(cache.get("first"))
+        self.assertEqual(cache.get("second"), 2)
+
+    def test_expired_entries_are_removed(self):
+        ResultCache(self.path, ttl=60).set("key", {"Blocks": []})
+        self.assertEqual(ResultCache(self.path, ttl=60).get("key"), {"Blocks": []})
+
+        with patch(
+            "core.common.result_cache.time.time", return_value=time.time() + 120
+        ):
+            cache = ResultCache(self.path, ttl=60)
+            self.assertIsNone(cache.get("key"))
+            cache._memory.clear()
+            self.assertIsNone(ResultCache(self.path).get("key"))
+
+
+class ProcessTextDetectionCacheTestCase(TestCase):
+    def test_identical_documents_call_textract_once(self):
+        client = MagicMock()
+        client.detect_document_text.return_value = {
+            "Blocks": [],
+            "ResponseMetadata": {"RequestId": "1"},
+        }
+
+        with patch("core.common.extractor_utils.OCR_CACHE", ResultCache()):
+            first = process_text_detection(client, b"ticket")
+            second = process_text_detection(client, b"ticket")
+
+        self.assertEqual(first, {"Blocks": []})
+        self.assertEqual(second, {"Blocks": []})
+        client.detect_document_text.assert_called_once()
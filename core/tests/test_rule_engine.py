@@ -0,0 +1,183 @@
+import json
+import os
+import tempfile
+from decimal import Decimal
+from unittest.mock import MagicMock
+
+from django.test import TestCase
+
+from core.common.config_reloader import ReloadingConfig
+from core.rule_engine import Field, RulePlan
+from core.rules import (
+    CLAIM_ERROR_TYPES,
+    CLAIM_FIELDS,
+    VERIFICATION_RULES,
+    VERIFICATION_RULES_PATH,
+    load_verification_rules,
+)
+
+FLIGHT_DATA = {
+    "airline_name": "Flynas",
+    "booking_reference_number": "ABC123",
+    "first_name": "John",
+    "last_name": "Doe",
+}
+TAG_DATA = {
+    "airline_name": "Flynas",
+    "booking_reference_number": "ABC123",
+    "passenger_name": "John Doe",
+    "barcode": "9176000001",
+}
+
+
+def shipped_rules(name=None):
+    with open(VERIFICATION_RULES_PATH) as rules_file:
+        rules = json.load(rules_file)
+    return rules if name is None else rules[name]
+
+
+class RulePlanTestCase(TestCase):
+    def test_shipped_rules_are_valid(self):
+        plans = VERIFICATION_RULES.get()
+
+        self.assertEqual(set(plans), {"flight_ticket", "baggage_tag"})
+        self.assertEqual(
+            [rule.error_type for rule in plans["flight_ticket"].rules],
+            [
+                "incorrect_flight_ticket",
+                "flight_ticket_personal_details_name_mismatch",
+                "flight_ticket_passport_name_mismatch",
+            ],
+        )
+
+    def test_each_field_is_read_once(self):
+        read = MagicMock(return_value="John Doe")
+        fields = {
+            "first": Field(read=read, similarity_key=lambda documents: "first"),
+            "second": Field(
+                read=lambda documents: "Jon Doe",
+                similarity_key=lambda documents: "second",
+            ),
+        }
+        rules = [
+            {
+                "error_type": error_type,
+                "comparator": "similarity",
+                "fields": ["first", "second"],
+                "threshold": "95",
+            }
+            for error_type in ("strict_mismatch", "other_mismatch")
+        ]
+
+        errors = RulePlan(rules, fields).evaluate({})
+
+        read.assert_called_once()
+        self.assertEqual(
+            errors, {"strict_mismatch": Decimal("93"), "other_mismatch": Decimal("93")}
+        )
+
+    def test_stop_rule_short_circuits(self):
+        plan = RulePlan(shipped_rules("flight_ticket"), CLAIM_FIELDS)
+
+        errors = plan.evaluate(
+            {
+                "personal_details_name": "John Doe",
+                "passport_name": "John Doe",
+                "flight_data": None,
+            }
+        )
+
+        self.assertEqual(errors, {"incorrect_flight_ticket": Decimal("100")})
+        timings = plan.timings()
+        self.assertEqual(timings["incorrect_flight_ticket"][0], 1)
+        self.assertEqual(timings["flight_ticket_passport_name_mismatch"], (0, 0.0))
+
+    def test_airline_rule_is_a_config_change(self):
+        rules = shipped_rules("baggage_tag") + [
+            {
+                "error_type": "invalid_flynas_barcode",
+                "comparator": "prefix",
+                "fields": ["tag_airline_name", "tag_barcode"],
+                "airline": "Flynas",
+                "prefix": "0",
+            }
+        ]
+        documents = {
+            "flight_data": FLIGHT_DATA,
+            "baggage_data": TAG_DATA,
+            "tag_index": 0,
+        }
+
+        errors = RulePlan(rules, CLAIM_FIELDS).evaluate(documents)
+
+        self.assertEqual(errors, {"invalid_flynas_barcode": None})
+
+    def test_invalid_rules_are_rejected(self):
+        rule = shipped_rules("baggage_tag")[2]
+        invalid_rules = [
+            {},
+            [{**rule, "comparator": "regex"}],
+            [{**rule, "fields": ["ticket_airline_name"]}],
+            [{**rule, "fields": ["ticket_airline_name", "tag_colour"]}],
+            [{**rule, "fields": ["flight_data", "tag_airline_name"]}],
+            [{**rule, "threshold": "high"}],
+            [{**rule, "threshold": 0.8}],
+            [{**rule, "stop": "yes"}],
+            [{**rule, "prefix": "0"}],
+            [{key: value for key, value in rule.items() if key != "threshold"}],
+        ]
+        for rules in invalid_rules:
+            with self.subTest(rules=rules):
+                with self.assertRaises(ValueError):
+                    RulePlan(rules, CLAIM_FIELDS)
+
+    def test_unscored_error_types_are_rejected(self):
+        rules = shipped_rules("baggage_tag") + [
+            {
+                "error_type": "invalid_flynas_barcode",
+                "comparator": "prefix",
+                "fields": ["tag_airline_name", "tag_barcode"],
+                "airline": "Flynas",
+                "prefix": "0",
+            }
+        ]
+
+        with self.assertRaises(ValueError):
+            RulePlan(rules, CLAIM_FIELDS, CLAIM_ERROR_TYPES)
+
+
+class VerificationRulesReloadTestCase(TestCase):
+    def setUp(self):
+        file_descriptor, self.path = tempfile.mkstemp(suffix=".json")
+        os.close(file_descriptor)
+        self.addCleanup(os.remove, self.path)
+        self.write(shipped_rules())
+
+    def write(self, rules, mtime=None):
+        with open(self.path, "w") as rules_file:
+            json.dump(rules, rules_file)
+        if mtime is not None:
+            os.utime(self.path, (mtime, mtime))
+
+    def test_unscored_error_type_keeps_the_previous_plan(self):
+        config = ReloadingConfig(self.path, load_verification_rules, check_interval=0)
+        plans = config.get()
+
+        rules = shipped_rules()
+        rules["baggage_tag"].append(
+            {
+                "error_type": "invalid_flynas_barcode",
+                "comparator": "prefix",
+                "fields": ["tag_airline_name", "tag_barcode"],
+                "airline": "Flynas",
+                "prefix": "0",
+            }
+        )
+        self.write(rules, mtime=os.stat(self.path).st_mtime + 10)
+
+        self.assertIs(config.get(), plans)
+        self.assertEqual(config.reloads, 0)
+        self.assertNotIn(
+            "invalid_flynas_barcode",
+            [rule.error_type for rule in config.get()["baggage_tag"].rules],
+        )
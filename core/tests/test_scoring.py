@@ -0,0 +1,313 @@
+import io
+import random
+from decimal import Decimal
+from unittest.mock import patch
+
+import numpy as np
+from django.core.management import call_command
+from django.test import TestCase
+
+from core.models import Claim
+from core.scoring import (
+    ERROR_SCORES_VERSION,
+    ERROR_TYPE_COLUMNS,
+    ERROR_TYPE_WEIGHTS,
+    UNSCORED_ERROR,
+    VERIFICATION_ERRORS,
+    calculate_total_weighted_sum_of_errors,
+    calculate_weighted_sum_of_errors,
+    batch_reasons,
+    encode_error_scores,
+    error_type_weight_vector,
+    get_severity_and_status,
+    grade_batch,
+    load_score_matrix,
+    merge_scores,
+    score_batch,
+)
+
+
+def create_claims(claim_scores):
+    return Claim.objects.bulk_create(
+        Claim(
+            date_of_loss="2023-01-01",
+            description_of_loss="Lost bag",
+            severity="Low",
+            status="Approved",
+            reasons="",
+            error_scores=encode_error_scores(scores),
+            error_scores_version=ERROR_SCORES_VERSION,
+        )
+        for scores in claim_scores
+    )
+
+
+def score_stored_claims(claim_scores):
+    # The path rescore_claims takes, from the stored score vectors
+    create_claims(claim_scores)
+    _, score_matrix = load_score_matrix(Claim.objects.order_by("id"))
+    weighted_sums, below_threshold = score_batch(
+        score_matrix, error_type_weight_vector()
+    )
+    severities, statuses = grade_batch(weighted_sums, below_threshold)
+    return weighted_sums, severities, statuses, batch_reasons(below_threshold)
+
+
+class ScoreStoredClaimsTestCase(TestCase):
+    def test_matches_the_per_claim_scoring(self):
+        random.seed(7)
+        error_types = list(ERROR_TYPE_WEIGHTS)
+        claim_scores = []
+        for _ in range(300):
+            scores = {}
+            for error_type in random.sample(error_types, random.randint(0, 6)):
+                scores[error_type] = random.choice(
+                    [None, Decimal(random.randint(0, 100)), Decimal("0.62")]
+                )
+            claim_scores.append(scores)
+
+        weighted_sums, severities, statuses, reasons = score_stored_claims(claim_scores)
+
+        for index, scores in enumerate(claim_scores):
+            weighted_sum, found_error_types = calculate_total_weighted_sum_of_errors(
+                scores, None, None
+            )
+            severity, status, claim_reasons = get_severity_and_status(
+                weighted_sum, found_error_types
+            )
+            with self.subTest(scores=scores):
+                self.assertAlmostEqual(
+                    weighted_sums[index], float(weighted_sum), places=6
+                )
+                self.assertEqual(severities[index], severity)
+                self.assertEqual(statuses[index], status)
+                self.assertEqual(reasons[index], "; ".join(claim_reasons))
+
+    def test_sums_on_a_threshold(self):
+        # 0.1 + 0.1 is 0.2 exactly in Decimal, the Low threshold
+        _, severities, statuses, _ = score_stored_claims(
+            [{"airline_name_mismatch": "0", "incorrect_baggage_tag": "0"}]
+        )
+
+        self.assertEqual(severities, ["Low"])
+        self.assertEqual(statuses, ["To Be Reviewed"])
+
+    def test_sums_above_every_threshold_are_high(self):
+        scores = {error_type: None for error_type in ERROR_TYPE_WEIGHTS}
+
+        self.assertEqual(score_stored_claims([scores])[1], ["High"])
+        self.assertEqual(
+            get_severity_and_status(sum(ERROR_TYPE_WEIGHTS.values()), [])[0], "High"
+        )
+
+    def test_reasons_are_in_column_order(self):
+        _, _, reasons = get_severity_and_status(
+            Decimal("0.35"), ["passenger_name_mismatch", "name_mismatch"]
+        )
+
+        self.assertEqual(
+            reasons,
+            [
+                VERIFICATION_ERRORS["name_mismatch"],
+                VERIFICATION_ERRORS["passenger_name_mismatch"],
+            ],
+        )
+
+
+class ScoreBatchTestCase(TestCase):
+    def test_matches_the_exact_weighted_sum(self):
+        claim_scores = [
+            {},
+            {"name_mismatch": None},
+            {"not_authentic": Decimal("60"), "airline_name_mismatch": Decimal("0")},
+            {"passenger_name_mismatch": Decimal("49.99"), "dob_mismatch": None},
+        ]
+        score_matrix = np.full((len(claim_scores), len(ERROR_TYPE_COLUMNS)), np.nan)
+        for row, scores in enumerate(claim_scores):
+            for error_type, score in scores.items():
+                score_matrix[row, ERROR_TYPE_COLUMNS[error_type]] = (
+                    UNSCORED_ERROR if score is None else score
+                )
+
+        weighted_sums, below_threshold = score_batch(
+            score_matrix, error_type_weight_vector()
+        )
+
+        for row, scores in enumerate(claim_scores):
+            weighted_sum, _ = calculate_weighted_sum_of_errors(scores)
+            self.assertAlmostEqual(weighted_sums[row], float(weighted_sum))
+        self.assertEqual(
+            [np.flatnonzero(mask).tolist() for mask in below_threshold],
+            [
+                [],
+                [ERROR_TYPE_COLUMNS["name_mismatch"]],
+                [ERROR_TYPE_COLUMNS["airline_name_mismatch"]],
+                sorted(
+                    [
+                        ERROR_TYPE_COLUMNS["dob_mismatch"],
+                        ERROR_TYPE_COLUMNS["passenger_name_mismatch"],
+                    ]
+                ),
+            ],
+        )
+
+    def test_exact_decimal_results_are_kept(self):
+        weighted_sum, _ = calculate_weighted_sum_of_errors(
+            {"airline_name_mismatch": Decimal("0"), "incorrect_baggage_tag": None}
+        )
+
+        self.assertEqual(weighted_sum, Decimal("0.2"))
+
+
+class ErrorScoresTestCase(TestCase):
+    def create_claim(self, scores=None):
+        claim = Claim.objects.create(
+            date_of_loss="2023-01-01",
+            description_of_loss="Lost bag",
+            severity="Low",
+            status="Approved",
+            reasons="",
+        )
+        if scores is not None:
+            claim.error_scores = encode_error_scores(scores)
+            claim.error_scores_version = ERROR_SCORES_VERSION
+            claim.save()
+        return claim
+
+    def test_encoded_vector(self):
+        data = encode_error_scores(
+            {
+                "name_mismatch": None,
+                "flight_ticket_passport_name_mismatch": Decimal("62"),
+                "airline_name_mismatch": Decimal("0.62"),
+            }
+        )
+
+        vector = np.frombuffer(data, dtype="<f4")
+        self.assertEqual(len(data), 4 * 15)
+        self.assertEqual(vector[ERROR_TYPE_COLUMNS["name_mismatch"]], UNSCORED_ERROR)
+        self.assertEqual(
+            vector[ERROR_TYPE_COLUMNS["flight_ticket_passport_name_mismatch"]], 62
+        )
+        self.assertEqual(
+            vector[ERROR_TYPE_COLUMNS["airline_name_mismatch"]], np.float32(0.62)
+        )
+        self.assertEqual(np.count_nonzero(~np.isnan(vector)), 3)
+
+    def test_unknown_error_type(self):
+        with self.assertRaises(ValueError):
+            encode_error_scores({"unknown_error": None})
+
+    def test_score_matrix(self):
+        first = self.create_claim({"not_authentic": Decimal("60")})
+        self.create_claim()
+        second = self.create_claim({"passenger_name_mismatch": None})
+
+        claim_ids, matrix = load_score_matrix(Claim.objects.order_by("id"))
+
+        self.assertEqual(claim_ids.tolist(), [first.id, second.id])
+        self.assertEqual(matrix.shape, (2, len(ERROR_TYPE_COLUMNS)))
+        self.assertEqual(matrix[0, ERROR_TYPE_COLUMNS["not_authentic"]], 60)
+        self.assertEqual(
+            matrix[1, ERROR_TYPE_COLUMNS["passenger_name_mismatch"]], UNSCORED_ERROR
+        )
+        self.assertEqual(np.count_nonzero(~np.isnan(matrix)), 2)
+
+
+class RescoreClaimsCommandTestCase(TestCase):
+    def create_claim(self, status, scores=None):
+        return Claim.objects.create(
+            date_of_loss="2023-01-01",
+            description_of_loss="Lost bag",
+            severity="Low",
+            status=status,
+            reasons="",
+            error_scores=None if scores is None else encode_error_scores(scores),
+            error_scores_version=None if scores is None else ERROR_SCORES_VERSION,
+        )
+
+    def rescore(self, *args):
+        call_command("rescore_claims", *args, stdout=io.StringIO())
+
+    def test_claims_are_rescored_with_the_new_weights(self):
+        claim = self.create_claim("Approved", {"not_authentic": Decimal("60")})
+        unchanged = self.create_claim("Approved", {})
+        rejected = self.create_claim("Rejected", {"name_mismatch": None})
+        without_scores = self.create_claim("Approved")
+
+        with patch.dict(ERROR_TYPE_WEIGHTS, {"not_authentic": Decimal("0.6")}):
+            self.rescore("--chunk-size", "2")
+
+        claim.refresh_from_db()
+        self.assertEqual(claim.severity, "Medium")
+        self.assertEqual(claim.status, "To Be Reviewed")
+        self.assertEqual(claim.reasons, "")
+        for other, status in (
+            (unchanged, "Approved"),
+            (rejected, "Rejected"),
+            (without_scores, "Approved"),
+        ):
+            other.refresh_from_db()
+            self.assertEqual((other.severity, other.status), ("Low", status))
+
+    def test_reasons_are_written(self):
+        claim = self.create_claim("Approved", {"name_mismatch": None})
+
+        self.rescore()
+
+        claim.refresh_from_db()
+        self.assertEqual(claim.severity, "Medium")
+        self.assertEqual(claim.reasons, VERIFICATION_ERRORS["name_mismatch"])
+
+    def test_reasons_follow_the_check_order(self):
+        claim = self.create_claim(
+            "Approved", {"passenger_name_mismatch": None, "name_mismatch": None}
+        )
+
+        self.rescore()
+
+        claim.refresh_from_db()
+        self.assertEqual(
+            claim.reasons,
+            "; ".join(
+                [
+                    VERIFICATION_ERRORS["name_mismatch"],
+                    VERIFICATION_ERRORS["passenger_name_mismatch"],
+                ]
+            ),
+        )
+
+    def test_unchanged_weights_keep_the_submitted_reasons(self):
+        passport_scores = {"not_authentic": Decimal("40")}
+        # Tags add their errors in the order they are found, not in the order of the checks
+        baggage_tag_scores = {
+            "passenger_name_mismatch": Decimal("30"),
+            "airline_name_mismatch": Decimal("20"),
+        }
+        # Scored the way claim_summary scores a submitted claim
+        weighted_sum, error_types = calculate_total_weighted_sum_of_errors(
+            passport_scores, {}, baggage_tag_scores
+        )
+        severity, status, reasons = get_severity_and_status(weighted_sum, error_types)
+        claim = self.create_claim(
+            status, merge_scores(passport_scores, {}, baggage_tag_scores)
+        )
+        Claim.objects.filter(id=claim.id).update(
+            severity=severity, reasons="; ".join(reasons)
+        )
+
+        self.rescore()
+
+        rescored = Claim.objects.get(id=claim.id)
+        self.assertEqual(
+            (rescored.severity, rescored.status, rescored.reasons),
+            (severity, status, "; ".join(reasons)),
+        )
+
+    def test_dry_run(self):
+        claim = self.create_claim("Approved", {"name_mismatch": None})
+
+        self.rescore("--dry-run")
+
+        claim.refresh_from_db()
+        self.assertEqual((claim.severity, claim.status), ("Low", "Approved"))
@@ -0,0 +1,102 @@
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.test import TestCase
+from rapidfuzz import process
+
+from core.rules import (
+    build_claim_similarity,
+    process_extracted_baggage_data,
+    process_extracted_flight_data,
+)
+from core.similarity import SimilarityMatrix, similarity_score
+
+
+class SimilarityMatrixTestCase(TestCase):
+    def test_scores_match_fuzz_ratio(self):
+        # Values returned by fuzzywuzzy's fuzz.ratio on the lowercased texts
+        cases = [
+            ("john doe", "jon doe", 93),
+            ("Emirates", "emirate", 93),
+            ("ABC123", "abc124", 83),
+            ("John Doe", "JOHN DOE", 100),
+            ("ab", "abc", 80),
+            ("", "x", 0),
+            (None, "", 100),
+        ]
+        for first_text, second_text, expected in cases:
+            with self.subTest(first_text=first_text, second_text=second_text):
+                score = similarity_score(first_text, second_text)
+                self.assertEqual(score, expected)
+                self.assertIsInstance(score, int)
+
+    def test_texts_are_compared_in_one_call(self):
+        with patch("core.similarity.process.cdist", wraps=process.cdist) as mock_cdist:
+            similarity = SimilarityMatrix(
+                {"first": "John Doe", "second": "JOHN DOE", "third": "Jane Doe"}
+            )
+
+        mock_cdist.assert_called_once()
+        # Texts that are the same once normalized are compared once
+        self.assertEqual(similarity.scores.shape, (2, 2))
+        self.assertEqual(similarity.score("first", "second"), 100)
+        self.assertEqual(
+            similarity.score("first", "third"), similarity.score("third", "second")
+        )
+
+
+class ClaimSimilarityTestCase(TestCase):
+    def setUp(self):
+        self.flight_data = {
+            "airline_name": "Emirates",
+            "booking_reference_number": "ABC123",
+            "first_name": "JOHN",
+            "last_name": "DOE",
+        }
+        self.tags = [
+            {
+                "airline_name": "Emirates",
+                "booking_reference_number": "ABC123",
+                "passenger_name": "John Doe",
+                "barcode": "0176000001",
+            },
+            {
+                "airline_name": "Flynas",
+                "booking_reference_number": "XYZ999",
+                "passenger_name": "Jane Roe",
+                "barcode": "0176000002",
+            },
+        ]
+
+    def test_one_matrix_scores_the_whole_claim(self):
+        similarity = build_claim_similarity(
+            "John Doe", "Jon Doe", self.flight_data, self.tags
+        )
+
+        with patch("core.similarity.process.cdist") as mock_cdist:
+            flight_errors = process_extracted_flight_data(
+                "John Doe", "Jon Doe", self.flight_data, similarity=similarity
+            )
+            baggage_errors = process_extracted_baggage_data(
+                self.flight_data, self.tags, similarity=similarity
+            )
+
+        mock_cdist.assert_not_called()
+        self.assertEqual(flight_errors, {})
+        self.assertEqual(
+            set(baggage_errors),
+            {
+                "airline_name_mismatch",
+                "booking_reference_mismatch",
+                "passenger_name_mismatch",
+            },
+        )
+        self.assertIsInstance(baggage_errors["airline_name_mismatch"], Decimal)
+
+    def test_name_mismatch_is_normalized(self):
+        errors = process_extracted_flight_data("Jane Roe", "John Doe", self.flight_data)
+
+        # The ratio is 62.5, rounded half to even as fuzz.ratio did
+        self.assertEqual(
+            errors, {"flight_ticket_personal_details_name_mismatch": Decimal("0.62")}
+        )
@@ -0,0 +1,147 @@
+import json
+import os
+import tempfile
+from unittest.mock import patch
+
+import numpy as np
+from django.test import TestCase
+
+from core.common.document_image import DocumentImage
+from core.flight_ticket_extractor.flight_ticket_info_extractor import (
+    PROCESSING_FUNCTIONS,
+    TICKET_CONFIG_SUFFIX,
+    TICKET_CONFIGS,
+    load_and_process_config,
+    process_booking_reference_number,
+)
+from core.flight_ticket_extractor.ticket_config_store import (
+    TicketConfigStore,
+    build_ticket_layout,
+)
+
+EXTRACTOR = "core.flight_ticket_extractor.flight_ticket_info_extractor"
+CONFIG = {
+    "version": 2,
+    "pdf_dpi": 150,
+    "regions": {
+        "booking_reference_number": {
+            "box": [0.25, 0.1, 0.5, 0.05],
+            "processing_function": "process_booking_reference_number",
+        },
+        "airline_name": {"box": [0, 0, 0.5, 0.05], "processing_function": ""},
+    },
+}
+
+
+class BuildTicketLayoutTestCase(TestCase):
+    def test_processing_functions_are_resolved(self):
+        layout = build_ticket_layout("emirates", CONFIG, PROCESSING_FUNCTIONS)
+
+        self.assertEqual(layout.pdf_dpi, 150)
+        self.assertEqual(
+            [region.name for region in layout.regions],
+            ["booking_reference_number", "airline_name"],
+        )
+        self.assertIs(
+            layout.regions[0].processing_function, process_booking_reference_number
+        )
+        self.assertIsNone(layout.regions[1].processing_function)
+        self.assertEqual(layout.regions[0].box, (0.25, 0.1, 0.5, 0.05))
+
+    def test_shipped_configs_are_valid(self):
+        for ticket_type in TICKET_CONFIGS.ticket_types():
+            with self.subTest(ticket_type=ticket_type):
+                self.assertIsNotNone(TICKET_CONFIGS.get(ticket_type))
+
+    def test_invalid_configs_are_rejected(self):
+        region = CONFIG["regions"]["booking_reference_number"]
+        invalid_configs = [
+            {"regions": {}},
+            {**CONFIG, "pdf_dpi": 0},
+            {"regions": {"name": {"processing_function": ""}}},
+            {"regions": {"name": {**region, "box": [0, 0, 2, 1]}}},
+            {"regions": {"name": {"coordinates": [0, 0, -1, 10]}}},
+            {"regions": {"name": {**region, "processing_function": "process_nothing"}}},
+        ]
+        for config in invalid_configs:
+            with self.subTest(config=config):
+                with self.assertRaises(ValueError):
+                    build_ticket_layout("emirates", config, PROCESSING_FUNCTIONS)
+
+
+class TicketConfigStoreTestCase(TestCase):
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.configs_dir = temp_dir.name
+        self.config_path = os.path.join(
+            self.configs_dir, f"emirates{TICKET_CONFIG_SUFFIX}"
+        )
+        self.write(CONFIG)
+        self.store = TicketConfigStore(
+            self.configs_dir,
+            PROCESSING_FUNCTIONS,
+            suffix=TICKET_CONFIG_SUFFIX,
+            check_interval=0,
+        )
+
+    def write(self, config, mtime_offset=0):
+        with open(self.config_path, "w") as config_file:
+            json.dump(config, config_file)
+        if mtime_offset:
+            mtime = os.stat(self.config_path).st_mtime + mtime_offset
+            os.utime(self.config_path, (mtime, mtime))
+
+    def test_config_is_parsed_once(self):
+        with patch("json.load", wraps=json.load) as mock_load:
+            first = self.store.get("emirates")
+            second = self.store.get("emirates")
+
+        self.assertIs(first, second)
+        mock_load.assert_called_once()
+
+    def test_edits_are_reloaded(self):
+        self.store.get("emirates")
+
+        self.write({**CONFIG, "pdf_dpi": 300}, mtime_offset=10)
+
+        self.assertEqual(self.store.get("emirates").pdf_dpi, 300)
+
+    def test_invalid_edit_keeps_the_previous_config(self):
+        self.store.get("emirates")
+
+        self.write({**CONFIG, "regions": {}}, mtime_offset=10)
+
+        self.assertEqual(self.store.get("emirates").pdf_dpi, 150)
+
+    def test_unknown_ticket_type(self):
+        self.assertIsNone(self.store.get("unknown"))
+        self.assertEqual(self.store.ticket_types(), ["emirates"])
+
+
+class LoadAndProcessConfigTestCase(TestCase):
+    def test_regions_are_read_with_the_stored_config(self):
+        store = TicketConfigStore(
+            os.path.dirname(__file__), PROCESSING_FUNCTIONS, TICKET_CONFIG_SUFFIX
+        )
+        layout = build_ticket_layout("emirates", CONFIG, PROCESSING_FUNCTIONS)
+        image = DocumentImage(b"")
+        image.pixels = np.full((400, 200), 255, np.uint8)
+        page_words = [
+            {
+                "Text": "ABC123",
+                "Confidence": 99.0,
+                "BoundingBox": {"Left": 0.3, "Top": 0.11, "Width": 0.2, "Height": 0.02},
+            }
+        ]
+
+        with patch(f"{EXTRACTOR}.TICKET_CONFIGS", store), patch.object(
+            store, "get", return_value=layout
+        ):
+            extracted_data = load_and_process_config(
+                image, None, "emirates", page_words=page_words
+            )
+
+        self.assertEqual(
+            extracted_data, {"booking_reference_number": "ABC123", "airline_name": None}
+        )
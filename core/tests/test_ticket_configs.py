@@ -0,0 +1,105 @@
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from core.flight_ticket_extractor.flight_ticket_info_extractor import (
+    TICKET_CONFIG_VERSION,
+    normalize_ticket_config,
+    scale_region,
+)
+
+LEGACY_CONFIG = {
+    "pdf_dpi": 200,
+    "regions": {
+        "booking_reference_number": {
+            "coordinates": [100, 50, 200, 25],
+            "processing_function": "process_booking_reference_number",
+        }
+    },
+}
+
+
+class ScaleRegionTestCase(TestCase):
+    def test_box_is_scaled_to_the_image(self):
+        region_info = {"box": [0.25, 0.1, 0.5, 0.05]}
+
+        self.assertEqual(scale_region(region_info, (500, 400)), [100, 50, 200, 25])
+        self.assertEqual(scale_region(region_info, (250, 200, 3)), [50, 25, 100, 12])
+
+    def test_box_stays_inside_the_image(self):
+        x, y, w, h = scale_region({"box": [0.5, 0.5, 0.5, 0.5]}, (3, 3))
+
+        self.assertLessEqual(x + w, 3)
+        self.assertLessEqual(y + h, 3)
+
+    def test_legacy_coordinates_are_used_as_they_are(self):
+        region_info = LEGACY_CONFIG["regions"]["booking_reference_number"]
+
+        self.assertEqual(scale_region(region_info, (1000, 800)), [100, 50, 200, 25])
+
+
+class NormalizeTicketConfigTestCase(TestCase):
+    def test_coordinates_become_fractions_of_the_reference_size(self):
+        config = normalize_ticket_config(LEGACY_CONFIG, (400, 500))
+        region = config["regions"]["booking_reference_number"]
+
+        self.assertEqual(config["version"], TICKET_CONFIG_VERSION)
+        self.assertEqual(config["reference_size"], [400, 500])
+        self.assertEqual(config["pdf_dpi"], 200)
+        self.assertEqual(region["box"], [0.25, 0.1, 0.5, 0.05])
+        self.assertNotIn("coordinates", region)
+        self.assertEqual(
+            region["processing_function"], "process_booking_reference_number"
+        )
+
+    def test_round_trip_at_the_reference_size(self):
+        config = normalize_ticket_config(LEGACY_CONFIG, (1654, 2339))
+        region = config["regions"]["booking_reference_number"]
+
+        self.assertEqual(scale_region(region, (2339, 1654)), [100, 50, 200, 25])
+
+
+class MigrateTicketConfigsCommandTestCase(TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.config_path = os.path.join(
+            self.temp_dir.name, "emirates_ticket_config.json"
+        )
+        with open(self.config_path, "w") as config_file:
+            json.dump(LEGACY_CONFIG, config_file)
+
+        patcher = patch(
+            "core.management.commands.migrate_ticket_configs.CONFIGS_DIR",
+            self.temp_dir.name,
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_configs_are_converted(self):
+        call_command(
+            "migrate_ticket_configs",
+            "--reference-size",
+            "emirates=400x500",
+            stdout=StringIO(),
+        )
+
+        with open(self.config_path) as config_file:
+            config = json.load(config_file)
+        self.assertEqual(config["version"], TICKET_CONFIG_VERSION)
+        self.assertEqual(
+            config["regions"]["booking_reference_number"]["box"],
+            [0.25, 0.1, 0.5, 0.05],
+        )
+
+    def test_reference_size_is_required(self):
+        with self.assertRaises(CommandError):
+            call_command("migrate_ticket_configs", stdout=StringIO())
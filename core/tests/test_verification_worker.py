@@ -0,0 +1,145 @@
+from datetime import timedelta
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.test import TestCase
+from django.utils import timezone
+from rapidfuzz import process
+
+from core.models import VerificationJob, VerificationJobBaggageTag
+from core.verification import (
+    claim_next_job,
+    requeue_stale_jobs,
+    run_verification_job,
+    verify_documents,
+)
+
+
+class ClaimNextJobTestCase(TestCase):
+    def test_oldest_pending_job_is_claimed(self):
+        first = VerificationJob.objects.create()
+        VerificationJob.objects.create()
+
+        job = claim_next_job()
+
+        self.assertEqual(job.id, first.id)
+        self.assertEqual(job.status, "Running")
+        self.assertIsNotNone(job.started_on)
+
+    def test_claimed_job_is_not_claimed_again(self):
+        VerificationJob.objects.create()
+
+        self.assertIsNotNone(claim_next_job())
+        self.assertIsNone(claim_next_job())
+
+    def test_stale_running_jobs_are_requeued(self):
+        job = VerificationJob.objects.create(
+            status="Running", started_on=timezone.now() - timedelta(hours=1)
+        )
+
+        self.assertEqual(requeue_stale_jobs(timedelta(minutes=10)), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, "Pending")
+
+
+class RunVerificationJobTestCase(TestCase):
+    def test_results_are_stored(self):
+        job = VerificationJob.objects.create(
+            status="Running", personal_details={"name": "John Doe"}
+        )
+        results = {
+            "flight_data": {"first_name": "JOHN", "last_name": "DOE"},
+            "baggage_data": None,
+            "passport_data": {"name": "JOHN DOE"},
+            "passport_scores": {"name_mismatch": Decimal("60")},
+            "flight_ticket_scores": {},
+            "baggage_tag_scores": None,
+        }
+
+        with patch("core.verification.verify_documents", return_value=results):
+            job = run_verification_job(job)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, "Done")
+        self.assertEqual(job.results["passport_scores"], {"name_mismatch": "60"})
+        self.assertEqual(job.results["error_types"], [])
+        self.assertEqual(Decimal(job.results["weighted_sum_of_errors"]), Decimal("0.1"))
+
+    def test_every_baggage_tag_is_verified(self):
+        job = VerificationJob.objects.create(status="Running")
+        for name in ("bag1.jpg", "bag2.jpg"):
+            VerificationJobBaggageTag.objects.create(
+                job=job, file=f"verification_jobs/{name}"
+            )
+        results = {
+            "flight_data": None,
+            "baggage_data": [None, None],
+            "passport_data": None,
+            "passport_scores": None,
+            "flight_ticket_scores": None,
+            "baggage_tag_scores": None,
+        }
+
+        with patch(
+            "core.verification.verify_documents", return_value=results
+        ) as mock_verify:
+            run_verification_job(job)
+
+        baggage_tags = mock_verify.call_args[0][1]
+        self.assertEqual(
+            sorted(baggage_tag.name for baggage_tag in baggage_tags),
+            ["verification_jobs/bag1.jpg", "verification_jobs/bag2.jpg"],
+        )
+
+    def test_failure_is_recorded(self):
+        job = VerificationJob.objects.create(status="Running")
+
+        with patch(
+            "core.verification.verify_documents",
+            side_effect=RuntimeError("Textract unavailable"),
+        ):
+            job = run_verification_job(job)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, "Failed")
+        self.assertEqual(job.error_message, "Textract unavailable")
+
+
+class VerifyDocumentsTestCase(TestCase):
+    def test_claim_is_compared_with_one_matrix(self):
+        flight_data = {
+            "airline_name": "Emirates",
+            "booking_reference_number": "ABC123",
+            "first_name": "John",
+            "last_name": "Doe",
+        }
+        tag_data = {
+            "airline_name": "Emirates",
+            "booking_reference_number": "ABC123",
+            "passenger_name": "John Doe",
+            "barcode": "0176000001",
+        }
+
+        with patch(
+            "core.verification.extract_flight_ticket", return_value=flight_data
+        ), patch(
+            "core.verification.extract_baggage_tags", return_value=[tag_data]
+        ), patch(
+            "core.verification.verify_passport",
+            return_value=({}, {"name": "Jane Roe"}),
+        ) as mock_verify_passport, patch(
+            "core.similarity.process.cdist", wraps=process.cdist
+        ) as mock_cdist:
+            results = verify_documents(
+                "ticket.pdf", ["tag.png"], "passport.png", {"name": "John Doe"}
+            )
+
+        mock_cdist.assert_called_once()
+        self.assertFalse(mock_verify_passport.call_args.kwargs["check_name"])
+        self.assertEqual(results["passport_scores"], {"name_mismatch": Decimal("62")})
+        self.assertEqual(
+            set(results["flight_ticket_scores"]),
+            {"flight_ticket_passport_name_mismatch"},
+        )
+        self.assertEqual(results["baggage_tag_scores"], {})
+        self.assertNotIn("similarity", results)
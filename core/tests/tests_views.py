@@ -1,13 +1,29 @@
 from io import BytesIO
+from unittest.mock import patch
 
+import numpy as np
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import DatabaseError
 from django.test import Client
 from django.test import RequestFactory, TestCase
 from django.urls import reverse
 from PIL import Image
 
 from core.forms import PersonalDetailsForm
-from core.models import Blockchain, Claim, CoverageItem, Customer
+from core.models import (
+    Blockchain,
+    Claim,
+    CoverageItem,
+    Customer,
+    VerificationJob,
+    VerificationJobBaggageTag,
+)
+from core.scoring import (
+    ERROR_SCORES_VERSION,
+    ERROR_TYPE_COLUMNS,
+    VERIFICATION_FAILED_REASON,
+    load_score_matrix,
+)
 from core.views import claim_success, claim_summary
 
 
@@ -179,8 +195,28 @@ class RequiredDocumentsViewTests(TestCase):
             form = response.context.get("form")
             print("Form errors:", form.errors)
 
+        # The documents are verified in the background, so the upload returns straight away
         self.assertEqual(response.status_code, 200)
-        self.assertTemplateUsed(response, "claim_summary.html")
+        self.assertTemplateUsed(response, "verification_status.html")
+        self.assertEqual(VerificationJob.objects.get().status, "Pending")
+
+    def test_job_is_not_queued_without_its_baggage_tags(self):
+        with patch.object(
+            VerificationJobBaggageTag.objects,
+            "bulk_create",
+            side_effect=DatabaseError("disk full"),
+        ):
+            with self.assertRaises(DatabaseError):
+                self.client.post(
+                    reverse("required_documents"),
+                    {
+                        "passport": self.create_temp_image("passport.jpg"),
+                        "flight_ticket": self.create_temp_image("flight_ticket.jpg"),
+                        "baggage_tag": self.create_temp_image("baggage_tag.jpg"),
+                    },
+                )
+
+        self.assertFalse(VerificationJob.objects.exists())
 
     def test_required_documents_view_form_submission_with_errors(self):
         flight_ticket = self.create_temp_image("flight_ticket.jpg")
@@ -200,6 +236,45 @@ class RequiredDocumentsViewTests(TestCase):
         self.assertEqual(response.status_code, 200)
 
 
+class VerificationStatusViewTests(TestCase):
+    def test_verification_status_without_job_redirects(self):
+        response = self.client.get(reverse("verification_status"))
+        self.assertRedirects(response, reverse("required_documents"))
+
+    def test_verification_status_pending_job(self):
+        job = VerificationJob.objects.create()
+        session = self.client.session
+        session["verification_job_id"] = job.id
+        session.save()
+
+        response = self.client.get(reverse("verification_status"))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, "verification_status.html")
+
+    def test_verification_status_done_job_redirects_to_summary(self):
+        job = VerificationJob.objects.create(
+            status="Done",
+            results={
+                "flight_data": {"airline_name": "Emirates"},
+                "passport_data": {"name": "JOHN DOE"},
+                "weighted_sum_of_errors": "0.1",
+                "error_types": ["airline_name_mismatch"],
+            },
+        )
+        session = self.client.session
+        session["verification_job_id"] = job.id
+        session.save()
+
+        response = self.client.get(reverse("verification_status"))
+
+        self.assertRedirects(
+            response, reverse("claim_summary"), fetch_redirect_response=False
+        )
+        self.assertEqual(self.client.session["weighted_sum_of_errors"], "0.1")
+        self.assertEqual(self.client.session["error_types"], ["airline_name_mismatch"])
+
+
 class ClaimSummaryTestCase(TestCase):
     def setUp(self):
         self.factory = RequestFactory()
@@ -249,6 +324,87 @@ class ClaimSummaryTestCase(TestCase):
         self.assertEqual(response.status_code, 302)
         self.assertEqual(response.url, reverse("claim_success"))
 
+    def test_claim_summary_POST_request_stores_error_scores(self):
+        job = VerificationJob.objects.create(
+            status="Done",
+            results={
+                "weighted_sum_of_errors": "0.1",
+                "error_types": ["airline_name_mismatch"],
+                "flight_ticket_scores": {},
+                "baggage_tag_scores": {"airline_name_mismatch": "40"},
+            },
+        )
+        request = self.factory.post(reverse("claim_summary"), data={"submit-btn": True})
+        request.session = {}
+        request.session["personal_details"] = {
+            "name": "John Doe",
+            "email": "john.doe@example.com",
+            "phone_number": "1234567890",
+        }
+        request.session["claim_details"] = {
+            "date_of_loss": "2022-01-01",
+            "country_of_incident": "US",
+            "description_of_loss": "Test description of loss",
+            "claim_amount": 1000,
+        }
+        request.session["coverage_items"] = ["Test Coverage Item"]
+        request.session["verification_job_id"] = job.id
+
+        response = claim_summary(request)
+
+        self.assertEqual(response.status_code, 302)
+        claim = Claim.objects.get()
+        self.assertEqual(claim.error_scores_version, ERROR_SCORES_VERSION)
+        _, score_matrix = load_score_matrix(Claim.objects.all())
+        self.assertEqual(
+            score_matrix[0, ERROR_TYPE_COLUMNS["airline_name_mismatch"]], 40
+        )
+        self.assertEqual(np.count_nonzero(~np.isnan(score_matrix)), 1)
+
+    def post_summary_with_job(self, job):
+        request = self.factory.post(reverse("claim_summary"), data={"submit-btn": True})
+        request.session = {
+            "personal_details": {
+                "name": "John Doe",
+                "email": "john.doe@example.com",
+                "phone_number": "1234567890",
+            },
+            "claim_details": {
+                "date_of_loss": "2022-01-01",
+                "country_of_incident": "US",
+                "description_of_loss": "Test description of loss",
+                "claim_amount": 1000,
+            },
+            "coverage_items": ["Test Coverage Item"],
+            "verification_job_id": job.id,
+            "weighted_sum_of_errors": "0",
+            "error_types": [],
+        }
+        return claim_summary(request)
+
+    def test_claim_summary_POST_request_waits_for_the_verification_job(self):
+        for status in ("Pending", "Running"):
+            job = VerificationJob.objects.create(status=status)
+
+            response = self.post_summary_with_job(job)
+
+            self.assertEqual(response.status_code, 302)
+            self.assertEqual(response.url, reverse("verification_status"))
+            self.assertFalse(Claim.objects.exists())
+
+    def test_claim_summary_POST_request_with_failed_job_is_reviewed(self):
+        job = VerificationJob.objects.create(status="Failed")
+
+        response = self.post_summary_with_job(job)
+
+        self.assertEqual(response.url, reverse("claim_success"))
+        claim = Claim.objects.get()
+        self.assertEqual(claim.status, "To Be Reviewed")
+        self.assertEqual(claim.reasons, VERIFICATION_FAILED_REASON)
+        self.assertIsNone(claim.error_scores)
+        job.refresh_from_db()
+        self.assertEqual(job.claim, claim)
+
     def test_claim_success_GET_request(self):
         customer = Customer.objects.create(
             name="John Doe", email="john.doe@example.com", phone_number="1234567890"
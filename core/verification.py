@@ -0,0 +1,280 @@
+from django.core.files.storage import default_storage
+from django.db import connections
+from django.db.models.fields.files import FieldFile
+from django.utils import timezone
+
+from core.models import VerificationJob
+from core.passport_verification import analyze_passport, check_passport_name
+from core.scoring import calculate_total_weighted_sum_of_errors
+from .baggage_tag_extractor.baggage_tag import process_baggage_tag_images
+from .flight_ticket_extractor.flight_ticket_info_extractor import extract_ticket_info
+from .pipeline import Stage, run_stages
+from .rules import (
+    build_claim_similarity,
+    process_extracted_baggage_data,
+    process_extracted_flight_data,
+)
+
+
+def build_user_data(customer_details):
+    """
+    Build the applicant data that the passport is verified against from the personal details in the session.
+
+    Args:
+        customer_details (dict): The personal details stored in the session, or None.
+
+    Returns:
+        dict: A dictionary containing the name, dob and gender of the applicant.
+    """
+    if not customer_details:
+        return {"name": "", "dob": "", "gender": ""}
+    return {
+        "name": customer_details.get("name", ""),
+        "dob": customer_details.get("dob", ""),
+        "gender": customer_details.get("gender", ""),
+    }
+
+
+def verify_passport(passport, user_data, check_name=True):
+    if isinstance(passport, FieldFile):
+        # The passport was already stored when the verification job was queued
+        passport_actual_path = passport.path
+    else:
+        passport_path = default_storage.save(
+            f"passport_photos/{passport.name}", passport
+        )
+        passport_actual_path = default_storage.path(passport_path)
+
+    passport_scores, passport_data = analyze_passport(
+        passport_actual_path, user_data, check_name
+    )
+    print(f"Passport scores: {passport_scores}")
+    print(f"Passport data: {passport_data}")
+
+    return passport_scores, passport_data
+
+
+def extract_flight_ticket(flight_ticket):
+    # The extractor reads the upload from memory, nothing is written to disk
+    extracted_flight_data = extract_ticket_info(flight_ticket) or {}
+    print(f"Extracted flight data: {extracted_flight_data}")
+
+    return extracted_flight_data
+
+
+def extract_baggage_tags(baggage_tags):
+    # All tags of the claim are extracted concurrently with one Textract client
+    extracted_baggage_data = process_baggage_tag_images(baggage_tags)
+    print(f"Extracted baggage data: {extracted_baggage_data}")
+
+    return extracted_baggage_data
+
+
+def score_flight_ticket(
+    personal_details, passport_data, extracted_flight_data, similarity=None
+):
+    if personal_details and passport_data:
+        personal_details_name = personal_details.get("name", "")
+        passport_name = passport_data.get("name", "")
+
+        flight_ticket_scores = process_extracted_flight_data(
+            personal_details_name, passport_name, extracted_flight_data, similarity
+        )
+        print(
+            "Flight ticket scores: ", flight_ticket_scores
+        )  # Debugging print statement
+        return flight_ticket_scores
+    return None
+
+
+def score_baggage_tag(flight_data, extracted_baggage_data, similarity=None):
+    if flight_data:
+        baggage_tag_scores = process_extracted_baggage_data(
+            flight_data, extracted_baggage_data, similarity
+        )
+        print("baggage_tag_scores: ", baggage_tag_scores)  # Debugging print statement
+        return baggage_tag_scores
+    return None
+
+
+def verify_documents(flight_ticket, baggage_tags, passport, personal_details):
+    """
+    Extracts and verifies the uploaded documents concurrently.
+
+    The flight ticket, baggage tag and passport are each sent to a remote service, so they run in parallel.
+    Once all of them are read, every name, airline and booking reference of the claim is compared in one
+    similarity matrix, which the passport name check and the rule stages share.
+
+    Args:
+        flight_ticket (UploadedFile): The uploaded flight ticket, or None.
+        baggage_tags (list): The uploaded baggage tags, one per bag, or None.
+        passport (UploadedFile): The uploaded passport, or None.
+        personal_details (dict): The personal details stored in the session, or None.
+
+    Returns:
+        dict: A dictionary containing the extracted data and scores of each document.
+    """
+    user_data = build_user_data(personal_details)
+
+    def flight_data_stage():
+        return extract_flight_ticket(flight_ticket) if flight_ticket else None
+
+    def baggage_data_stage():
+        return extract_baggage_tags(baggage_tags) if baggage_tags else None
+
+    def passport_results_stage():
+        try:
+            return (
+                verify_passport(passport, user_data, check_name=False)
+                if passport
+                else (None, None)
+            )
+        finally:
+            # The credit counter is updated from this pool thread, close its connection
+            connections.close_all()
+
+    def similarity_stage(flight_data, baggage_data, passport_results):
+        _, passport_data = passport_results
+        return build_claim_similarity(
+            personal_details_name=user_data["name"],
+            passport_name=(passport_data or {}).get("name", ""),
+            flight_data=flight_data,
+            baggage_data=baggage_data,
+        )
+
+    def passport_scores_stage(passport_results, similarity):
+        passport_scores, passport_data = passport_results
+        if passport_scores is None:
+            return None
+        return check_passport_name(
+            passport_scores, passport_data, user_data, similarity
+        )
+
+    def flight_ticket_scores_stage(flight_data, passport_results, similarity):
+        if not flight_ticket:
+            return None
+        _, passport_data = passport_results
+        return score_flight_ticket(
+            personal_details, passport_data, flight_data, similarity
+        )
+
+    def baggage_tag_scores_stage(flight_data, baggage_data, similarity):
+        if not baggage_tags:
+            return None
+        return score_baggage_tag(flight_data, baggage_data, similarity)
+
+    results = run_stages(
+        [
+            Stage("flight_data", flight_data_stage),
+            Stage("baggage_data", baggage_data_stage),
+            Stage("passport_results", passport_results_stage),
+            Stage(
+                "similarity",
+                similarity_stage,
+                ("flight_data", "baggage_data", "passport_results"),
+            ),
+            Stage(
+                "passport_scores",
+                passport_scores_stage,
+                ("passport_results", "similarity"),
+            ),
+            Stage(
+                "flight_ticket_scores",
+                flight_ticket_scores_stage,
+                ("flight_data", "passport_results", "similarity"),
+            ),
+            Stage(
+                "baggage_tag_scores",
+                baggage_tag_scores_stage,
+                ("flight_data", "baggage_data", "similarity"),
+            ),
+        ]
+    )
+
+    # The matrix is only needed by the stages, it is not stored with the results
+    del results["similarity"]
+    _, results["passport_data"] = results.pop("passport_results")
+    return results
+
+
+def claim_next_job():
+    """
+    Atomically claim the oldest pending verification job.
+
+    The claim is a conditional UPDATE, so several workers can poll the same table without processing a job twice.
+
+    Returns:
+        VerificationJob: The claimed job, or None if no job is pending.
+    """
+    while True:
+        job = (
+            VerificationJob.objects.filter(status="Pending")
+            .order_by("created_on", "id")
+            .first()
+        )
+        if job is None:
+            return None
+
+        claimed = VerificationJob.objects.filter(id=job.id, status="Pending").update(
+            status="Running", started_on=timezone.now()
+        )
+        if claimed:
+            job.refresh_from_db()
+            return job
+        # Another worker claimed the job first, try the next one
+
+
+def requeue_stale_jobs(timeout):
+    """
+    Put running jobs back in the queue when their worker has not finished them within the timeout.
+
+    Args:
+        timeout (timedelta): The maximum time a job may stay in the Running state.
+
+    Returns:
+        int: The number of jobs that were requeued.
+    """
+    return VerificationJob.objects.filter(
+        status="Running", started_on__lt=timezone.now() - timeout
+    ).update(status="Pending", started_on=None)
+
+
+def run_verification_job(job):
+    """
+    Extract and verify the documents of the given job and store the scores on it.
+
+    Args:
+        job (VerificationJob): A job claimed by claim_next_job.
+
+    Returns:
+        VerificationJob: The finished job, with status Done or Failed.
+    """
+    try:
+        results = verify_documents(
+            job.flight_ticket or None,
+            [baggage_tag.file for baggage_tag in job.baggage_tags.all()],
+            job.passport or None,
+            job.personal_details or None,
+        )
+        weighted_sum_of_errors, error_types = calculate_total_weighted_sum_of_errors(
+            results["passport_scores"],
+            results["flight_ticket_scores"],
+            results["baggage_tag_scores"],
+        )
+        print(f"Weighted sum of errors for job {job.id}: {weighted_sum_of_errors}")
+        print(f"Error Types for job {job.id}: {error_types}")
+
+        job.results = {
+            **results,
+            "weighted_sum_of_errors": str(weighted_sum_of_errors),
+            "error_types": error_types,
+        }
+        job.status = "Done"
+    except Exception as e:
+        print(f"Verification job {job.id} failed: {e}")
+        job.error_message = str(e)
+        job.status = "Failed"
+
+    job.finished_on = timezone.now()
+    job.save(update_fields=["results", "status", "error_message", "finished_on"])
+    return job